@@ -62,20 +62,19 @@ def add_prow_env(spec):
   return spec
 
 def deep_copy(d):
-  """Perform a deep copy of the supplied object"""
-  s = yaml.dump(d)
-  return yaml.load(s)
+  """Perform a deep copy of the supplied object.
 
-def add_task_only_to_dag(workflow, dag_name, task_name, template_name,
-                         dependencies):
-  """Add a task but do not create a template in the dag.
-
-  Args:
-    workflow: The Argo workflow.
-    dag_name: The name of the dag.
-    task_name: Name to give the task
-    template_name: Name of the template to use
+  The object must be made of dicts, lists and scalars; i.e. something that
+  can be serialized to YAML or JSON. This is much faster than round tripping
+  the object through YAML or using copy.deepcopy.
   """
+  if isinstance(d, dict):
+    return {k: deep_copy(v) for k, v in d.items()}
+  if isinstance(d, (list, tuple)):
+    return [deep_copy(v) for v in d]
+  return d
+
+def _find_dag(workflow, dag_name):
   dag = None
   for t in workflow["spec"]["templates"]:
     if "dag" not in t:
@@ -85,7 +84,9 @@ def add_task_only_to_dag(workflow, dag_name, task_name, template_name,
 
   if not dag:
     raise ValueError("No dag named {0} found".format(dag_name))
+  return dag
 
+def _append_task(dag, task_name, template_name, dependencies):
   if not dag["dag"].get("tasks"):
     dag["dag"]["tasks"] = []
 
@@ -94,10 +95,34 @@ def add_task_only_to_dag(workflow, dag_name, task_name, template_name,
     "template": template_name,
   }
 
-  dag["dag"]["tasks"].append(new_task)
   if dependencies:
     new_task["dependencies"] = dependencies
 
+  dag["dag"]["tasks"].append(new_task)
+  return new_task
+
+def _copy_template(task):
+  if "name" not in task:
+    raise ValueError("Task template is missing name")
+
+  if not task["name"]:
+    raise ValueError("Task template name can't be empty string")
+
+  return deep_copy(task)
+
+def add_task_only_to_dag(workflow, dag_name, task_name, template_name,
+                         dependencies):
+  """Add a task but do not create a template in the dag.
+
+  Args:
+    workflow: The Argo workflow.
+    dag_name: The name of the dag.
+    task_name: Name to give the task
+    template_name: Name of the template to use
+  """
+  _append_task(_find_dag(workflow, dag_name), task_name, template_name,
+               dependencies)
+
 # TODO(jlewi): We should rename this function to something that
 # better captures the fact that we are adding a task and template
 # simultaneously. Maybe just add_template_to_dag?
@@ -110,47 +135,95 @@ def add_task_to_dag(workflow, dag_name, task, dependencies):
 
   Create a template and a task referencing that template.
 
+  Each call scans the templates to find the dag; use WorkflowBuilder when
+  building large workflows.
+
   Args:
     workflow: The workflow spec
     dag_name: The name of the dag to add the step to
     task: The task template
     dependencies: A list of dependencies
   """
+  dag = _find_dag(workflow, dag_name)
+  new_template = _copy_template(task)
+  _append_task(dag, task["name"], task["name"], dependencies)
+  workflow["spec"]["templates"].append(new_template)
 
-  dag = None
-  for t in workflow["spec"]["templates"]:
-    if "dag" not in t:
-      continue
-    if t["name"] == dag_name:
-      dag = t
-
-  if not dag:
-    raise ValueError("No dag named {0} found".format(dag_name))
-
-  if not dag["dag"].get("tasks"):
-    dag["dag"]["tasks"] = []
-
-  new_task = {
-    "name": task["name"],
-    "template": task["name"],
-  }
-
-  if dependencies:
-    new_task["dependencies"] = dependencies
-
-  dag["dag"]["tasks"].append(new_task)
-
-  new_template = deep_copy(task)
+  return new_template
 
-  if "name" not in new_template:
-    raise ValueError("Task template is missing name")
+class WorkflowBuilder(object):
+  """Build an Argo workflow.
 
-  if not new_template["name"]:
-    raise ValueError("Task template name can't be empty string")
+  Templates are indexed by name so adding a task doesn't need to scan the
+  workflow. The workflow is only serialized once by to_yaml.
+  """
 
-  workflow["spec"]["templates"].append(new_template)
+  def __init__(self, workflow):
+    """Create the builder.
+
+    Args:
+      workflow: The scaffolding for the workflow; i.e. a workflow whose
+        templates include the dags tasks are added to.
+    """
+    self.workflow = workflow
+    self._templates = {}
+    for t in workflow["spec"]["templates"]:
+      self._templates[t["name"]] = t
+
+  def _dag(self, dag_name):
+    dag = self._templates.get(dag_name)
+    if not dag or "dag" not in dag:
+      raise ValueError("No dag named {0} found".format(dag_name))
+    return dag
+
+  def add_template(self, template):
+    """Add a copy of template to the workflow and return the copy."""
+    new_template = _copy_template(template)
+    if new_template["name"] in self._templates:
+      raise ValueError("Workflow already has a template named {0}".format(
+        new_template["name"]))
+    self.workflow["spec"]["templates"].append(new_template)
+    self._templates[new_template["name"]] = new_template
+    return new_template
+
+  def add_task_only_to_dag(self, dag_name, task_name, template_name,
+                           dependencies):
+    """Add a task using an existing template to a dag.
+
+    Args:
+      dag_name: The name of the dag.
+      task_name: Name to give the task
+      template_name: Name of the template to use
+      dependencies: A list of dependencies
+    """
+    if template_name not in self._templates:
+      raise ValueError("No template named {0} found".format(template_name))
+    return _append_task(self._dag(dag_name), task_name, template_name,
+                        dependencies)
+
+  def add_task_to_dag(self, dag_name, task, dependencies):
+    """Add a template and a task referencing that template to a dag.
+
+    Args:
+      dag_name: The name of the dag to add the step to
+      task: The task template; it is copied.
+      dependencies: A list of dependencies
+
+    Returns:
+      new_template: The template added to the workflow.
+    """
+    dag = self._dag(dag_name)
+    new_template = self.add_template(task)
+    _append_task(dag, task["name"], task["name"], dependencies)
+    return new_template
+
+  def build(self):
+    """Set the labels on all the templates and return the workflow."""
+    return set_task_template_labels(self.workflow)
+
+  def to_yaml(self):
+    return yaml.safe_dump(self.build())
 
-  return new_template
 def set_task_template_labels(workflow):
   """Automatically set the labels and annotations on each step.
 
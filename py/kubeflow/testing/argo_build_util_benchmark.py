@@ -0,0 +1,101 @@
+"""Micro-benchmark for building an Argo workflow with a large DAG.
+
+Compares building a DAG with the module level functions in argo_build_util,
+which scan the templates on every call, to building it with WorkflowBuilder.
+The yaml round trip copy that deep_copy used to do is included as a baseline.
+
+Usage:
+  python -m kubeflow.testing.argo_build_util_benchmark --num_tasks=500
+"""
+import argparse
+import logging
+import timeit
+
+import yaml
+
+from kubeflow.testing import argo_build_util
+
+DAG_NAME = "e2e"
+
+def _scaffold():
+  return {
+    "apiVersion": "argoproj.io/v1alpha1",
+    "kind": "Workflow",
+    "metadata": {
+      "name": "benchmark",
+      "labels": {"workflow": "benchmark"},
+    },
+    "spec": {
+      "entrypoint": DAG_NAME,
+      "templates": [{"name": DAG_NAME, "dag": {"tasks": []}}],
+    },
+  }
+
+def _task_template():
+  return {
+    "activeDeadlineSeconds": 3000,
+    "container": {
+      "command": ["python", "-m", "some.module"],
+      "env": [{"name": "ENV_{0}".format(i), "value": str(i)}
+              for i in range(20)],
+      "image": "gcr.io/kubeflow-ci/test-worker:latest",
+      "resources": {"limits": {"cpu": "4", "memory": "4Gi"},
+                    "requests": {"cpu": "1", "memory": "1536Mi"}},
+      "volumeMounts": [{"mountPath": "/mnt/test-data-volume",
+                        "name": "kubeflow-test-volume"}],
+    },
+    "metadata": {"labels": {"workflow_template": "benchmark"}},
+    "outputs": {},
+  }
+
+def _yaml_round_trip(d):
+  return yaml.safe_load(yaml.safe_dump(d))
+
+def build_with_functions(num_tasks, copy=argo_build_util.deep_copy):
+  workflow = _scaffold()
+  template = _task_template()
+  previous = []
+  for i in range(num_tasks):
+    task = copy(template)
+    task["name"] = "task-{0}".format(i)
+    argo_build_util.add_task_to_dag(workflow, DAG_NAME, task, previous)
+    previous = [task["name"]]
+  return yaml.safe_dump(argo_build_util.set_task_template_labels(workflow))
+
+def build_with_builder(num_tasks):
+  builder = argo_build_util.WorkflowBuilder(_scaffold())
+  template = _task_template()
+  previous = []
+  for i in range(num_tasks):
+    template["name"] = "task-{0}".format(i)
+    builder.add_task_to_dag(DAG_NAME, template, previous)
+    previous = [template["name"]]
+  return builder.to_yaml()
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--num_tasks", default=500, type=int,
+                      help="Number of tasks in the DAG.")
+  parser.add_argument("--repeat", default=3, type=int,
+                      help="Number of times to build the workflow.")
+  args = parser.parse_args()
+
+  cases = [
+    ("functions with yaml round trip copies",
+     lambda: build_with_functions(args.num_tasks, copy=_yaml_round_trip)),
+    ("functions", lambda: build_with_functions(args.num_tasks)),
+    ("WorkflowBuilder", lambda: build_with_builder(args.num_tasks)),
+  ]
+  for name, func in cases:
+    seconds = min(timeit.repeat(func, number=1, repeat=args.repeat))
+    logging.info("%s: %.3f seconds to build a %s task DAG", name, seconds,
+                 args.num_tasks)
+
+if __name__ == "__main__":
+  logging.basicConfig(level=logging.INFO,
+                      format=('%(levelname)s|%(asctime)s'
+                              '|%(pathname)s|%(lineno)d| %(message)s'),
+                      datefmt='%Y-%m-%dT%H:%M:%S',
+                      )
+  logging.getLogger().setLevel(logging.INFO)
+  main()
@@ -0,0 +1,76 @@
+import logging
+
+import pytest
+
+from kubeflow.testing import argo_build_util
+
+def _workflow():
+  return {
+    "metadata": {"name": "some-workflow", "labels": {"workflow": "w"}},
+    "spec": {
+      "templates": [{"name": "e2e", "dag": {"tasks": []}}],
+    },
+  }
+
+def test_deep_copy():
+  original = {"a": [{"b": 1}], "c": "d"}
+  copy = argo_build_util.deep_copy(original)
+  assert copy == original
+  copy["a"][0]["b"] = 2
+  assert original["a"][0]["b"] == 1
+
+def test_workflow_builder():
+  builder = argo_build_util.WorkflowBuilder(_workflow())
+  task = {"name": "checkout", "container": {"command": ["ls"]},
+          "metadata": {"labels": {}}}
+  builder.add_task_to_dag("e2e", task, [])
+  task["name"] = "test"
+  test_template = builder.add_task_to_dag("e2e", task, ["checkout"])
+  test_template["container"]["command"].append("-l")
+  builder.add_task_only_to_dag("e2e", "test-again", "test", ["test"])
+
+  workflow = builder.build()
+
+  assert workflow["spec"]["templates"][0]["dag"]["tasks"] == [
+    {"name": "checkout", "template": "checkout"},
+    {"name": "test", "template": "test", "dependencies": ["checkout"]},
+    {"name": "test-again", "template": "test", "dependencies": ["test"]},
+  ]
+  templates = {t["name"]: t for t in workflow["spec"]["templates"]}
+  assert templates["checkout"]["container"]["command"] == ["ls"]
+  assert templates["test"]["container"]["command"] == ["ls", "-l"]
+  assert templates["test"]["metadata"]["labels"]["step_name"] == "test"
+
+  # The builder produces the same workflow as the module level functions.
+  expected = _workflow()
+  task["name"] = "checkout"
+  argo_build_util.add_task_to_dag(expected, "e2e", task, [])
+  task["name"] = "test"
+  argo_build_util.add_task_to_dag(expected, "e2e", task, ["checkout"])
+  expected["spec"]["templates"][-1]["container"]["command"].append("-l")
+  argo_build_util.add_task_only_to_dag(expected, "e2e", "test-again", "test",
+                                       ["test"])
+  assert argo_build_util.set_task_template_labels(expected) == workflow
+
+def test_workflow_builder_errors():
+  builder = argo_build_util.WorkflowBuilder(_workflow())
+  builder.add_task_to_dag("e2e", {"name": "checkout"}, [])
+
+  with pytest.raises(ValueError):
+    builder.add_task_to_dag("missing", {"name": "other"}, [])
+  with pytest.raises(ValueError):
+    builder.add_task_to_dag("checkout", {"name": "other"}, [])
+  with pytest.raises(ValueError):
+    builder.add_task_to_dag("e2e", {"name": "checkout"}, [])
+  with pytest.raises(ValueError):
+    builder.add_task_only_to_dag("e2e", "other", "missing", [])
+
+if __name__ == "__main__":
+  logging.basicConfig(
+      level=logging.INFO,
+      format=('%(levelname)s|%(asctime)s'
+            '|%(pathname)s|%(lineno)d| %(message)s'),
+    datefmt='%Y-%m-%dT%H:%M:%S',
+    )
+  logging.getLogger().setLevel(logging.INFO)
+  pytest.main()
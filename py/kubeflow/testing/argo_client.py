@@ -5,6 +5,7 @@ import json
 import logging
 import six
 import time
+import uuid
 
 if six.PY3:
   import http
@@ -12,9 +13,11 @@ else:
   import httplib
 
 from kubernetes import client as k8s_client # pylint: disable=wrong-import-position
+from kubernetes import watch # pylint: disable=wrong-import-position
 from kubernetes.client import rest # pylint: disable=wrong-import-position
 from retrying import retry # pylint: disable=wrong-import-position
 
+from kubeflow.testing import k8s_clients # pylint: disable=wrong-import-position
 from kubeflow.testing import util # pylint: disable=wrong-import-position
 
 GROUP = "argoproj.io"
@@ -22,6 +25,12 @@ VERSION = "v1alpha1"
 PLURAL = "workflows"
 KIND = "Workflow"
 
+# Label identifying the workflows submitted by this process so waits only
+# list and watch those workflows rather than every workflow in the namespace.
+RUNNER_LABEL = "testing.kubeflow.org/runner-id"
+RUNNER_ID = uuid.uuid4().hex[0:12]
+RUNNER_SELECTOR = "{0}={1}".format(RUNNER_LABEL, RUNNER_ID)
+
 def log_status(workflow):
   """A callback to use with wait_for_workflow."""
   try:
@@ -71,9 +80,13 @@ def handle_retriable_exception(exception):
       # we need to reload the kube config (which refreshes the GCP token).
       # TODO(richardsliu): Remove this workaround when the k8s client issue
       # is resolved.
-      util.load_kube_config()
+      k8s_clients.refresh()
+      k8s_clients.COUNTERS.increment("retries")
       return True
-  return not isinstance(exception, util.TimeoutError)
+  if isinstance(exception, util.TimeoutError):
+    return False
+  k8s_clients.COUNTERS.increment("retries")
+  return True
 
 
 # Wait 2^x * 1 second between retries up to a max of 10 seconds between
@@ -94,32 +107,182 @@ def get_namespaced_custom_object_with_retries(namespace, name):
     namespace: namespace for the workflow.
     name: name of the workflow.
   """
-  # Due to https://github.com/kubernetes-client/python-base/issues/59,
-  # we need to recreate the API client since it may contain stale auth
-  # tokens.
-  # TODO(richardsliu): Remove this workaround when the k8s client issue
-  # is resolved.
-  client = k8s_client.ApiClient()
-  crd_api = k8s_client.CustomObjectsApi(client)
+  crd_api = k8s_client.CustomObjectsApi(k8s_clients.get_api_client())
   return crd_api.get_namespaced_custom_object(
     GROUP, VERSION, namespace, PLURAL, name)
 
+@retry(wait_exponential_multiplier=1000, wait_exponential_max=10000,
+       stop_max_delay=5*60*1000,
+       retry_on_exception=handle_retriable_exception)
+def add_runner_label(namespace, name):
+  """Label a workflow as submitted by this process; see RUNNER_LABEL.
+
+  This is for workflows created by other tools (e.g. ks apply); set the
+  label in the spec of workflows created directly.
+
+  Args:
+    namespace: namespace for the workflow.
+    name: name of the workflow.
+  """
+  crd_api = k8s_client.CustomObjectsApi(k8s_clients.get_api_client())
+  return crd_api.patch_namespaced_custom_object(
+    GROUP, VERSION, namespace, PLURAL, name,
+    {"metadata": {"labels": {RUNNER_LABEL: RUNNER_ID}}})
+
+
+# Phases of a workflow that has finished.
+DONE_PHASES = ["Failed", "Succeeded"]
+
+def _is_done(workflow):
+  # Sometimes it takes a while for the argo controller to populate
+  # the status field of an object.
+  return workflow.get("status", {}).get("phase", "") in DONE_PHASES
+
+class _WorkflowWatcher: # pylint: disable=too-many-instance-attributes
+  """Track the state of a set of workflows using a single watch.
+
+  The watcher lists the workflows once and then follows a watch on the
+  workflows in the namespace starting from the resourceVersion of the list.
+  If the watch disconnects it is resumed from the last resourceVersion seen;
+  if that version is too old (an ERROR event or a 410 Gone ApiException) the
+  workflows are listed again.
+  """
+
+  def __init__(self, crd_api, namespace, workflow_names, label_selector=None,
+               status_callback=None):
+    self._crd_api = crd_api
+    self._namespace = namespace
+    self._names = list(workflow_names)
+    self._label_selector = label_selector
+    self._status_callback = status_callback
+    self._resource_version = None
+    # Map from workflow name to the most recent version of the workflow.
+    self.workflows = {}
+    # Names of tracked workflows that were deleted.
+    self.deleted = []
+
+  def _kwargs(self):
+    kwargs = {}
+    if self._label_selector:
+      kwargs["label_selector"] = self._label_selector
+    return kwargs
+
+  def _update(self, workflow, name=None):
+    if name is None:
+      name = workflow.get("metadata", {}).get("name")
+    if name not in self._names:
+      return
+    self.workflows[name] = workflow
+    if self._status_callback:
+      self._status_callback(workflow)
+
+  def results(self):
+    """Return the most recent version of the tracked workflows in order."""
+    return [self.workflows[n] for n in self._names if n in self.workflows]
+
+  def done(self):
+    return (len(self.workflows) == len(self._names) and
+            all(_is_done(w) for w in self.workflows.values()))
+
+  def list(self):
+    """List the workflows and remember the resourceVersion of the list."""
+    workflows = self._crd_api.list_namespaced_custom_object(
+      GROUP, VERSION, self._namespace, PLURAL, **self._kwargs())
+    self._resource_version = workflows.get("metadata", {}).get(
+      "resourceVersion")
+    for w in workflows.get("items", []):
+      self._update(w)
+
+    # Workflows the list didn't return (e.g. because they don't match the
+    # label selector) are fetched directly.
+    for name in self._names:
+      if name not in self.workflows:
+        self._update(get_namespaced_custom_object_with_retries(
+          self._namespace, name), name=name)
+
+  def watch(self, timeout_seconds):
+    """Follow the watch until the workflows are done or the watch ends.
+
+    Args:
+      timeout_seconds: Maximum time the watch request stays open.
+    """
+    w = watch.Watch()
+    kwargs = self._kwargs()
+    if self._resource_version:
+      kwargs["resource_version"] = self._resource_version
+
+    try:
+      for event in w.stream(self._crd_api.list_namespaced_custom_object,
+                            GROUP, VERSION, self._namespace, PLURAL,
+                            timeout_seconds=timeout_seconds, **kwargs):
+        workflow = event["object"]
+
+        if event["type"] == "ERROR":
+          # The resourceVersion we resumed from is too old (410 Gone);
+          # list again to get a new starting point.
+          logging.info("Watch on workflows returned an error; relisting: %s",
+                       workflow.get("message"))
+          self.list()
+          return
+
+        self._resource_version = workflow.get("metadata", {}).get(
+          "resourceVersion", self._resource_version)
+
+        if event["type"] == "DELETED":
+          name = workflow.get("metadata", {}).get("name")
+          if name in self._names:
+            self.deleted.append(name)
+            return
+          continue
+
+        self._update(workflow)
+        if self.done():
+          return
+    except rest.ApiException as e:
+      # Newer kubernetes clients raise 410 Gone instead of yielding an
+      # ERROR event. Resuming from the same resourceVersion would fail
+      # again so list to get a new starting point.
+      if e.status != 410:
+        raise
+      logging.info("Watch on workflows returned 410 Gone; relisting: %s",
+                   e.reason)
+      self.list()
+    finally:
+      w.stop()
+
+@retry(wait_exponential_multiplier=1000, wait_exponential_max=10000,
+       stop_max_delay=5*60*1000,
+       retry_on_exception=handle_retriable_exception)
+def _retry_watch(func, *args):
+  """Call func with retries; used to resume watches that disconnect."""
+  return func(*args)
+
 
 def wait_for_workflows(namespace,
                        workflow_names,
                        timeout=datetime.timedelta(minutes=30),
                        polling_interval=datetime.timedelta(seconds=30),
-                       status_callback=None):
+                       status_callback=None,
+                       label_selector=None,
+                       api_client=None):
   """Wait for multiple workflows to finish.
 
+  The workflows are listed once and then a single watch on the workflows in
+  the namespace is used to detect when they finish.
+
   Args:
     namespace: namespace for the workflow.
     workflow_names: Names of the workflows to wait for.
     timeout: How long to wait for the workflow.
-    polling_interval: How often to poll for the status of the workflow.
+    polling_interval: Maximum time a single watch request is kept open before
+      it is resumed.
     status_callback: (Optional): Callable. If supplied this callable is
-      invoked after we poll the job. Callable takes a single argument which
-      is the job.
+      invoked each time we observe a new version of one of the workflows.
+      Callable takes a single argument which is the workflow.
+    label_selector: (Optional) Label selector for the watch; this reduces the
+      number of events for namespaces with many workflows.
+    api_client: (Optional) K8s ApiClient for the cluster running the
+      workflows; defaults to the shared client for the default cluster.
 
   Returns:
     results: A list of the final status of the workflows.
@@ -128,36 +291,37 @@ def wait_for_workflows(namespace,
     exceptions and stores the most recent set of workflow results.
   """
   end_time = datetime.datetime.now() + timeout
-  while True:
-    all_results = []
-
-    try:
-      for name in workflow_names:
-        results = get_namespaced_custom_object_with_retries(namespace, name)
-        all_results.append(results)
-        if status_callback:
-          status_callback(results)
-    except Exception as e:
-      raise util.ExceptionWithWorkflowResults(repr(e), all_results)
+  crd_api = k8s_client.CustomObjectsApi(
+    api_client or k8s_clients.get_api_client())
+  watcher = _WorkflowWatcher(crd_api, namespace, workflow_names,
+                             label_selector=label_selector,
+                             status_callback=status_callback)
 
-    done = True
-    for results in all_results:
-      # Sometimes it takes a while for the argo controller to populate
-      # the status field of an object.
-      if results.get("status", {}).get("phase", "") not in ["Failed", "Succeeded"]:
-        done = False
-        break
+  try:
+    _retry_watch(watcher.list)
+  except Exception as e:
+    raise util.ExceptionWithWorkflowResults(repr(e), watcher.results())
 
-    if done:
-      return all_results
+  while not watcher.done():
+    if watcher.deleted:
+      message = "Workflows {0} in namespace {1} were deleted before they " \
+                "finished".format(",".join(watcher.deleted), namespace)
+      raise util.ExceptionWithWorkflowResults(message, watcher.results())
 
-    if datetime.datetime.now() + polling_interval > end_time:
+    remaining = (end_time - datetime.datetime.now()).total_seconds()
+    if remaining <= 0:
       message = "Timeout waiting for workflows {0} in namespace {1} " \
                 "to finish".format(",".join(workflow_names), namespace)
-      raise util.ExceptionWithWorkflowResults(message, all_results)
+      raise util.ExceptionWithWorkflowResults(message, watcher.results())
 
-    time.sleep(polling_interval.seconds)
+    timeout_seconds = int(max(1, min(remaining,
+                                     polling_interval.total_seconds())))
+    try:
+      _retry_watch(watcher.watch, timeout_seconds)
+    except Exception as e:
+      raise util.ExceptionWithWorkflowResults(repr(e), watcher.results())
 
+  return watcher.results()
 
 def wait_for_workflow(namespace, name,
                       timeout=datetime.timedelta(minutes=30),
@@ -169,10 +333,11 @@ def wait_for_workflow(namespace, name,
     namespace: namespace for the workflow.
     name: Name of the workflow
     timeout: How long to wait for the workflow.
-    polling_interval: How often to poll for the status of the workflow.
+    polling_interval: Maximum time a single watch request is kept open before
+      it is resumed.
     status_callback: (Optional): Callable. If supplied this callable is
-      invoked after we poll the job. Callable takes a single argument which
-      is the job.
+      invoked each time we observe a new version of the workflow. Callable
+      takes a single argument which is the workflow.
 
   Raises:
     TimeoutError: If timeout waiting for the job to finish.
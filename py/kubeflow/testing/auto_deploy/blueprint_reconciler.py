@@ -13,6 +13,7 @@ from dateutil import parser as date_parser
 import fire
 import logging
 import os
+import queue
 import re
 import time
 import uuid
@@ -25,6 +26,7 @@ from kubeflow.testing import gcp_util
 from kubeflow.testing import git_repo_manager
 from kubeflow.testing import kf_logging
 from kubeflow.testing import tekton_cr_clients
+from kubeflow.testing.auto_deploy import triggers
 from kubernetes import client as k8s_client
 from kubernetes import config as k8s_config
 from kubernetes.client import rest
@@ -55,6 +57,15 @@ PERIODIC_REDEPLOY = datetime.timedelta(hours=12)
 # TODO(jlewi): We shouldn't hardcode this.
 NAMESPACE = "kubeflow-ci-deployment"
 
+# The reconciler reacts to changes to clusters, PipelineRuns and branches
+# but still lists everything and fetches the repos on this interval in case
+# it missed an event.
+RESYNC_PERIOD = datetime.timedelta(minutes=30)
+
+# How long to wait for more events after the first one before reconciling
+# so that a burst of events results in a single reconcile.
+DEBOUNCE_PERIOD = datetime.timedelta(seconds=5)
+
 def _pipeline_is_running(j):
   """Return true if the specified K8s job is still running.
 
@@ -259,6 +270,21 @@ class BlueprintReconciler: # pylint: disable=too-many-instance-attributes
     self._tekton_api = None
     self._management_api = None
 
+    # Triggers; created by _start_triggers. Watchers of PipelineRuns are
+    # keyed by namespace.
+    self._events = queue.Queue()
+    self._cluster_watcher = None
+    self._runs_watchers = {}
+    self._git_poller = None
+
+    # Map from (git_url, branch) to the head of the branch the last time the
+    # repo was fetched.
+    self._fetched_heads = {}
+
+    # Time in seconds since the epoch at which a group that was skipped
+    # might need a new deployment; None if there is no such group.
+    self._next_wakeup = None
+
   @property
   def management_api(self):
     if not self._management_api:
@@ -347,10 +373,12 @@ class BlueprintReconciler: # pylint: disable=too-many-instance-attributes
   def _iter_blueprints(self):
     """Return an iterator over blueprints.
 
-    Args:
-      namespace: The namespace to look for blueprints
-      context: The kube context to use.
+    Uses the clusters of the cluster watcher once it has listed them.
     """
+    if self._cluster_watcher and self._cluster_watcher.synced:
+      yield from self._cluster_watcher.items()
+      return
+
     # We need to load the kube config so that we can have credentials to
     # talk to the APIServer.
     crd_api = cnrm_clients.CnrmClientApi(self.management_api, "containercluster")
@@ -468,9 +496,11 @@ class BlueprintReconciler: # pylint: disable=too-many-instance-attributes
 
     runs_client = tekton_cr_clients.TektonClientApi(
       api_client, "PipelineRun")
+    # Always list rather than use the watcher's copy; it might not have seen
+    # a run we just created yet and we'd launch a duplicate.
     runs = runs_client.list_namespaced(namespace, label_selector=selector)
 
-    if runs.items:
+    if runs.get("items"):
       for j in runs["items"]:
         logging.info(f"Found PipelineRun {j['metadata']['name']}",
                      extra=self._log_context)
@@ -597,7 +627,45 @@ class BlueprintReconciler: # pylint: disable=too-many-instance-attributes
         }
         self._delete_blueprint(labels)
 
-  def _reconcile(self):
+  def _schedule_wakeup(self, when):
+    """Reconcile again no later than when even if nothing changes.
+
+    Args:
+      when: datetime.datetime with a timezone.
+    """
+    when = when.timestamp()
+    if self._next_wakeup is None or when < self._next_wakeup:
+      self._next_wakeup = when
+
+  def _fetch(self, repo, git_url, branch, full_resync):
+    """Fetch the repo unless the head of branch is already fetched."""
+    head = None
+    if self._git_poller:
+      head = self._git_poller.head(git_url, branch)
+
+    key = (git_url, branch)
+    if not full_resync and head and self._fetched_heads.get(key) == head:
+      logging.info(f"Head of {git_url}#{branch} is still {head}; not "
+                   f"fetching", extra=self._log_context)
+      return
+
+    repo.fetch()
+    self._fetched_heads[key] = head
+
+  def _reconcile(self, full_resync=True):
+    """Launch and GC deployments.
+
+    Args:
+      full_resync: If true list the clusters and PipelineRuns and fetch the
+        repos even if no changes were observed.
+    """
+    if full_resync:
+      for w in [self._cluster_watcher] + list(self._runs_watchers.values()):
+        if w:
+          w.resync()
+
+    self._next_wakeup = None
+
     # Get the deployments.
     self._get_deployments()
 
@@ -633,7 +701,7 @@ class BlueprintReconciler: # pylint: disable=too-many-instance-attributes
       full_branch = f"{repo.remote_name}/{branch}"
 
       # Sync the repositories because we use this to find the latest changes.
-      repo.fetch()
+      self._fetch(repo, git_url, branch, full_resync)
       last_commit = repo.last_commit(full_branch, "")
       logging.info(f"Last commit to group={run.group} "
                    f"commit={last_commit}", extra=self._log_context)
@@ -656,6 +724,7 @@ class BlueprintReconciler: # pylint: disable=too-many-instance-attributes
             time_since_last_deploy < PERIODIC_REDEPLOY):
           logging.info(f"group={run.group} no sync needed",
                        extra=self._log_context)
+          self._schedule_wakeup(last_deployed.create_time + PERIODIC_REDEPLOY)
           continue
 
         logging.info(f"group={run.group} sync needed",
@@ -666,6 +735,8 @@ class BlueprintReconciler: # pylint: disable=too-many-instance-attributes
           logging.info(f"group={run.group} can't start a new deployment "
                        f"because deployment for {last_deployed.deployment_name }"
                        f"is only {minutes} minutes old", extra=self._log_context)
+          self._schedule_wakeup(last_deployed.create_time +
+                                MIN_TIME_BETWEEN_DEPLOYMENTS)
           continue
       else:
         logging.info(f"group={run.group} has no active deployments",
@@ -686,17 +757,110 @@ class BlueprintReconciler: # pylint: disable=too-many-instance-attributes
     # 30 minutes old so that we know its ready.
     self._gc_deployments()
 
-  def run(self, period=datetime.timedelta(minutes=5)):
-    """Continuously reconcile."""
+  def _on_change(self, source, event_type, old, new):
+    """Queue a reconcile if a change might require one.
+
+    Called from the threads of the triggers.
+    """
+    if event_type == triggers.SYNCED:
+      return
+
+    if event_type == triggers.MODIFIED and source != "git":
+      if source == "containerclusters":
+        # Only labels matter to the reconciler; e.g. the commit.
+        changed = (old or {}).get("metadata", {}).get("labels") != (
+          new["metadata"].get("labels"))
+      else:
+        changed = old is None or (_pipeline_is_running(old) !=
+                                  _pipeline_is_running(new))
+      if not changed:
+        return
+
+    self._events.put(f"{source} {event_type}")
+
+  def _start_triggers(self):
+    """Start watching clusters and PipelineRuns and polling the branches."""
+    crd_api = cnrm_clients.CnrmClientApi(self.management_api,
+                                         "containercluster")
+    self._cluster_watcher = triggers.ResourceWatcher(
+      "containerclusters", crd_api.list_namespaced, NAMESPACE,
+      self._on_change, label_selector=GROUP_LABEL)
+
+    runs_client = tekton_cr_clients.TektonClientApi(self.tekton_api,
+                                                    "PipelineRun")
+    namespaces = set()
+    branches = set()
+    for run in self._pipeline_runs:
+      namespaces.add(os.getenv("JOB_NAMESPACE") or
+                     run.resource["metadata"]["namespace"])
+      branches.add((run.get_resource_param(BLUEPRINTS_REPO, "url"),
+                    run.get_resource_param(BLUEPRINTS_REPO, "revision")))
+
+    for namespace in sorted(namespaces):
+      self._runs_watchers[namespace] = triggers.ResourceWatcher(
+        f"pipelineruns/{namespace}", runs_client.list_namespaced, namespace,
+        self._on_change, label_selector=GROUP_LABEL)
+
+    self._git_poller = triggers.GitHeadPoller(branches, self._on_change)
+
+    # Poll once before the first reconcile so it knows the heads.
+    self._git_poller.poll()
+    for w in [self._cluster_watcher] + list(self._runs_watchers.values()):
+      w.start()
+    self._git_poller.start()
+
+  def _wait_for_event(self, deadline):
+    """Wait for a change or until deadline.
+
+    Args:
+      deadline: Time in seconds since the epoch.
+
+    Returns:
+      reason: Description of why the reconciler woke up.
+    """
+    try:
+      reasons = [self._events.get(timeout=max(deadline - time.time(), 0))]
+    except queue.Empty:
+      return "timer"
+
+    time.sleep(DEBOUNCE_PERIOD.total_seconds())
+    while True:
+      try:
+        reasons.append(self._events.get_nowait())
+      except queue.Empty:
+        break
+    return ", ".join(sorted(set(reasons)))
+
+  def run(self, resync_period=RESYNC_PERIOD):
+    """Continuously reconcile.
+
+    Reconciles whenever a cluster, PipelineRun or branch changes and does a
+    full resync every resync_period.
+    """
 
     # Ensure we can get GCP credentials
     if not gcp_util.get_gcp_credentials():
       raise RuntimeError("Could not get GCP application default credentials")
 
+    self._start_triggers()
+
+    next_resync = 0
     while True:
-      self._reconcile()
-      logging.info(f"Wait {period}(HH:MM:SS) before reconciling; ")
-      time.sleep(period.total_seconds())
+      now = time.time()
+      full_resync = now >= next_resync
+      if full_resync:
+        next_resync = now + resync_period.total_seconds()
+
+      self._reconcile(full_resync=full_resync)
+
+      deadline = next_resync
+      if self._next_wakeup is not None:
+        deadline = min(deadline, self._next_wakeup)
+      wait = datetime.timedelta(seconds=int(max(deadline - time.time(), 0)))
+      logging.info(f"Wait up to {wait}(HH:MM:SS) for changes before "
+                   f"reconciling")
+      reason = self._wait_for_event(deadline)
+      logging.info(f"Reconciling because of: {reason}")
 
 class CLI:
   @staticmethod
@@ -25,6 +25,71 @@ def test_pipeline_wrapper():
   run.set_param("name", "newname")
   assert run.get_param("name") == "newname"
 
+def test_on_change():
+  # pylint: disable=protected-access
+  reconciler = blueprint_reconciler.BlueprintReconciler(pipeline_runs=[])
+
+  def _events():
+    events = []
+    while not reconciler._events.empty():
+      events.append(reconciler._events.get())
+    return events
+
+  cluster = {"metadata": {"labels": {"a": "b"}}, "status": {}}
+  relabeled = {"metadata": {"labels": {"a": "c"}}, "status": {"x": 1}}
+  reconciler._on_change("containerclusters", "MODIFIED", cluster,
+                        dict(cluster, status={"x": 1}))
+  reconciler._on_change("containerclusters", "SYNCED", None, None)
+  assert not _events()
+
+  reconciler._on_change("containerclusters", "MODIFIED", cluster, relabeled)
+  reconciler._on_change("containerclusters", "DELETED", None, relabeled)
+  assert _events() == ["containerclusters MODIFIED",
+                       "containerclusters DELETED"]
+
+  running = {"metadata": {}, "status": {"conditions": [
+    {"type": "Running"}]}}
+  done = {"metadata": {}, "status": {"conditions": [
+    {"type": "Succeeded"}]}}
+  reconciler._on_change("pipelineruns/ns", "MODIFIED", running, running)
+  assert not _events()
+  reconciler._on_change("pipelineruns/ns", "MODIFIED", running, done)
+  reconciler._on_change("git", "MODIFIED", ("url", "master", "a"),
+                        ("url", "master", "b"))
+  assert _events() == ["pipelineruns/ns MODIFIED", "git MODIFIED"]
+
+class FakeRepo:
+  def __init__(self):
+    self.num_fetches = 0
+
+  def fetch(self):
+    self.num_fetches += 1
+
+class FakePoller:
+  def __init__(self):
+    self.commit = "abc"
+
+  def head(self, _url, _branch):
+    return self.commit
+
+def test_fetch_only_when_head_changes():
+  # pylint: disable=protected-access
+  reconciler = blueprint_reconciler.BlueprintReconciler(pipeline_runs=[])
+  reconciler._git_poller = FakePoller()
+  repo = FakeRepo()
+
+  reconciler._fetch(repo, "url", "master", False)
+  reconciler._fetch(repo, "url", "master", False)
+  assert repo.num_fetches == 1
+
+  reconciler._git_poller.commit = "def"
+  reconciler._fetch(repo, "url", "master", False)
+  assert repo.num_fetches == 2
+
+  # A full resync always fetches.
+  reconciler._fetch(repo, "url", "master", True)
+  assert repo.num_fetches == 3
+
 if __name__ == "__main__":
   logging.basicConfig(
       level=logging.INFO,
@@ -26,8 +26,6 @@ from kubeflow.testing import kf_logging
 from kubernetes import client as k8s_client
 from kubernetes import config as k8s_config
 from kubernetes.client import rest
-from googleapiclient import discovery
-from oauth2client.client import GoogleCredentials
 
 # The minimum time to wait before triggering another deployment.
 MIN_TIME_BETWEEN_DEPLOYMENTS = datetime.timedelta(minutes=20)
@@ -226,8 +224,7 @@ class Reconciler: # pylint: disable=too-many-instance-attributes
       zone:
     """
     if not self._manifests_client:
-      credentials = GoogleCredentials.get_application_default()
-      dm = discovery.build("deploymentmanager", "v2", credentials=credentials)
+      dm = gcp_util.get_client("deploymentmanager", "v2")
 
       self._manifests_client = manifests = dm.manifests()
 
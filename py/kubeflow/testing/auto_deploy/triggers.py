@@ -0,0 +1,234 @@
+"""Notify a reconciler when the resources it depends on change.
+
+BlueprintReconciler used to reconcile every 5 minutes, listing clusters,
+fetching every repository and listing PipelineRuns even when nothing had
+changed. ResourceWatcher keeps an up to date copy of a collection of custom
+resources using a K8s watch and GitHeadPoller polls the heads of branches
+with git ls-remote, which is much cheaper than a fetch. Both call on_change
+when something changes so the reconciler can react within seconds.
+"""
+import datetime
+import logging
+import subprocess
+import threading
+
+from kubernetes import watch as k8s_watch
+
+# Types of events passed to on_change. ADDED, MODIFIED and DELETED are the
+# types of K8s watch events; SYNCED is sent after the resources are listed.
+ADDED = "ADDED"
+MODIFIED = "MODIFIED"
+DELETED = "DELETED"
+SYNCED = "SYNCED"
+
+# How long a watch request is kept open before it is restarted.
+WATCH_TIMEOUT = datetime.timedelta(minutes=10)
+
+# How long to wait before retrying after an error.
+RETRY_DELAY = datetime.timedelta(seconds=30)
+
+# How often to poll the heads of the branches.
+GIT_POLL_INTERVAL = datetime.timedelta(minutes=1)
+
+def _key(resource):
+  metadata = resource["metadata"]
+  return metadata.get("namespace"), metadata["name"]
+
+class ResourceWatcher: # pylint: disable=too-many-instance-attributes
+  """Keep a copy of a collection of resources up to date with a watch.
+
+  on_change is called with (name, event_type, old, new) from the watcher's
+  thread; old and new are the resource before and after the event. It
+  should return quickly.
+  """
+
+  def __init__(self, name, list_func, namespace, on_change,
+               label_selector=None, watch_factory=k8s_watch.Watch):
+    """Create the watcher.
+
+    Args:
+      name: Name identifying the collection in logs and events.
+      list_func: Function (namespace, **kwargs) listing the resources; e.g.
+        CnrmClientApi.list_namespaced.
+      namespace: The namespace to watch.
+      on_change: Function called when a resource changes.
+      label_selector: (Optional) Only watch resources matching this selector.
+      watch_factory: Function creating a kubernetes.watch.Watch.
+    """
+    self.name = name
+    self._list_func = list_func
+    self._namespace = namespace
+    self._on_change = on_change
+    self._label_selector = label_selector
+    self._watch_factory = watch_factory
+    self._lock = threading.Lock()
+    self._items = {}
+    self._synced = threading.Event()
+    self._stop = threading.Event()
+    self._watch = None
+    self._thread = None
+
+  @property
+  def synced(self):
+    """True if the copy is being kept up to date.
+
+    False until the resources are listed and while the watch is failing;
+    callers should list the resources themselves in that case.
+    """
+    return self._synced.is_set()
+
+  def items(self):
+    """Return a list of the resources."""
+    with self._lock:
+      return list(self._items.values())
+
+  def resync(self):
+    """List the resources and replace the copy.
+
+    Returns:
+      resource_version: The resource version to start watching from.
+    """
+    kwargs = {}
+    if self._label_selector:
+      kwargs["label_selector"] = self._label_selector
+    result = self._list_func(self._namespace, **kwargs)
+    items = dict((_key(i), i) for i in result.get("items", []))
+    with self._lock:
+      self._items = items
+    self._synced.set()
+    logging.info(f"Listed {len(items)} {self.name}")
+    self._on_change(self.name, SYNCED, None, None)
+    return result.get("metadata", {}).get("resourceVersion")
+
+  def _apply(self, event_type, resource):
+    key = _key(resource)
+    with self._lock:
+      old = self._items.get(key)
+      if event_type == DELETED:
+        self._items.pop(key, None)
+      else:
+        self._items[key] = resource
+    self._on_change(self.name, event_type, old, resource)
+
+  def _watch_once(self, resource_version):
+    """Watch until the request times out.
+
+    Returns:
+      resource_version: The resource version to continue watching from or
+        None if the resources have to be listed again.
+    """
+    kwargs = {
+      "resource_version": resource_version,
+      "timeout_seconds": int(WATCH_TIMEOUT.total_seconds()),
+    }
+    if self._label_selector:
+      kwargs["label_selector"] = self._label_selector
+
+    self._watch = self._watch_factory()
+    for event in self._watch.stream(self._list_func, self._namespace,
+                                    **kwargs):
+      if event["type"] == "ERROR":
+        # Most likely the resource version is too old (410 Gone).
+        logging.info(f"Watch of {self.name} returned error "
+                     f"{event['object']}; listing them again")
+        return None
+      resource = event["object"]
+      resource_version = resource["metadata"].get("resourceVersion",
+                                                  resource_version)
+      self._apply(event["type"], resource)
+    return resource_version
+
+  def _run(self):
+    resource_version = None
+    while not self._stop.is_set():
+      try:
+        if resource_version is None:
+          resource_version = self.resync()
+        resource_version = self._watch_once(resource_version)
+      except Exception as e: # pylint: disable=broad-except
+        logging.error(f"Error watching {self.name}; {e}")
+        # Changes are missed until the resources are listed again.
+        self._synced.clear()
+        resource_version = None
+        self._stop.wait(RETRY_DELAY.total_seconds())
+
+  def start(self):
+    self._thread = threading.Thread(target=self._run,
+                                    name=f"watch-{self.name}")
+    self._thread.daemon = True
+    self._thread.start()
+
+  def stop(self):
+    self._stop.set()
+    if self._watch:
+      self._watch.stop()
+
+def ls_remote(url, branch):
+  """Return the commit at the head of a remote branch or None."""
+  output = subprocess.check_output(
+    ["git", "ls-remote", url, "refs/heads/" + branch]).decode()
+  if not output.strip():
+    return None
+  return output.split()[0]
+
+class GitHeadPoller: # pylint: disable=too-many-instance-attributes
+  """Poll the heads of remote branches with git ls-remote.
+
+  on_change is called with ("git", MODIFIED, old, new) where old and new
+  are (url, branch, commit) tuples when the head of a branch changes.
+  """
+
+  def __init__(self, branches, on_change, interval=GIT_POLL_INTERVAL,
+               ls_remote_func=ls_remote):
+    """Create the poller.
+
+    Args:
+      branches: Iterable of (url, branch) pairs to poll.
+      on_change: Function called when the head of a branch changes.
+      interval: datetime.timedelta; how often to poll.
+      ls_remote_func: Function (url, branch) returning the head commit.
+    """
+    self._branches = sorted(set(branches))
+    self._on_change = on_change
+    self._interval = interval
+    self._ls_remote = ls_remote_func
+    self._lock = threading.Lock()
+    self._heads = {}
+    self._stop = threading.Event()
+    self._thread = None
+
+  def head(self, url, branch):
+    """Return the last polled head of a branch or None if it's unknown."""
+    with self._lock:
+      return self._heads.get((url, branch))
+
+  def poll(self):
+    """Poll the heads of all the branches once."""
+    for url, branch in self._branches:
+      try:
+        commit = self._ls_remote(url, branch)
+      except Exception as e: # pylint: disable=broad-except
+        logging.error(f"Error getting the head of {url}#{branch}; {e}")
+        continue
+
+      with self._lock:
+        old = self._heads.get((url, branch))
+        self._heads[(url, branch)] = commit
+
+      if commit != old:
+        logging.info(f"Head of {url}#{branch} changed from {old} to {commit}")
+        self._on_change("git", MODIFIED, (url, branch, old),
+                        (url, branch, commit))
+
+  def _run(self):
+    while not self._stop.is_set():
+      self.poll()
+      self._stop.wait(self._interval.total_seconds())
+
+  def start(self):
+    self._thread = threading.Thread(target=self._run, name="git-poller")
+    self._thread.daemon = True
+    self._thread.start()
+
+  def stop(self):
+    self._stop.set()
@@ -0,0 +1,139 @@
+import logging
+import subprocess
+
+import pytest
+
+from kubeflow.testing.auto_deploy import triggers # pylint: disable=no-name-in-module
+
+def _resource(name, version, labels=None):
+  return {
+    "metadata": {
+      "name": name,
+      "namespace": "ns",
+      "resourceVersion": version,
+      "labels": labels or {},
+    },
+  }
+
+class FakeWatch:
+  """Replay a list of events and record the arguments of the watch."""
+
+  def __init__(self, events):
+    self.events = events
+    self.kwargs = None
+
+  def stream(self, _func, _namespace, **kwargs):
+    self.kwargs = kwargs
+    for e in self.events:
+      yield e
+
+  def stop(self):
+    pass
+
+def test_resource_watcher():
+  def list_func(_namespace, **_kwargs):
+    return {
+      "metadata": {"resourceVersion": "1"},
+      "items": [_resource("a", "1"), _resource("b", "1")],
+    }
+
+  changes = []
+  fake_watch = FakeWatch([
+    {"type": triggers.MODIFIED, "object": _resource("a", "2", {"x": "y"})},
+    {"type": triggers.DELETED, "object": _resource("b", "3")},
+    {"type": triggers.ADDED, "object": _resource("c", "4")},
+  ])
+
+  watcher = triggers.ResourceWatcher(
+    "things", list_func, "ns",
+    lambda *args: changes.append(args), label_selector="group",
+    watch_factory=lambda: fake_watch)
+
+  assert not watcher.synced
+  version = watcher.resync()
+  assert watcher.synced
+  assert version == "1"
+
+  assert watcher._watch_once(version) == "4" # pylint: disable=protected-access
+  assert fake_watch.kwargs["resource_version"] == "1"
+  assert fake_watch.kwargs["label_selector"] == "group"
+
+  names = sorted(i["metadata"]["name"] for i in watcher.items())
+  assert names == ["a", "c"]
+
+  assert [(c[0], c[1]) for c in changes] == [
+    ("things", triggers.SYNCED),
+    ("things", triggers.MODIFIED),
+    ("things", triggers.DELETED),
+    ("things", triggers.ADDED),
+  ]
+  # The old version of the modified resource is passed along with the new.
+  assert changes[1][2]["metadata"]["resourceVersion"] == "1"
+  assert changes[1][3]["metadata"]["labels"] == {"x": "y"}
+
+def test_resource_watcher_error():
+  watcher = triggers.ResourceWatcher(
+    "things", lambda *_args, **_kwargs: {}, "ns", lambda *args: None,
+    watch_factory=lambda: FakeWatch([{"type": "ERROR",
+                                      "object": {"code": 410}}]))
+  # An error means the resources have to be listed again.
+  assert watcher._watch_once("1") is None # pylint: disable=protected-access
+
+def test_resource_watcher_not_synced_after_failure():
+  def list_func(_namespace, **_kwargs):
+    return {"metadata": {"resourceVersion": "1"}, "items": []}
+
+  class FailingWatch(FakeWatch):
+    def stream(self, _func, _namespace, **kwargs):
+      # Stop the watcher so _run returns after handling the error.
+      watcher.stop()
+      raise RuntimeError("watch failed")
+
+  watcher = triggers.ResourceWatcher(
+    "things", list_func, "ns", lambda *args: None,
+    watch_factory=lambda: FailingWatch([]))
+  watcher._run() # pylint: disable=protected-access
+  # Callers list the resources themselves until the watch recovers.
+  assert not watcher.synced
+
+def _git(*args, cwd=None):
+  subprocess.check_call(["git"] + list(args), cwd=cwd)
+
+def test_git_head_poller(tmpdir):
+  repo = str(tmpdir.join("repo"))
+  _git("init", "-q", "-b", "master", repo)
+  _git("-c", "user.name=test", "-c", "user.email=test@example.com",
+       "commit", "-q", "--allow-empty", "-m", "first", cwd=repo)
+
+  changes = []
+  poller = triggers.GitHeadPoller([(repo, "master"), (repo, "missing")],
+                                  lambda *args: changes.append(args))
+  poller.poll()
+  first = poller.head(repo, "master")
+  assert first
+  assert poller.head(repo, "missing") is None
+  assert changes == [("git", triggers.MODIFIED, (repo, "master", None),
+                      (repo, "master", first))]
+
+  # Nothing changed so there are no new events.
+  poller.poll()
+  assert len(changes) == 1
+
+  _git("-c", "user.name=test", "-c", "user.email=test@example.com",
+       "commit", "-q", "--allow-empty", "-m", "second", cwd=repo)
+  poller.poll()
+  second = poller.head(repo, "master")
+  assert second != first
+  assert changes[-1] == ("git", triggers.MODIFIED, (repo, "master", first),
+                         (repo, "master", second))
+
+if __name__ == "__main__":
+  logging.basicConfig(
+      level=logging.INFO,
+      format=('%(levelname)s|%(asctime)s'
+              '|%(pathname)s|%(lineno)d| %(message)s'),
+      datefmt='%Y-%m-%dT%H:%M:%S',
+      )
+  logging.getLogger().setLevel(logging.INFO)
+
+  pytest.main()
@@ -17,6 +17,7 @@ import re
 import time
 import yaml
 
+from kubeflow.testing import git_mirror
 from kubeflow.testing import kf_logging
 from kubeflow.testing import util
 from kubeflow.testing import yaml_util
@@ -84,6 +85,7 @@ def _sync_repos(repos, src_dir):
   if not os.path.exists(src_dir):
     os.makedirs(src_dir)
 
+  mirror_cache = git_mirror.MirrorCache()
   for r in repos:
     repo = _get_repo_url(r)
 
@@ -95,11 +97,8 @@ def _sync_repos(repos, src_dir):
 
     repo_dir = os.path.join(src_dir, repo.owner, repo.repo)
     if not os.path.exists(repo_dir):
-      if not os.path.exists(os.path.join(src_dir, repo.owner)):
-        os.makedirs(os.path.join(src_dir, repo.owner))
       logging.info(f"Clone {url}")
-      util.run(["git", "clone", url, repo.repo],
-               cwd=os.path.join(src_dir, repo.owner))
+      mirror_cache.clone(url, repo_dir)
 
     logging.info(f"Sync repo {repo}")
 
@@ -122,13 +121,7 @@ def _last_commit(branch, repo_root, path):
     branch: The branch e.g. origin/master
     path: The relative path; if none or empty run in the root of the repo
   """
-  util.run(["git", "checkout", branch], cwd=repo_root)
-  command = ["git", "log", "-n", "1", "--pretty=format:\"%h\""]
-  if path:
-    command.append(path)
-  output = util.run(command, cwd=repo_root)
-
-  return output.strip('"')
+  return git_mirror.last_commit(repo_root, branch, path)
 
 def _get_param(params, name):
   for p in params:
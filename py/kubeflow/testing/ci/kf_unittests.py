@@ -150,7 +150,7 @@ class Builder: # pylint: disable=too-many-instance-attributes
     return task_template
 
   def build(self):
-    workflow = self._build_workflow()
+    builder = argo_build_util.WorkflowBuilder(self._build_workflow())
     task_template = self._build_task_template()
 
     #**************************************************************************
@@ -171,7 +171,7 @@ class Builder: # pylint: disable=too-many-instance-attributes
                                         "--repos=" + ",".join(repos),
                                         "--src_dir=" + self.src_root_dir]
 
-    argo_build_util.add_task_to_dag(workflow, E2E_DAG_NAME, checkout, [])
+    builder.add_task_to_dag(E2E_DAG_NAME, checkout, [])
 
     #**************************************************************************
     # Make dir
@@ -186,8 +186,7 @@ class Builder: # pylint: disable=too-many-instance-attributes
                                           self.artifacts_dir]
 
 
-    argo_build_util.add_task_to_dag(workflow, E2E_DAG_NAME, mkdir_step,
-                                    [checkout["name"]])
+    builder.add_task_to_dag(E2E_DAG_NAME, mkdir_step, [checkout["name"]])
 
     #**************************************************************************
     # Run python unittests
@@ -204,8 +203,7 @@ class Builder: # pylint: disable=too-many-instance-attributes
                                         + "kubeflow/tests"]
 
 
-    argo_build_util.add_task_to_dag(workflow, E2E_DAG_NAME, py_tests,
-                                    [mkdir_step["name"]])
+    builder.add_task_to_dag(E2E_DAG_NAME, py_tests, [mkdir_step["name"]])
 
 
     #***************************************************************************
@@ -229,9 +227,8 @@ class Builder: # pylint: disable=too-many-instance-attributes
                                        "--junitxml=" + self.artifacts_dir +
                                        "/junit_py-lint.xml"]
 
-    py_lint_step = argo_build_util.add_task_to_dag(workflow, E2E_DAG_NAME,
-                                                   py_lint,
-                                                   [mkdir_step["name"]])
+    py_lint_step = builder.add_task_to_dag(E2E_DAG_NAME, py_lint,
+                                           [mkdir_step["name"]])
 
     py_lint_step["container"]["workingDir"] = os.path.join(
       self.testing_src_dir, "py/kubeflow/testing")
@@ -253,8 +250,7 @@ class Builder: # pylint: disable=too-many-instance-attributes
     if self.bucket:
       symlink["container"]["command"].append("--bucket=" + self.bucket)
 
-    argo_build_util.add_task_to_dag(workflow, E2E_DAG_NAME, symlink,
-                                    [checkout["name"]])
+    builder.add_task_to_dag(E2E_DAG_NAME, symlink, [checkout["name"]])
 
     #*****************************************************************************
     # Exit handler workflow
@@ -273,13 +269,11 @@ class Builder: # pylint: disable=too-many-instance-attributes
       copy_artifacts["container"]["command"].append("--bucket=" + self.bucket)
 
 
-    argo_build_util.add_task_to_dag(workflow, EXIT_DAG_NAME, copy_artifacts, [])
+    builder.add_task_to_dag(EXIT_DAG_NAME, copy_artifacts, [])
 
 
     # Set the labels on all templates
-    workflow = argo_build_util.set_task_template_labels(workflow)
-
-    return workflow
+    return builder.build()
 
 def create_workflow(name=None, namespace=None, bucket=None, **kwargs): # pylint: disable=too-many-statements
   """Create workflow returns an Argo workflow to test kfctl upgrades.
@@ -0,0 +1,96 @@
+"""A cache of the collections listed during a single cleanup_ci run.
+
+Several sweepers look at the same collections; e.g. the URL maps are used by
+the URL map, backend service and instance group sweepers to decide what is
+still owned by an ingress. ResourceCache lists each collection once per run
+and shares the items between sweepers.
+
+Sweepers remove the resources they delete from the cache once the deletes
+have finished, so the sweepers running after them see the same thing a new
+list would return. Resources whose deletes are still running stay in the
+cache and are treated as in use.
+"""
+import collections
+import logging
+import threading
+
+def _item_key(item):
+  # Resources without a self link (e.g. service accounts) have a unique
+  # resource name.
+  return item.get("selfLink") or item["name"]
+
+class _Entry:
+  """A cached collection."""
+
+  def __init__(self):
+    self.lock = threading.Lock()
+    # Ordered map from the key of each item to the item; None until the
+    # collection is listed.
+    self.items = None
+
+class ResourceCache:
+  """Collections of resources listed during a cleanup run.
+
+  The cache is thread safe so concurrent sweepers can share it. If several
+  sweepers ask for a collection at the same time it is only listed once.
+  """
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._entries = {}
+    self.counts = collections.Counter()
+
+  def _entry(self, key):
+    with self._lock:
+      if key not in self._entries:
+        self._entries[key] = _Entry()
+      return self._entries[key]
+
+  def get(self, key, list_items):
+    """Return the items of a collection; listing it the first time.
+
+    Args:
+      key: Hashable key identifying the collection; e.g.
+        ("url_maps", project).
+      list_items: Function returning an iterable of the items of the
+        collection. Each item is a dictionary with a selfLink or a name.
+
+    Returns:
+      items: List of the items in the collection.
+    """
+    entry = self._entry(key)
+    with entry.lock:
+      hit = entry.items is not None
+      if not hit:
+        entry.items = collections.OrderedDict(
+          (_item_key(i), i) for i in list_items())
+      items = list(entry.items.values())
+
+    with self._lock:
+      self.counts["hits" if hit else "lists"] += 1
+    return items
+
+  def remove(self, key, items):
+    """Remove deleted items from a cached collection.
+
+    Args:
+      key: Key identifying the collection.
+      items: Iterable of the items that were deleted.
+    """
+    entry = self._entry(key)
+    with entry.lock:
+      if entry.items is None:
+        return
+      for i in items:
+        entry.items.pop(_item_key(i), None)
+
+  def invalidate(self, key):
+    """Drop a collection so the next get lists it again."""
+    entry = self._entry(key)
+    with entry.lock:
+      entry.items = None
+
+  def log_stats(self):
+    logging.info("Resource cache listed %d collections and served %d "
+                 "lookups from the cache", self.counts["lists"],
+                 self.counts["hits"])
@@ -0,0 +1,68 @@
+import logging
+import threading
+
+from kubeflow.testing import cleanup_cache
+
+import pytest
+
+def test_get_lists_once():
+  cache = cleanup_cache.ResourceCache()
+  calls = []
+
+  def list_items():
+    calls.append(1)
+    return iter([{"name": "a"}, {"name": "b"}])
+
+  key = ("url_maps", "someproject")
+  assert cache.get(key, list_items) == [{"name": "a"}, {"name": "b"}]
+  assert cache.get(key, list_items) == [{"name": "a"}, {"name": "b"}]
+  assert len(calls) == 1
+  assert cache.counts == {"lists": 1, "hits": 1}
+
+def test_get_concurrent():
+  cache = cleanup_cache.ResourceCache()
+  calls = []
+  release = threading.Event()
+
+  def list_items():
+    calls.append(1)
+    release.wait()
+    return [{"name": "a"}]
+
+  results = []
+  threads = [threading.Thread(
+    target=lambda: results.append(cache.get("key", list_items)))
+             for _ in range(4)]
+  for t in threads:
+    t.start()
+  release.set()
+  for t in threads:
+    t.join()
+
+  assert len(calls) == 1
+  assert results == [[{"name": "a"}]] * 4
+
+def test_remove_and_invalidate():
+  cache = cleanup_cache.ResourceCache()
+  zone_a = {"name": "ig", "selfLink": "zones/a/instanceGroups/ig"}
+  zone_b = {"name": "ig", "selfLink": "zones/b/instanceGroups/ig"}
+  cache.get("key", lambda: [zone_a, zone_b])
+
+  cache.remove("key", [zone_a])
+  assert cache.get("key", lambda: []) == [zone_b]
+
+  cache.invalidate("key")
+  assert cache.get("key", lambda: [zone_a]) == [zone_a]
+
+  # Removing from a collection that was never listed is a no-op.
+  cache.remove("other", [zone_a])
+  assert cache.get("other", lambda: [zone_a]) == [zone_a]
+
+if __name__ == "__main__":
+  logging.basicConfig(level=logging.INFO,
+                      format=('%(levelname)s|%(asctime)s'
+                              '|%(pathname)s|%(lineno)d| %(message)s'),
+                      datefmt='%Y-%m-%dT%H:%M:%S',
+                      )
+  logging.getLogger().setLevel(logging.INFO)
+  pytest.main()
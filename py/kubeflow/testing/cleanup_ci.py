@@ -2,23 +2,27 @@
 # pylint: disable=too-many-lines
 import argparse
 import collections
+from concurrent import futures
+import contextvars
 import datetime
 from dateutil import parser as date_parser
 import logging
+import queue
 import re
 import retrying
 import socket
 import sys
+import threading
 import traceback
 import time
 import yaml
 
 from kubeflow.testing import argo_client
+from kubeflow.testing import cleanup_cache
+from kubeflow.testing import cleanup_inventory
 from kubeflow.testing import gcp_util
 from kubeflow.testing import util
 from kubernetes import client as k8s_client
-from googleapiclient import discovery
-from oauth2client.client import GoogleCredentials
 
 AUTO_DEPLOY_PATTERNS = [
   re.compile(r".*kf-master-(?!n\d\d)"),
@@ -115,6 +119,185 @@ def is_retryable_exception(exception):
   # Socket errors look like temporary problems connecting to GCP.
   return isinstance(exception, socket.error)
 
+# Maximum number of concurrent list requests issued against a single project.
+MAX_IN_FLIGHT_PER_PROJECT = 4
+
+_in_flight_lock = threading.Lock()
+_in_flight = {}
+
+def _in_flight_semaphore(project):
+  """Return the semaphore capping in flight list requests for project."""
+  with _in_flight_lock:
+    if project not in _in_flight:
+      _in_flight[project] = threading.BoundedSemaphore(
+        MAX_IN_FLIGHT_PER_PROJECT)
+    return _in_flight[project]
+
+# Name of the sweeper running in the current context. Threads started by a
+# sweeper must run in a copy of its context; see _submit_in_context.
+_current_sweeper = contextvars.ContextVar("current_sweeper", default=None)
+
+def _submit_in_context(executor, fn, *args):
+  """Submit fn to executor so it runs in a copy of the caller's context.
+
+  This attributes errors logged by worker threads to the sweeper that
+  started them.
+  """
+  return executor.submit(contextvars.copy_context().run, fn, *args)
+
+# Marker put on the queue by _zone_fanout_iterator when a zone is listed.
+_ZONE_DONE = object()
+
+def _zone_fanout_iterator(project, zones, list_page, items_key="items"):
+  """Iterate over a zonal collection listing all zones concurrently.
+
+  Each zone is paged through on its own thread and items are yielded as soon
+  as the page containing them arrives, so callers can classify items while
+  other zones are still being listed.
+
+  Args:
+    project: The project being listed. The number of in flight list requests
+      per project is capped at MAX_IN_FLIGHT_PER_PROJECT.
+    zones: Comma separated list of zones.
+    list_page: Function (zone, page_token) -> response dictionary. It is
+      called from worker threads so its requests should be built by a
+      client from gcp_util.get_client.
+    items_key: The key in the response containing the items.
+
+  Yields:
+    (zone, item) tuples.
+  """
+  zones = [z for z in zones.split(",") if z]
+  if not zones:
+    return
+
+  semaphore = _in_flight_semaphore(project)
+  items = queue.Queue()
+
+  def _list_zone(zone):
+    try:
+      next_page_token = None
+      while True:
+        with semaphore:
+          results = list_page(zone, next_page_token)
+        for i in results.get(items_key, []):
+          items.put((zone, i))
+
+        next_page_token = results.get("nextPageToken")
+        if not next_page_token:
+          break
+    except Exception as e: # pylint: disable=broad-except
+      items.put(e)
+    finally:
+      items.put(_ZONE_DONE)
+
+  with futures.ThreadPoolExecutor(max_workers=len(zones)) as executor:
+    for zone in zones:
+      _submit_in_context(executor, _list_zone, zone)
+
+    remaining = len(zones)
+    while remaining:
+      item = items.get()
+      if item is _ZONE_DONE:
+        remaining -= 1
+        continue
+      if isinstance(item, Exception):
+        raise item
+      yield item
+
+def _incremental_skip(args, kind, resource):
+  """Return True if an incremental run doesn't need to classify a resource.
+
+  Resources are skipped if the inventory already has them and they haven't
+  crossed their expiration time since they were classified.
+  """
+  inventory = getattr(args, "inventory", None)
+  if not inventory:
+    return False
+
+  state = inventory.observe(kind, resource)
+  return (getattr(args, "incremental", False) and
+          state == cleanup_inventory.UNCHANGED)
+
+def _inventory_record(args, kind, resource, infra_type, max_age=None,
+                      expires_at=None):
+  """Record the classification of a resource in the inventory if there is one.
+
+  Args:
+    args: Command line arguments.
+    kind: The kind of resource e.g. "disk".
+    resource: Dictionary describing the resource as returned by GCP.
+    infra_type: The infra type or None if the resource didn't match any.
+    max_age: (Optional) timedelta with the max lifetime of the resource; used
+      with its creationTimestamp to compute when it expires.
+    expires_at: (Optional) Time in seconds since the epoch when the resource
+      expires. Takes precedence over max_age.
+  """
+  inventory = getattr(args, "inventory", None)
+  if not inventory:
+    return
+
+  if expires_at is None and max_age is not None:
+    expires_at = cleanup_inventory.expiration_time(
+      resource["creationTimestamp"], max_age)
+  inventory.record(kind, resource, infra_type, expires_at)
+
+def _cached(args, kind, list_items):
+  """List a collection through the run's resource cache if there is one.
+
+  Args:
+    args: Command line arguments.
+    kind: The kind of resource e.g. "url_maps".
+    list_items: Function returning an iterable of the resources in
+      args.project.
+
+  Returns:
+    items: List of the resources.
+  """
+  cache = getattr(args, "resource_cache", None)
+  if not cache:
+    return list(list_items())
+  return cache.get((kind, args.project), list_items)
+
+def _uncache(args, kind, items):
+  """Remove deleted resources from the run's resource cache."""
+  cache = getattr(args, "resource_cache", None)
+  if cache:
+    cache.remove((kind, args.project), items)
+
+def _uncache_deleted(args, kind, resources, ops, operation_resource,
+                     new_batch):
+  """Wait for deletes to finish and remove the deleted resources from the cache.
+
+  Resources whose deletes are still running or failed stay in the cache, so
+  the sweepers depending on them still treat them as in use; as they would
+  with a new list. Nothing is waited for if the run has no cache.
+
+  Args:
+    args: Command line arguments.
+    kind: The kind of resource e.g. "url_maps".
+    resources: Dictionary mapping names to the resources.
+    ops: Dictionary mapping names to the delete operations.
+    operation_resource: Resource to get the operations from; e.g.
+      compute.globalOperations().
+    new_batch: Function creating a BatchHttpRequest.
+  """
+  if not ops or not getattr(args, "resource_cache", None):
+    return
+
+  done = []
+  unfinished = wait_ops_max_mins(operation_resource, args.project,
+                                 list(ops.values()), 20, new_batch=new_batch,
+                                 done=done)
+  deleted = set(op["name"] for op in done if not op.get("error"))
+  for op in done:
+    if op.get("error"):
+      logging.error("Operation %s failed; error: %s", op["name"], op["error"])
+  logging.info("Unfinished %s deletions:\n%s", kind,
+               "\n".join(op["name"] for op in unfinished))
+  _uncache(args, kind, [resources[name] for name, op in ops.items()
+                        if op["name"] in deleted])
+
 def cleanup_workflows(args):
   logging.info("Cleanup Argo workflows")
   util.maybe_activate_service_account()
@@ -165,10 +348,7 @@ def cleanup_workflows(args):
 
 def cleanup_endpoints(args):
   logging.info("Cleanup Google Cloud Endpoints")
-  credentials = GoogleCredentials.get_application_default()
-
-  services_management = discovery.build('servicemanagement', 'v1', credentials=credentials,
-                                        cache_discovery=False)
+  services_management = gcp_util.get_client('servicemanagement', 'v1')
   services = services_management.services()
   rollouts = services.rollouts()
   next_page_token = None
@@ -176,6 +356,7 @@ def cleanup_endpoints(args):
   expired = []
   unexpired = []
   unmatched = []
+  to_delete = []
 
   while True:
     results = services.list(producerProjectId=args.project,
@@ -213,7 +394,7 @@ def cleanup_endpoints(args):
         logging.info("Deleting service: %s", name)
         is_expired = True
         if not args.dryrun:
-          services.delete(serviceName=name).execute()
+          to_delete.append((name, services.delete(serviceName=name)))
         expired.append(name)
       else:
         unexpired.append(name)
@@ -222,6 +403,8 @@ def cleanup_endpoints(args):
       break
     next_page_token = results["nextPageToken"]
 
+  _batch_delete(services_management.new_batch_http_request, to_delete,
+                "service")
 
   logging.info("Unmatched services:\n%s", "\n".join(unmatched))
   logging.info("Unexpired services:\n%s", "\n".join(unexpired))
@@ -231,51 +414,54 @@ def cleanup_endpoints(args):
 def cleanup_disks(args):
   logging.info("Cleanup persistent disks")
 
-  credentials = GoogleCredentials.get_application_default()
-
-  compute = discovery.build('compute', 'v1', credentials=credentials)
+  compute = gcp_util.get_client('compute', 'v1')
   disks = compute.disks()
 
   expired = []
   unexpired = []
   unmatched = []
+  skipped = []
+  to_delete = []
 
-  for zone in args.zones.split(","):
-    next_page_token = None
-    while True:
-      results = disks.list(project=args.project,
-                           zone=zone,
-                           pageToken=next_page_token).execute()
-      if not "items" in results:
-        break
-      for d in results["items"]:
-        name = d["name"]
+  def list_page(zone, page_token):
+    return disks.list(project=args.project, zone=zone,
+                      pageToken=page_token).execute()
 
-        infra_type = name_to_infra_type(name)
+  for zone, d in _zone_fanout_iterator(args.project, args.zones, list_page):
+    name = d["name"]
 
-        if not infra_type:
-          logging.info("Skipping disk %s; it does not match any infra type.",
-                       name)
-          unmatched.append(name)
-          continue
+    if _incremental_skip(args, "disk", d):
+      skipped.append(name)
+      continue
 
-        logging.info("Disk %s categorized as %s", name, infra_type)
+    infra_type = name_to_infra_type(name)
 
-        max_age = MAX_LIFETIME[infra_type]
-        age = getAge(d["creationTimestamp"])
-        if age > max_age:
-          logging.info("Deleting disk: %s, age = %r", name, age)
-          if not args.dryrun:
-            response = disks.delete(project=args.project, zone=zone,
-                                    disk=name).execute()
-          logging.info("respone = %s", response)
-          expired.append(name)
-        else:
-          unexpired.append(name)
-      if not "nextPageToken" in results:
-        break
-      next_page_token = results["nextPageToken"]
+    if not infra_type:
+      logging.info("Skipping disk %s; it does not match any infra type.",
+                   name)
+      unmatched.append(name)
+      _inventory_record(args, "disk", d, None)
+      continue
 
+    logging.info("Disk %s categorized as %s", name, infra_type)
+
+    max_age = MAX_LIFETIME[infra_type]
+    _inventory_record(args, "disk", d, infra_type, max_age=max_age)
+    age = getAge(d["creationTimestamp"])
+    if age > max_age:
+      logging.info("Deleting disk: %s, age = %r", name, age)
+      if not args.dryrun:
+        to_delete.append(("{0}/{1}".format(zone, name),
+                          disks.delete(project=args.project, zone=zone,
+                                       disk=name)))
+      expired.append(name)
+    else:
+      unexpired.append(name)
+
+  _batch_delete(compute.new_batch_http_request, to_delete, "disk")
+
+  logging.info("Skipped %d disks unchanged since the last snapshot",
+               len(skipped))
   logging.info("Unmatched disks:\n%s", "\n".join(unmatched))
   logging.info("Unexpired disks:\n%s", "\n".join(unexpired))
   logging.info("expired disks:\n%s", "\n".join(expired))
@@ -284,15 +470,15 @@ def cleanup_disks(args):
 def cleanup_firewall_rules(args):
   logging.info("Cleanup firewall rules")
 
-  credentials = GoogleCredentials.get_application_default()
-
-  compute = discovery.build('compute', 'v1', credentials=credentials)
+  compute = gcp_util.get_client('compute', 'v1')
   firewalls = compute.firewalls()
   next_page_token = None
 
   expired = []
   unexpired = []
   unmatched = []
+  skipped = []
+  to_delete = []
 
   while True:
     results = firewalls.list(project=args.project,
@@ -302,6 +488,10 @@ def cleanup_firewall_rules(args):
     for d in results["items"]:
       name = d["name"]
 
+      if _incremental_skip(args, "firewall", d):
+        skipped.append(name)
+        continue
+
       infra_type = name_to_infra_type(name)
 
       for tag in d.get("targetTags", []):
@@ -311,18 +501,19 @@ def cleanup_firewall_rules(args):
 
       if not infra_type:
         unmatched.append(name)
+        _inventory_record(args, "firewall", d, None)
         continue
 
       logging.info("Firewall rule %s classified as infra type %s", name,
                    infra_type)
       max_age = MAX_LIFETIME[infra_type]
+      _inventory_record(args, "firewall", d, infra_type, max_age=max_age)
       age = getAge(d["creationTimestamp"])
       if age > max_age:
         logging.info("Deleting firewall: %s, age = %r", name, age)
         if not args.dryrun:
-          response = firewalls.delete(project=args.project,
-                                      firewall=name).execute()
-          logging.info("respone = %s", response)
+          to_delete.append((name, firewalls.delete(project=args.project,
+                                                   firewall=name)))
         expired.append(name)
       else:
         unexpired.append(name)
@@ -330,29 +521,24 @@ def cleanup_firewall_rules(args):
       break
     next_page_token = results["nextPageToken"]
 
+  _batch_delete(compute.new_batch_http_request, to_delete, "firewall rule")
+
+  logging.info("Skipped %d firewall rules unchanged since the last snapshot",
+               len(skipped))
   logging.info("Unmatched firewall rules:\n%s", "\n".join(unmatched))
   logging.info("Unexpired firewall rules:\n%s", "\n".join(unexpired))
   logging.info("expired firewall rules:\n%s", "\n".join(expired))
 
-def  _instance_groups_iterator(project, zones):
-  credentials = GoogleCredentials.get_application_default()
-  compute = discovery.build('compute', 'v1', credentials=credentials)
+def _instance_groups_iterator(project, zones):
+  compute = gcp_util.get_client('compute', 'v1')
   instanceGroups = compute.instanceGroups()
-  next_page_token = None
-
-  for zone in zones.split(","): # pylint: disable=too-many-nested-blocks
-    while True:
-      results = instanceGroups.list(project=project,
-                                    zone=zone,
-                                    pageToken=next_page_token).execute()
-      for ig in results.get("items", []):
-        yield ig
-
 
-      if not "nextPageToken" in results:
-        break
+  def list_page(zone, page_token):
+    return instanceGroups.list(project=project, zone=zone,
+                               pageToken=page_token).execute()
 
-      next_page_token = results["nextPageToken"]
+  for _, ig in _zone_fanout_iterator(project, zones, list_page):
+    yield ig
 
 K8S_BACKEND_PATTERN = re.compile("k8s-ig--([\da-f]+)$")
 
@@ -360,21 +546,23 @@ def cleanup_instance_groups(args):
   logging.info("Cleanup instance groups")
 
 
-  url_maps = _get_k8s_url_maps(args.project)
-
-  url_map_uids = set()
-  for u in url_maps:
-    url_map_uids.add(u.uid)
+  url_map_uids = set(u.uid for u in _get_k8s_url_maps(args))
 
   logging.info("Found K8s URL maps with UIDs:\n%s", "\n".join(url_map_uids))
 
-  credentials = GoogleCredentials.get_application_default()
-  compute = discovery.build('compute', 'v1', credentials=credentials)
+  # Instance groups used by the backend services which still exist.
+  backend_groups = set()
+  for b in _cached(args, "backend_services",
+                   lambda: _backends_iterator(args.project)):
+    for backend in b.get("backends", []):
+      backend_groups.add(backend.get("group"))
+
+  compute = gcp_util.get_client('compute', 'v1')
   instanceGroups = compute.instanceGroups()
-  next_page_token = None
   deleted = []
   unexpired = []
   in_use = []
+  to_delete = []
 
   # TODO(jlewi): It looks like instance groups with name
   # k8s-ig--$(UID) correspond to backends for ingress created resources.
@@ -383,12 +571,18 @@ def cleanup_instance_groups(args):
   for s in _instance_groups_iterator(args.project, args.zones):
     name = s["name"]
 
+    if s.get("selfLink") in backend_groups:
+      logging.info("Skipping instance group %s; it is used by a backend "
+                   "service", name)
+      in_use.append(name)
+      continue
+
     m = K8S_BACKEND_PATTERN.match(name)
 
     if m:
-      uid = m.groups(1)
+      uid = m.group(1)
 
-      if uid in url_maps:
+      if uid in url_map_uids:
         logging.info("Skipping instance group %s; it is used by a url map",
                      name)
         in_use.append(name)
@@ -421,15 +615,15 @@ def cleanup_instance_groups(args):
 
     zone = s.get("zone").rsplit("/", 1)[-1]
     if not args.dryrun:
-      try:
-        response = instanceGroups.delete(project=args.project,
-                                         zone=zone,
-                                         instanceGroup=name).execute()
-        logging.info("response = %r", response)
-        deleted.append(name)
-      except Exception as e: # pylint: disable=broad-except
-        logging.error(e)
-        in_use.append(name)
+      to_delete.append(("{0}/{1}".format(zone, name),
+                        instanceGroups.delete(project=args.project,
+                                              zone=zone,
+                                              instanceGroup=name)))
+
+  ops, errors = _batch_delete(compute.new_batch_http_request, to_delete,
+                              "instance group")
+  deleted.extend(key.split("/", 1)[-1] for key in ops)
+  in_use.extend(key.split("/", 1)[-1] for key in errors)
 
   logging.info("Unexpired instance groups:\n%s", "\n".join(unexpired))
   logging.info("Deleted instance groups:\n%s", "\n".join(deleted))
@@ -439,40 +633,43 @@ def cleanup_url_maps(args):
   if not args.gc_backend_services:
     return
 
-  credentials = GoogleCredentials.get_application_default()
-  compute = discovery.build('compute', 'v1', credentials=credentials)
+  compute = gcp_util.get_client('compute', 'v1')
   urlMaps = compute.urlMaps()
-  next_page_token = None
   expired = []
   unexpired = []
   in_use = []
+  skipped = []
+  to_delete = []
 
-  while True:
-    results = urlMaps.list(project=args.project,
-                           pageToken=next_page_token).execute()
-    if not "items" in results:
-      break
-    for s in results["items"]:
-      name = s["name"]
-      age = getAge(s["creationTimestamp"])
-      if age > MAX_LIFETIME[E2E_OWNERLESS]:
-        logging.info("Deleting urlMaps: %s, age = %r", name, age)
-        if not args.dryrun:
-          try:
-            response = urlMaps.delete(project=args.project,
-                                      urlMap=name).execute()
-            logging.info("response = %r", response)
-            expired.append(name)
-          except Exception as e: # pylint: disable=broad-except
-            logging.error(e)
-            in_use.append(name)
-      else:
-        unexpired.append(name)
+  url_maps = {}
+  for s in _cached(args, "url_maps",
+                   lambda: gcp_util.url_maps_iterator(args.project)):
+    name = s["name"]
+    url_maps[name] = s
+    if _incremental_skip(args, "url_map", s):
+      skipped.append(name)
+      continue
 
-    if not "nextPageToken" in results:
-      break
-    next_page_token = results["nextPageToken"]
+    _inventory_record(args, "url_map", s, E2E_OWNERLESS,
+                      max_age=MAX_LIFETIME[E2E_OWNERLESS])
+    age = getAge(s["creationTimestamp"])
+    if age > MAX_LIFETIME[E2E_OWNERLESS]:
+      logging.info("Deleting urlMaps: %s, age = %r", name, age)
+      if not args.dryrun:
+        to_delete.append((name, urlMaps.delete(project=args.project,
+                                               urlMap=name)))
+    else:
+      unexpired.append(name)
 
+  ops, errors = _batch_delete(compute.new_batch_http_request, to_delete,
+                              "url map")
+  _uncache_deleted(args, "url_maps", url_maps, ops, compute.globalOperations(),
+                   compute.new_batch_http_request)
+  expired.extend(ops)
+  in_use.extend(errors)
+
+  logging.info("Skipped %d url maps unchanged since the last snapshot",
+               len(skipped))
   logging.info("Unexpired url maps:\n%s", "\n".join(unexpired))
   logging.info("Deleted expired url maps:\n%s", "\n".join(expired))
   logging.info("Expired but in-use url maps:\n%s", "\n".join(in_use))
@@ -481,15 +678,13 @@ def cleanup_target_https_proxies(args):
   if not args.gc_backend_services:
     return
 
-  credentials = GoogleCredentials.get_application_default()
-  compute = discovery.build('compute', 'v1', credentials=credentials)
+  compute = gcp_util.get_client('compute', 'v1')
   targetHttpsProxies = compute.targetHttpsProxies()
   next_page_token = None
   expired = []
   unexpired = []
   in_use = []
-
-  delete_ops = []
+  to_delete = []
   while True:
     results = targetHttpsProxies.list(project=args.project,
                                       pageToken=next_page_token).execute()
@@ -501,14 +696,8 @@ def cleanup_target_https_proxies(args):
       if age > MAX_LIFETIME[E2E_OWNERLESS]:
         logging.info("Deleting urlMaps: %s, age = %r", name, age)
         if not args.dryrun:
-          try:
-            op = targetHttpsProxies.delete(
-              project=args.project, targetHttpsProxy=name).execute()
-            delete_ops.append(op)
-            expired.append(name)
-          except Exception as e: # pylint: disable=broad-except
-            logging.error(e)
-            in_use.append(name)
+          to_delete.append((name, targetHttpsProxies.delete(
+            project=args.project, targetHttpsProxy=name)))
       else:
         unexpired.append(name)
 
@@ -516,9 +705,16 @@ def cleanup_target_https_proxies(args):
       break
     next_page_token = results["nextPageToken"]
 
+  ops, errors = _batch_delete(compute.new_batch_http_request, to_delete,
+                              "target https proxy")
+  expired.extend(ops)
+  in_use.extend(errors)
+
   unfinished_ops = wait_ops_max_mins(compute.globalOperations(), args.project,
-                                     delete_ops, 20)
-  logging.info("Unfinished targetHttpsProxy deletions:\n%s", "\n".join(unfinished_ops))
+                                     list(ops.values()), 20,
+                                     new_batch=compute.new_batch_http_request)
+  logging.info("Unfinished targetHttpsProxy deletions:\n%s",
+               "\n".join(op["name"] for op in unfinished_ops))
   logging.info("Unexpired target https proxies:\n%s", "\n".join(unexpired))
   logging.info("Deleted expired target https proxies:\n%s", "\n".join(expired))
   logging.info("Expired but in-use target https proxies:\n%s",
@@ -528,13 +724,13 @@ def cleanup_target_http_proxies(args):
   if not args.gc_backend_services:
     return
 
-  credentials = GoogleCredentials.get_application_default()
-  compute = discovery.build('compute', 'v1', credentials=credentials)
+  compute = gcp_util.get_client('compute', 'v1')
   targetHttpProxies = compute.targetHttpProxies()
   next_page_token = None
   expired = []
   unexpired = []
   in_use = []
+  to_delete = []
 
   while True:
     results = targetHttpProxies.list(project=args.project,
@@ -547,14 +743,8 @@ def cleanup_target_http_proxies(args):
       if age > MAX_LIFETIME[E2E_OWNERLESS]:
         logging.info("Deleting urlMaps: %s, age = %r", name, age)
         if not args.dryrun:
-          try:
-            response = targetHttpProxies.delete(
-              project=args.project, targetHttpProxy=name).execute()
-            logging.info("response = %r", response)
-            expired.append(name)
-          except Exception as e: # pylint: disable=broad-except
-            logging.error(e)
-            in_use.append(name)
+          to_delete.append((name, targetHttpProxies.delete(
+            project=args.project, targetHttpProxy=name)))
       else:
         unexpired.append(name)
 
@@ -562,6 +752,11 @@ def cleanup_target_http_proxies(args):
       break
     next_page_token = results["nextPageToken"]
 
+  ops, errors = _batch_delete(compute.new_batch_http_request, to_delete,
+                              "target http proxy")
+  expired.extend(ops)
+  in_use.extend(errors)
+
   logging.info("Unexpired target http proxies:\n%s", "\n".join(unexpired))
   logging.info("Deleted expired target http proxies:\n%s", "\n".join(expired))
   logging.info("Expired but in-use target http proxies:\n%s",
@@ -571,15 +766,13 @@ def cleanup_forwarding_rules(args):
   if not args.gc_backend_services:
     return
 
-  credentials = GoogleCredentials.get_application_default()
-  compute = discovery.build('compute', 'v1', credentials=credentials)
+  compute = gcp_util.get_client('compute', 'v1')
   forwardingRules = compute.globalForwardingRules()
   next_page_token = None
   expired = []
   unexpired = []
   in_use = []
-
-  delete_ops = []
+  to_delete = []
   while True:
     results = forwardingRules.list(project=args.project,
                                    pageToken=next_page_token).execute()
@@ -591,14 +784,8 @@ def cleanup_forwarding_rules(args):
       if age > MAX_LIFETIME[E2E_OWNERLESS]:
         logging.info("Deleting forwarding rule: %s, age = %r", name, age)
         if not args.dryrun:
-          try:
-            op = forwardingRules.delete(project=args.project,
-                                        forwardingRule=name).execute()
-            expired.append(name)
-            delete_ops.append(op)
-          except Exception as e: # pylint: disable=broad-except
-            logging.error(e)
-            in_use.append(name)
+          to_delete.append((name, forwardingRules.delete(
+            project=args.project, forwardingRule=name)))
       else:
         unexpired.append(name)
 
@@ -606,9 +793,16 @@ def cleanup_forwarding_rules(args):
       break
     next_page_token = results["nextPageToken"]
 
+  ops, errors = _batch_delete(compute.new_batch_http_request, to_delete,
+                              "forwarding rule")
+  expired.extend(ops)
+  in_use.extend(errors)
+
   unfinished_ops = wait_ops_max_mins(compute.globalOperations(), args.project,
-                                     delete_ops, 20)
-  logging.info("Unfinished forwarding rule deletions:\n%s", "\n".join(unfinished_ops))
+                                     list(ops.values()), 20,
+                                     new_batch=compute.new_batch_http_request)
+  logging.info("Unfinished forwarding rule deletions:\n%s",
+               "\n".join(op["name"] for op in unfinished_ops))
   logging.info("Unexpired forwarding rules:\n%s", "\n".join(unexpired))
   logging.info("Deleted expired forwarding rules:\n%s", "\n".join(expired))
   logging.info("Expired but in-use forwarding rules:\n%s", "\n".join(in_use))
@@ -626,11 +820,12 @@ def _parse_k8s(name):
 
   return K8S_URL_MAP_NAME(m.group(1), m.group(2))
 
-def _get_k8s_url_maps(project):
+def _get_k8s_url_maps(args):
   # Look for URL maps k8s-um-${NAMESPACE}-${SERVICE}--${UID}
 
   url_maps = []
-  for u in gcp_util.url_maps_iterator(project):
+  for u in _cached(args, "url_maps",
+                   lambda: gcp_util.url_maps_iterator(args.project)):
     name = _parse_k8s(u["name"])
     if not name:
       continue
@@ -640,8 +835,7 @@ def _get_k8s_url_maps(project):
   return url_maps
 
 def _backends_iterator(project):
-  credentials = GoogleCredentials.get_application_default()
-  compute = discovery.build('compute', 'v1', credentials=credentials)
+  compute = gcp_util.get_client('compute', 'v1')
   backends = compute.backendServices()
 
   next_page_token = None
@@ -653,6 +847,7 @@ def _backends_iterator(project):
 
     if not "nextPageToken" in results:
       return
+    next_page_token = results["nextPageToken"]
 
 K8s_BACKEND_REGEX = re.compile("k8s-be-(\d+)--([\da-f]+$)")
 
@@ -677,22 +872,21 @@ def cleanup_backend_services(args):
   # we then use the UID to match the backend to the URL map.
   # if there is no such URL map we delete the backend.
 
-  url_maps = _get_k8s_url_maps(args.project)
-
-  url_map_uids = set()
-  for u in url_maps:
-    url_map_uids.add(u.uid)
+  url_map_uids = set(u.uid for u in _get_k8s_url_maps(args))
 
   logging.info("Found K8s URL maps with UIDs:\n%s", "\n".join(url_map_uids))
 
-  credentials = GoogleCredentials.get_application_default()
-  compute = discovery.build('compute', 'v1', credentials=credentials)
+  compute = gcp_util.get_client('compute', 'v1')
   backends = compute.backendServices()
 
   expired = []
   unexpired = []
-  for b in _backends_iterator(args.project):
+  to_delete = []
+  services = {}
+  for b in _cached(args, "backend_services",
+                   lambda: _backends_iterator(args.project)):
     name = b["name"]
+    services[name] = b
     pieces = _parse_backend_name(name)
 
     if not pieces:
@@ -711,17 +905,20 @@ def cleanup_backend_services(args):
       else:
         logging.info("Deleting backend services: %s, no matching URL map",
                      name)
-        response = backends.delete(project=args.project,
-                                   backendService=name).execute()
+        to_delete.append((name, backends.delete(project=args.project,
+                                                backendService=name)))
+
+  ops, _ = _batch_delete(compute.new_batch_http_request, to_delete,
+                         "backend service")
+  _uncache_deleted(args, "backend_services", services, ops,
+                   compute.globalOperations(), compute.new_batch_http_request)
 
   logging.info("In use backend services:\n%s", "\n".join(unexpired))
   logging.info("Deleted backend services:\n%s", "\n".join(expired))
 
 
 def cleanup_health_checks(args):
-  credentials = GoogleCredentials.get_application_default()
-
-  compute = discovery.build('compute', 'v1', credentials=credentials)
+  compute = gcp_util.get_client('compute', 'v1')
   health_checks = compute.healthChecks()
   next_page_token = None
 
@@ -739,36 +936,30 @@ def cleanup_health_checks(args):
 
     next_page_token = results["nextPageToken"]
 
-  backends = compute.backendServices()
-  services = {}
-  while True:
-    results = backends.list(project=args.project,
-                            pageToken=next_page_token).execute()
-    if not "items" in results:
-      break
-    for d in results["items"]:
-      name = d["name"]
-      services[name] = d
-
-    if not "nextPageToken" in results:
-      break
-
-    next_page_token = results["nextPageToken"]
+  # Health checks are named after their backend service; backend services
+  # also link to the health checks they use.
+  used = set()
+  for b in _cached(args, "backend_services",
+                   lambda: _backends_iterator(args.project)):
+    used.add(b["name"])
+    for link in b.get("healthChecks", []):
+      used.add(link.rsplit("/", 1)[-1])
 
   # Find all health checks not associated with a service.
   unmatched = []
   matched = []
-  for name in checks.iterkeys():
-    if not name in services:
+  to_delete = []
+  for name in checks:
+    if not name in used:
       unmatched.append(name)
       logging.info("Deleting health check: %s", name)
       if not args.dryrun:
-        response = health_checks.delete(project=args.project,
-                                        healthCheck=name).execute()
-        logging.info("response = %s", response)
+        to_delete.append((name, health_checks.delete(project=args.project,
+                                                     healthCheck=name)))
     else:
       matched.append(name)
 
+  _batch_delete(compute.new_batch_http_request, to_delete, "health check")
 
   logging.info("Unmatched health checks:\n%s", "\n".join(unmatched))
   logging.info("Matched health checks:\n%s", "\n".join(matched))
@@ -785,15 +976,15 @@ def get_ssl_certificate_domain(certificate):
   return ""
 
 def cleanup_certificates(args):
-  credentials = GoogleCredentials.get_application_default()
-
   # Using compute beta API other than v1 to get detailed domain information.
-  compute = discovery.build('compute', 'beta', credentials=credentials)
+  compute = gcp_util.get_client('compute', 'beta')
   certificates = compute.sslCertificates()
   next_page_token = None
 
   unexpired = []
   expired = []
+  skipped = []
+  to_delete = []
 
   while True:
     results = certificates.list(project=args.project,
@@ -810,9 +1001,14 @@ def cleanup_certificates(args):
 
       name = d["name"]
 
+      if _incremental_skip(args, "certificate", d):
+        skipped.append(name)
+        continue
+
       if not "managed" in d:
         logging.info("%s is an unmanged certificate and will be deleted",
                      name)
+        infra_type = None
         max_age = datetime.timedelta(days=7)
         domain = "<unknown domain>"
       else:
@@ -823,22 +1019,21 @@ def cleanup_certificates(args):
         if not infra_type:
           logging.info("Skipping certificate named %s for domain %s; "
                        "it does not match any infra type.", name, domain)
+          _inventory_record(args, "certificate", d, None)
           continue
 
         logging.info("Certificate named %s for domain %s categorized as %s",
                      name, domain, infra_type)
         max_age = MAX_LIFETIME[infra_type]
 
+      _inventory_record(args, "certificate", d, infra_type, max_age=max_age)
+
       if age > max_age:
         logging.info("Deleting certifcate: %s for domain %s", d["name"], domain)
         is_expired = True
         if not args.dryrun:
-          try:
-            certificates.delete(
-              project=args.project, sslCertificate=d["name"]).execute()
-          except Exception as e:  # pylint: disable=broad-except
-            logging.error("There was a problem deleting certifcate %s; "
-                          "error: %s", d["name"], e)
+          to_delete.append((d["name"], certificates.delete(
+            project=args.project, sslCertificate=d["name"])))
         if is_expired:
           expired.append("{0} for {1}".format(name, domain))
         else:
@@ -849,41 +1044,54 @@ def cleanup_certificates(args):
 
     next_page_token = results["nextPageToken"]
 
+  _batch_delete(compute.new_batch_http_request, to_delete, "certificate")
+
+  logging.info("Skipped %d certificates unchanged since the last snapshot",
+               len(skipped))
   logging.info("Unexpired certificates:\n%s", "\n".join(unexpired))
   logging.info("expired certificates:\n%s", "\n".join(expired))
   logging.info("Finished cleanup certificates")
 
-def cleanup_service_accounts(args):
-  logging.info("Cleanup service accounts")
-
-  credentials = GoogleCredentials.get_application_default()
-
-  iam = discovery.build('iam', 'v1', credentials=credentials)
-  projects = iam.projects()
-  accounts = []
+def _service_accounts_iterator(iam, project):
   next_page_token = None
   while True:
     service_accounts = iam.projects().serviceAccounts().list(
-      name='projects/' + args.project, pageToken=next_page_token).execute()
-    accounts.extend(service_accounts["accounts"])
+      name='projects/' + project, pageToken=next_page_token).execute()
+    for a in service_accounts.get("accounts", []):
+      yield a
     if not "nextPageToken" in service_accounts:
-      break
+      return
     next_page_token = service_accounts["nextPageToken"]
 
+def cleanup_service_accounts(args):
+  logging.info("Cleanup service accounts")
+
+  iam = gcp_util.get_client('iam', 'v1')
+  projects = iam.projects()
+  accounts = _cached(args, "service_accounts",
+                     lambda: _service_accounts_iterator(iam, args.project))
+
   keys_client = projects.serviceAccounts().keys()
 
   unmatched_emails = []
   expired_emails = []
   unexpired_emails = []
+  skipped_emails = []
+  to_delete = []
   # Service accounts don't specify the creation date time. So we
   # use the creation time of the key associated with the account.
   for a in accounts:
+    if _incremental_skip(args, "service_account", a):
+      skipped_emails.append(a["email"])
+      continue
+
     infra_type = name_to_infra_type(a["email"])
 
     if not infra_type:
       logging.info("Skipping service account %s; it does not match any "
                    "infra type.", a["email"])
       unmatched_emails.append(a["email"])
+      _inventory_record(args, "service_account", a, None)
       continue
 
     logging.info("Service account %s categorized as %s", a["email"], infra_type)
@@ -891,22 +1099,34 @@ def cleanup_service_accounts(args):
     keys = keys_client.list(name=a["name"]).execute()
 
     is_expired = True
+    # The account expires when its newest key expires.
+    expires_at = 0
     for k in keys["keys"]:
       valid_time = date_parser.parse(k["validAfterTime"])
       now = datetime.datetime.now(valid_time.tzinfo)
 
+      expires_at = max(expires_at,
+                       (valid_time + MAX_LIFETIME[infra_type]).timestamp())
       age = now - valid_time
       if age < MAX_LIFETIME[infra_type]:
         is_expired = False
-        break
+    _inventory_record(args, "service_account", a, infra_type,
+                      expires_at=expires_at)
     if is_expired:
       logging.info("Deleting account: %s", a["email"])
       if not args.dryrun:
-        iam.projects().serviceAccounts().delete(name=a["name"]).execute()
+        to_delete.append((a["email"], iam.projects().serviceAccounts().delete(
+          name=a["name"])))
       expired_emails.append(a["email"])
     else:
       unexpired_emails.append(a["email"])
 
+  ops, _ = _batch_delete(iam.new_batch_http_request, to_delete,
+                         "service account")
+  _uncache(args, "service_accounts", [a for a in accounts if a["email"] in ops])
+
+  logging.info("Skipped %d service accounts unchanged since the last snapshot",
+               len(skipped_emails))
   logging.info("Unmatched emails:\n%s", "\n".join(unmatched_emails))
   logging.info("Unexpired emails:\n%s", "\n".join(unexpired_emails))
   logging.info("expired emails:\n%s", "\n".join(expired_emails))
@@ -976,20 +1196,12 @@ def trim_unused_bindings(iamPolicy, accounts, project):
 def cleanup_service_account_bindings(args):
   logging.info("Cleanup service account bindings")
 
-  credentials = GoogleCredentials.get_application_default()
-  iam = discovery.build('iam', 'v1', credentials=credentials)
-  accounts = []
-  next_page_token = None
-  while True:
-    service_accounts = iam.projects().serviceAccounts().list(
-      name='projects/' + args.project, pageToken=next_page_token).execute()
-    for a in service_accounts["accounts"]:
-      accounts.append(a["email"])
-    if not "nextPageToken" in service_accounts:
-      break
-    next_page_token = service_accounts["nextPageToken"]
+  iam = gcp_util.get_client('iam', 'v1')
+  accounts = [a["email"] for a in _cached(
+    args, "service_accounts",
+    lambda: _service_accounts_iterator(iam, args.project))]
 
-  resourcemanager = discovery.build('cloudresourcemanager', 'v1', credentials=credentials)
+  resourcemanager = gcp_util.get_client('cloudresourcemanager', 'v1')
   logging.info("Get IAM policy for project %s", args.project)
   iamPolicy = resourcemanager.projects().getIamPolicy(resource=args.project, body={}).execute()
   trim_unused_bindings(iamPolicy, accounts, args.project)
@@ -1029,19 +1241,101 @@ def execute_rpc(rpc):
   """Execute a Google RPC request with retries."""
   return rpc.execute()
 
-# Wait for 'ops' to finish in 'max_wait_mins' or return the remaining ops.
-# operation_resource must implement 'get()' method.
-def wait_ops_max_mins(operation_resource, project, ops, max_wait_mins=15):
+# Maximum number of requests sent in a single batch request.
+BATCH_SIZE = 100
+
+def _execute_batched(new_batch, requests):
+  """Execute requests using batch HTTP requests.
+
+  Args:
+    new_batch: Function creating a BatchHttpRequest; e.g.
+      compute.new_batch_http_request.
+    requests: List of (key, HttpRequest) pairs. Keys must be unique.
+
+  Returns:
+    responses: Dictionary mapping keys to the responses of successful requests.
+    errors: Dictionary mapping keys to the exceptions of failed requests.
+  """
+  responses = {}
+  errors = {}
+
+  def _callback(request_id, response, exception):
+    if exception is not None:
+      errors[request_id] = exception
+    else:
+      responses[request_id] = response
+
+  for start in range(0, len(requests), BATCH_SIZE):
+    batch = new_batch(callback=_callback)
+    for key, request in requests[start:start + BATCH_SIZE]:
+      batch.add(request, request_id=key)
+    batch.execute()
+
+  return responses, errors
+
+def _batch_delete(new_batch, requests, kind):
+  """Send delete requests in batches.
+
+  Args:
+    new_batch: Function creating a BatchHttpRequest.
+    requests: List of (name, HttpRequest) pairs for the deletes.
+    kind: Human readable kind of resource used in log messages.
+
+  Returns:
+    ops: Dictionary mapping names to the operations returned by the deletes
+      that were accepted.
+    errors: Dictionary mapping names to the exceptions of failed deletes.
+  """
+  if not requests:
+    return {}, {}
+
+  logging.info("Sending %d %s deletes in batches of %d", len(requests), kind,
+               BATCH_SIZE)
+  ops, errors = _execute_batched(new_batch, requests)
+
+  for name, e in errors.items():
+    logging.error("There was a problem deleting %s %s; error: %s", kind, name,
+                  e)
+  return ops, errors
+
+def wait_ops_max_mins(operation_resource, project, ops, max_wait_mins=15,
+                      new_batch=None, done=None):
+  """Wait for ops to finish in max_wait_mins or return the remaining ops.
+
+  Args:
+    operation_resource: Resource implementing a get(project, operation)
+      method; e.g. compute.globalOperations().
+    project: The project owning the operations.
+    ops: List of operations to wait for.
+    max_wait_mins: Maximum time to wait in minutes.
+    new_batch: (Optional) Function creating a BatchHttpRequest. If supplied
+      operations are polled with batch requests instead of one request per
+      operation.
+    done: (Optional) List the finished operations are appended to.
+
+  Returns:
+    ops: The operations that didn't finish.
+  """
   end_time = datetime.datetime.now() + datetime.timedelta(minutes=max_wait_mins)
 
   while datetime.datetime.now() < end_time and ops:
-    not_done = []
-    for op in ops:
-      op = operation_resource.get(project=project, operation=op["name"]).execute()
-      status = op.get("status", "")
-      if status != "DONE":
-        not_done.append(op)
-    ops = not_done
+    requests = [(op["name"], operation_resource.get(project=project,
+                                                    operation=op["name"]))
+                for op in ops]
+    if new_batch:
+      responses, errors = _execute_batched(new_batch, requests)
+      for name, e in errors.items():
+        logging.error("There was a problem getting operation %s; error: %s",
+                      name, e)
+      # Keep the last known state of operations we failed to get so they
+      # are polled again.
+      ops = [responses.get(op["name"], op) for op in ops]
+    else:
+      ops = [request.execute() for _, request in requests]
+
+    if done is not None:
+      done.extend(op for op in ops if op.get("status", "") == "DONE")
+    ops = [op for op in ops if op.get("status", "") != "DONE"]
     if ops:
       time.sleep(30)
   return ops
@@ -1099,8 +1393,7 @@ AUTO_DEPLOYMENT_NAME = collections.namedtuple("auto_deploy_name",
 
 def _iter_deployments(project):
   """Iterate over all deployments"""
-  credentials = GoogleCredentials.get_application_default()
-  dm = discovery.build("deploymentmanager", "v2", credentials=credentials)
+  dm = gcp_util.get_client("deploymentmanager", "v2")
 
   deployments_client = dm.deployments()
 
@@ -1126,26 +1419,24 @@ def _delete_deployments(project, deployments, max_wait_mins=15):
    deployments: (iterable) names of the deployments to delete
    wait_ops_max_mins: (Optional) max time to wait in minutes
   """
-  credentials = GoogleCredentials.get_application_default()
-  dm = discovery.build("deploymentmanager", "v2", credentials=credentials)
+  dm = gcp_util.get_client("deploymentmanager", "v2")
 
   deployments_client = dm.deployments()
-  delete_ops = []
+  to_delete = []
   for dm_name in deployments:
-    try:
-      logging.info("Deleting deployment %s in project %s", dm_name,
-                   project)
-      op = deployments_client.delete(project=project,
-                                     deployment=dm_name).execute()
-      delete_ops.append(op)
-    except Exception as e: # pylint: disable=broad-except
-      # Keep going on error because we want to delete the other deployments.
-      # TODO(jlewi): Do we need to handle cases by issuing delete with abandon?
-      logging.error("There was a problem deleting deployment %s; error %s",
-                    dm_name, e)
-
-  delete_ops = wait_ops_max_mins(dm.operations(), project, delete_ops,
-                                 max_wait_mins=max_wait_mins)
+    logging.info("Deleting deployment %s in project %s", dm_name,
+                 project)
+    to_delete.append((dm_name, deployments_client.delete(project=project,
+                                                         deployment=dm_name)))
+
+  # Failed deletes are logged and skipped because we want to delete the other
+  # deployments.
+  # TODO(jlewi): Do we need to handle cases by issuing delete with abandon?
+  ops, _ = _batch_delete(dm.new_batch_http_request, to_delete, "deployment")
+
+  delete_ops = wait_ops_max_mins(dm.operations(), project, list(ops.values()),
+                                 max_wait_mins=max_wait_mins,
+                                 new_batch=dm.new_batch_http_request)
   not_done_names = [op["name"] for op in delete_ops]
 
   logging.info("Delete ops that didn't finish:\n%s", "\n".join(not_done_names))
@@ -1289,8 +1580,7 @@ def cleanup_deployments(args): # pylint: disable=too-many-statements,too-many-br
 
 def cleanup_clusters(args):
   logging.info("Cleanup clusters")
-  credentials = GoogleCredentials.get_application_default()
-  gke = discovery.build("container", "v1", credentials=credentials)
+  gke = gcp_util.get_client("container", "v1")
 
   # Collect clusters for which deployment might no longer exist.
   clusters_client = gke.projects().zones().clusters()
@@ -1299,93 +1589,198 @@ def cleanup_clusters(args):
   unexpired = []
   stopping = []
 
-  for zone in args.zones.split(","):
-    clusters = clusters_client.list(projectId=args.project, zone=zone).execute()
+  def list_page(zone, _):
+    return clusters_client.list(projectId=args.project, zone=zone).execute()
 
-    if not clusters:
-      continue
-    for c in clusters["clusters"]:
-      name = c["name"]
+  for zone, c in _zone_fanout_iterator(args.project, args.zones, list_page,
+                                       items_key="clusters"):
+    name = c["name"]
 
-      infra_type = name_to_infra_type(name)
+    infra_type = name_to_infra_type(name)
 
-      if not infra_type:
-        logging.info("Skipping cluster %s; it does not match any infra type.",
-                     name)
-        continue
+    if not infra_type:
+      logging.info("Skipping cluster %s; it does not match any infra type.",
+                   name)
+      continue
 
-      logging.info("Deployment %s categorized as %s", name, infra_type)
+    logging.info("Deployment %s categorized as %s", name, infra_type)
 
-      full_insert_time = c["createTime"]
-      insert_time_str = full_insert_time[:-6]
-      tz_offset = full_insert_time[-6:]
-      hours_offset = int(tz_offset.split(":", 1)[0])
-      RFC3339 = "%Y-%m-%dT%H:%M:%S"
-      insert_time = datetime.datetime.strptime(insert_time_str, RFC3339)
+    full_insert_time = c["createTime"]
+    insert_time_str = full_insert_time[:-6]
+    tz_offset = full_insert_time[-6:]
+    hours_offset = int(tz_offset.split(":", 1)[0])
+    RFC3339 = "%Y-%m-%dT%H:%M:%S"
+    insert_time = datetime.datetime.strptime(insert_time_str, RFC3339)
 
-      # Convert the time to UTC
-      insert_time_utc = insert_time + datetime.timedelta(hours=-1 * hours_offset)
-      age = datetime.datetime.utcnow()- insert_time_utc
+    # Convert the time to UTC
+    insert_time_utc = insert_time + datetime.timedelta(hours=-1 * hours_offset)
+    age = datetime.datetime.utcnow()- insert_time_utc
 
-      # https://cloud.google.com/kubernetes-engine/docs/reference/rest/v1/projects.locations.clusters#Cluster.Status
-      if c.get("status", "") in ["ERROR", "DEGRADED"]:
-        # Prune failed deployments more aggressively
-        logging.info("Cluster %s is in error state; %s", c["name"], c.get("statusMessage", ""))
-        max_age = datetime.timedelta(minutes=10)
-      else:
-        max_age = MAX_LIFETIME[infra_type]
+    # https://cloud.google.com/kubernetes-engine/docs/reference/rest/v1/projects.locations.clusters#Cluster.Status
+    if c.get("status", "") in ["ERROR", "DEGRADED"]:
+      # Prune failed deployments more aggressively
+      logging.info("Cluster %s is in error state; %s", c["name"], c.get("statusMessage", ""))
+      max_age = datetime.timedelta(minutes=10)
+    else:
+      max_age = MAX_LIFETIME[infra_type]
 
-      if age > max_age:
-        if c.get("status", "") == "STOPPING":
-          logging.info("Cluster %s is already stopping; not redeleting", c["name"])
-          stopping.append(c["name"])
-          continue
-        expired.append(name)
-        logging.info("Deleting cluster %s in zone %s", name, zone)
+    if age > max_age:
+      if c.get("status", "") == "STOPPING":
+        logging.info("Cluster %s is already stopping; not redeleting", c["name"])
+        stopping.append(c["name"])
+        continue
+      expired.append(name)
+      logging.info("Deleting cluster %s in zone %s", name, zone)
 
-        if not args.dryrun:
-          clusters_client.delete(projectId=args.project, zone=zone,
-                                 clusterId=name).execute()
+      if not args.dryrun:
+        clusters_client.delete(projectId=args.project, zone=zone,
+                               clusterId=name).execute()
 
-      else:
-        unexpired.append(name)
+    else:
+      unexpired.append(name)
   logging.info("Unexpired clusters:\n%s", "\n".join(unexpired))
   logging.info("Already stopping clusters:\n%s", "\n".join(stopping))
   logging.info("expired clusters:\n%s", "\n".join(expired))
   logging.info("Finished cleanup clusters")
 
+# Deleting deployments should be started first because hopefully that will
+# cleanup all the resources associated with the deployment, so sweepers of
+# the resources a deployment creates wait for the deployments to be deleted.
+_AFTER_DEPLOYMENTS = [cleanup_auto_deployments, cleanup_deployments]
+
+# Map each sweeper to the sweepers that must finish before it starts.
+# Sweepers without dependencies run concurrently.
+#
 # The order of cleanup_forwarding_rules, cleanup_target_http_proxies,
 # cleanup_url_maps, cleanup_backend_services, cleanup_instance_groups makes
 # sure ingress resources are GCed in one run of this script. See
 # https://github.com/kubernetes/ingress-gce/issues/136#issuecomment-371254595
+SWEEPER_DEPENDENCIES = collections.OrderedDict([
+  (cleanup_auto_deployments, []),
+  (cleanup_deployments, []),
+  (cleanup_clusters, _AFTER_DEPLOYMENTS),
+  (cleanup_endpoints, _AFTER_DEPLOYMENTS),
+  (cleanup_service_accounts, _AFTER_DEPLOYMENTS),
+  # Bindings are trimmed based on the service accounts that still exist.
+  (cleanup_service_account_bindings, [cleanup_service_accounts]),
+  # Workflows aren't created by deployments.
+  (cleanup_workflows, []),
+  (cleanup_disks, _AFTER_DEPLOYMENTS),
+  (cleanup_firewall_rules, _AFTER_DEPLOYMENTS),
+  (cleanup_forwarding_rules, _AFTER_DEPLOYMENTS),
+  (cleanup_target_https_proxies, [cleanup_forwarding_rules]),
+  (cleanup_target_http_proxies, [cleanup_forwarding_rules]),
+  # Certificates can't be deleted while a target https proxy uses them.
+  (cleanup_certificates, [cleanup_target_https_proxies]),
+  (cleanup_url_maps, [cleanup_target_https_proxies,
+                      cleanup_target_http_proxies]),
+  (cleanup_backend_services, [cleanup_url_maps]),
+  (cleanup_health_checks, [cleanup_backend_services]),
+  (cleanup_instance_groups, [cleanup_backend_services]),
+])
+
+# Maximum number of sweepers to run at the same time.
+DEFAULT_MAX_WORKERS = 8
+
+SWEEPER_RESULT = collections.namedtuple("SWEEPER_RESULT",
+                                        ("name", "wall_time", "errors"))
+
+class _ErrorCounter(logging.Handler):
+  """Count the error log records emitted by each sweeper.
+
+  Sweepers log and swallow most errors, so we attribute error records to the
+  sweeper whose context emitted them.
+  """
+
+  def __init__(self):
+    super(_ErrorCounter, self).__init__(level=logging.ERROR)
+    self._counts = collections.Counter()
+
+  def count(self, name):
+    with self.lock:
+      return self._counts[name]
+
+  def emit(self, record):
+    # Handlers are called on the thread that logged the record.
+    name = _current_sweeper.get()
+    if name:
+      self._counts[name] += 1
+
+def _run_sweeper(op, args, error_counter):
+  """Run a single sweeper and return a SWEEPER_RESULT."""
+  name = op.__name__
+  start = time.time()
+  token = _current_sweeper.set(name)
+  try:
+    op(args)
+  except Exception as e: # pylint: disable=broad-except
+    logging.error("Sweeper %s failed; error: %s\n%s", name, e,
+                  traceback.format_exc())
+  finally:
+    _current_sweeper.reset(token)
+  return SWEEPER_RESULT(name, time.time() - start, error_counter.count(name))
+
+def run_sweepers(args, dependencies, max_workers=DEFAULT_MAX_WORKERS):
+  """Run sweepers concurrently while respecting their dependencies.
+
+  A sweeper starts as soon as all the sweepers it depends on have finished;
+  a sweeper that fails still counts as finished.
+
+  Args:
+    args: Command line arguments passed to every sweeper.
+    dependencies: Ordered map from a sweeper to the list of sweepers that
+      must finish before it starts.
+    max_workers: Maximum number of sweepers to run at the same time.
+
+  Returns:
+    results: List of SWEEPER_RESULT in the order the sweepers finished.
+  """
+  pending = collections.OrderedDict(
+    (op, set(deps)) for op, deps in dependencies.items())
+
+  for op, deps in pending.items():
+    missing = [d.__name__ for d in deps if d not in pending]
+    if missing:
+      raise ValueError("Sweeper {0} depends on unknown sweepers {1}".format(
+        op.__name__, missing))
+
+  error_counter = _ErrorCounter()
+  logging.getLogger().addHandler(error_counter)
+
+  results = []
+  finished_ops = set()
+  try:
+    with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+      running = {}
+      while pending or running:
+        ready = [op for op, deps in pending.items() if deps <= finished_ops]
+        for op in ready:
+          del pending[op]
+          running[executor.submit(_run_sweeper, op, args, error_counter)] = op
+
+        if not running:
+          raise ValueError("Sweepers have cyclic dependencies: {0}".format(
+            [op.__name__ for op in pending]))
+
+        done, _ = futures.wait(running, return_when=futures.FIRST_COMPLETED)
+        for f in done:
+          finished_ops.add(running.pop(f))
+          results.append(f.result())
+  finally:
+    logging.getLogger().removeHandler(error_counter)
+
+  return results
 
 def cleanup_all(args):
-  ops = [# Deleting deployments should be called first because hopefully that will
-         # cleanup all the resources associated with the deployment
-         cleanup_auto_deployments,
-         cleanup_deployments,
-         cleanup_clusters,
-         cleanup_endpoints,
-         cleanup_service_accounts,
-         cleanup_service_account_bindings,
-         cleanup_workflows,
-         cleanup_disks,
-         cleanup_forwarding_rules,
-         cleanup_target_https_proxies,
-         cleanup_target_http_proxies,
-         cleanup_certificates,
-         cleanup_url_maps,
-         cleanup_backend_services,
-         cleanup_firewall_rules,
-         cleanup_health_checks,
-         cleanup_instance_groups]
-  for op in ops:
-    try:
-      op(args)
-    except Exception as e: # pylint: disable=broad-except
-      logging.error(e)
-      exc_type, exc_value, exc_tb = sys.exc_info()
-      traceback.print_exception(exc_type, exc_value, exc_tb)
+  max_workers = getattr(args, "max_workers", DEFAULT_MAX_WORKERS)
+  start = time.time()
+  results = run_sweepers(args, SWEEPER_DEPENDENCIES, max_workers=max_workers)
+
+  lines = ["{0:<35} {1:>8.1f}s {2:>4} errors".format(r.name, r.wall_time,
+                                                      r.errors)
+           for r in results]
+  logging.info("Sweeper summary (total %.1fs):\n%s", time.time() - start,
+               "\n".join(lines))
 
 def add_workflow_args(parser):
   parser.add_argument(
@@ -1445,6 +1840,18 @@ def main():
     "--max_wf_age_hours", default=7*24, type=int,
     help=("How long to wait before garbage collecting Argo workflows."))
 
+  parser.add_argument(
+    "--inventory_path", default="", type=str,
+    help=("Local path or GCS URI of a SQLite snapshot of the resources "
+          "classified in previous runs. If set the snapshot is updated "
+          "and a diff against the previous snapshot is logged."))
+
+  parser.add_argument(
+    "--incremental", dest="incremental", action="store_true",
+    help=("Only classify resources that are new or that expired since the "
+          "last snapshot. Requires --inventory_path."))
+  parser.set_defaults(incremental=False)
+
   parser.add_argument('--dryrun', dest='dryrun', action='store_true')
   parser.add_argument('--no-dryrun', dest='dryrun', action='store_false')
   parser.set_defaults(dryrun=False)
@@ -1458,6 +1865,9 @@ def main():
 
   add_deployments_args(parser_all)
   add_workflow_args(parser_all)
+  parser_all.add_argument(
+    "--max_workers", default=DEFAULT_MAX_WORKERS, type=int,
+    help="Maximum number of sweepers to run concurrently.")
 
   parser_all.set_defaults(func=cleanup_all)
 
@@ -1553,6 +1963,9 @@ def main():
 
   args = parser.parse_args()
 
+  if args.incremental and not args.inventory_path:
+    parser.error("--incremental requires --inventory_path")
+
   # Update max age
   MAX_LIFETIME[E2E_INFRA] = datetime.timedelta(hours=args.max_age_hours)
 
@@ -1560,7 +1973,27 @@ def main():
 
   util.maybe_activate_service_account()
 
-  args.func(args)
+  args.inventory = None
+  if args.inventory_path:
+    args.inventory = cleanup_inventory.Inventory(args.inventory_path)
+
+  # Collections shared by the sweepers of this run.
+  args.resource_cache = cleanup_cache.ResourceCache()
+
+  try:
+    args.func(args)
+    args.resource_cache.log_stats()
+
+    if args.inventory:
+      args.inventory.log_diff()
+      if args.dryrun:
+        logging.info("Dryrun mode; inventory snapshot %s not updated",
+                     args.inventory_path)
+      else:
+        args.inventory.save()
+  finally:
+    if args.inventory:
+      args.inventory.close()
 
 if __name__ == "__main__":
   main()
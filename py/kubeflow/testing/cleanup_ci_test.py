@@ -4,12 +4,58 @@ import os
 import pytest
 import yaml
 
+from kubeflow.testing import cleanup_cache
 from kubeflow.testing import cleanup_ci
 
 class FakeArgs:
   project = "someproject"
   dryrun = True
 
+class CachedArgs(FakeArgs):
+  def __init__(self):
+    self.resource_cache = cleanup_cache.ResourceCache()
+
+class FakeRequest:
+  def __init__(self, response=None, error=None):
+    self.response = response
+    self.error = error
+
+  def execute(self):
+    if self.error:
+      raise self.error
+    return self.response
+
+class FakeBatch:
+  """Fake of googleapiclient's BatchHttpRequest."""
+  batch_sizes = []
+
+  def __init__(self, callback=None):
+    self.callback = callback
+    self.requests = []
+
+  def add(self, request, request_id=None):
+    self.requests.append((request_id, request))
+
+  def execute(self):
+    FakeBatch.batch_sizes.append(len(self.requests))
+    for request_id, request in self.requests:
+      self.callback(request_id, request.response, request.error)
+
+class FakeOperations:
+  """Fake operations resource whose operations finish after some polls."""
+
+  def __init__(self, polls_to_finish, errors=None):
+    self.polls_to_finish = polls_to_finish
+    self.errors = errors or {}
+
+  def get(self, project, operation): # pylint: disable=unused-argument
+    self.polls_to_finish[operation] -= 1
+    status = "DONE" if self.polls_to_finish[operation] <= 0 else "RUNNING"
+    op = {"name": operation, "status": status}
+    if status == "DONE" and operation in self.errors:
+      op["error"] = self.errors[operation]
+    return FakeRequest(op)
+
 def assert_lists_equal(left, right):
   message = "Lists are not equal; {0}!={1}".format(left, right)
   assert len(left) == len(right), message
@@ -145,6 +191,175 @@ def test_parse_k8s_url_map():
   assert cleanup_ci._parse_k8s(
     "k8s-um-istio-system-envoy-ingress--848f8392b2ce1c27") == expected
 
+def test_run_sweepers():
+  finished = []
+
+  def first(_):
+    finished.append("first")
+
+  def second(_):
+    assert "first" in finished
+    logging.error("second had a problem")
+    finished.append("second")
+
+  def third(_):
+    assert "second" in finished
+    raise ValueError("third failed")
+
+  def independent(_):
+    finished.append("independent")
+
+  dependencies = collections.OrderedDict([
+    (first, []),
+    (second, [first]),
+    (third, [second]),
+    (independent, []),
+  ])
+
+  results = cleanup_ci.run_sweepers(FakeArgs(), dependencies, max_workers=2)
+
+  errors = {r.name: r.errors for r in results}
+  assert errors == {"first": 0, "second": 1, "third": 1, "independent": 0}
+
+  names = [r.name for r in results]
+  assert names.index("first") < names.index("second") < names.index("third")
+
+def test_run_sweepers_counts_worker_thread_errors():
+  def list_page(zone, _):
+    logging.error("problem listing %s", zone)
+    return {}
+
+  def fanout(_):
+    list(cleanup_ci._zone_fanout_iterator(
+      "someproject", "zone-a,zone-b", list_page))
+
+  def quiet(_):
+    pass
+
+  dependencies = collections.OrderedDict([
+    (fanout, []),
+    (quiet, []),
+  ])
+
+  results = cleanup_ci.run_sweepers(FakeArgs(), dependencies, max_workers=2)
+
+  errors = {r.name: r.errors for r in results}
+  assert errors == {"fanout": 2, "quiet": 0}
+
+def test_sweepers_wait_for_deployments():
+  for op, deps in cleanup_ci.SWEEPER_DEPENDENCIES.items():
+    if op in (cleanup_ci.cleanup_auto_deployments,
+              cleanup_ci.cleanup_deployments, cleanup_ci.cleanup_workflows):
+      continue
+    assert deps, "{0} doesn't wait for other sweepers".format(op.__name__)
+
+def test_run_sweepers_cycle():
+  def first(_):
+    pass
+
+  def second(_):
+    pass
+
+  dependencies = collections.OrderedDict([
+    (first, [second]),
+    (second, [first]),
+  ])
+
+  with pytest.raises(ValueError):
+    cleanup_ci.run_sweepers(FakeArgs(), dependencies)
+
+def test_zone_fanout_iterator():
+  pages = {
+    ("zone-a", None): {"items": [{"name": "a1"}], "nextPageToken": "a-2"},
+    ("zone-a", "a-2"): {"items": [{"name": "a2"}]},
+    ("zone-b", None): {},
+    ("zone-c", None): {"items": [{"name": "c1"}, {"name": "c2"}]},
+  }
+
+  def list_page(zone, page_token):
+    return pages[(zone, page_token)]
+
+  actual = set((zone, i["name"]) for zone, i in
+               cleanup_ci._zone_fanout_iterator(
+                 "someproject", "zone-a,zone-b,zone-c", list_page))
+
+  assert actual == set([("zone-a", "a1"), ("zone-a", "a2"),
+                        ("zone-c", "c1"), ("zone-c", "c2")])
+
+def test_zone_fanout_iterator_error():
+  def list_page(zone, _):
+    if zone == "zone-b":
+      raise ValueError("list failed")
+    return {"items": [{"name": zone}]}
+
+  with pytest.raises(ValueError):
+    list(cleanup_ci._zone_fanout_iterator(
+      "someproject", "zone-a,zone-b", list_page))
+
+def test_cached():
+  args = FakeArgs()
+  calls = []
+
+  def list_items():
+    calls.append(1)
+    return [{"name": "a"}, {"name": "b"}]
+
+  # Without a cache every sweeper lists the collection.
+  assert cleanup_ci._cached(args, "url_maps", list_items) == list_items()
+  assert len(calls) == 2
+
+  args = CachedArgs()
+  cleanup_ci._cached(args, "url_maps", list_items)
+  cleanup_ci._uncache(args, "url_maps", [{"name": "a"}])
+  assert cleanup_ci._cached(args, "url_maps", list_items) == [{"name": "b"}]
+  assert len(calls) == 3
+
+def test_uncache_deleted(monkeypatch):
+  monkeypatch.setattr(cleanup_ci.time, "sleep", lambda _: None)
+  args = CachedArgs()
+  resources = {"a": {"name": "a"}, "b": {"name": "b"}, "c": {"name": "c"}}
+  cleanup_ci._cached(args, "url_maps", lambda: list(resources.values()))
+
+  operations = FakeOperations({"op-a": 2, "op-b": 1},
+                              errors={"op-b": {"errors": ["in use"]}})
+  ops = {"a": {"name": "op-a"}, "b": {"name": "op-b"}}
+  cleanup_ci._uncache_deleted(args, "url_maps", resources, ops, operations,
+                              FakeBatch)
+
+  # Only the url map whose delete succeeded is removed.
+  assert cleanup_ci._cached(args, "url_maps", lambda: []) == [
+    {"name": "b"}, {"name": "c"}]
+
+def test_execute_batched(monkeypatch):
+  monkeypatch.setattr(cleanup_ci, "BATCH_SIZE", 2)
+  FakeBatch.batch_sizes = []
+
+  requests = [
+    ("a", FakeRequest({"name": "op-a"})),
+    ("b", FakeRequest(error=ValueError("b failed"))),
+    ("c", FakeRequest({"name": "op-c"})),
+  ]
+
+  responses, errors = cleanup_ci._execute_batched(FakeBatch, requests)
+
+  assert FakeBatch.batch_sizes == [2, 1]
+  assert responses == {"a": {"name": "op-a"}, "c": {"name": "op-c"}}
+  assert list(errors.keys()) == ["b"]
+
+def test_wait_ops_max_mins_batched(monkeypatch):
+  monkeypatch.setattr(cleanup_ci.time, "sleep", lambda _: None)
+  FakeBatch.batch_sizes = []
+
+  operations = FakeOperations({"op-1": 1, "op-2": 2})
+  ops = [{"name": "op-1"}, {"name": "op-2"}]
+
+  remaining = cleanup_ci.wait_ops_max_mins(operations, "someproject", ops,
+                                           new_batch=FakeBatch)
+
+  assert remaining == []
+  # One batch per polling round.
+  assert FakeBatch.batch_sizes == [2, 1]
+
 if __name__ == "__main__":
   logging.basicConfig(
       level=logging.INFO,
@@ -0,0 +1,218 @@
+"""A persistent inventory of the resources classified by cleanup_ci.
+
+The inventory is a SQLite file keyed by a resource's self link and creation
+timestamp. For every resource it records the infra type it was classified as
+and the time at which it expires.
+
+This allows cleanup_ci to run incrementally; a resource only needs to be
+classified again if it is new or if it crossed its expiration time since the
+last snapshot.
+
+The snapshot can be stored locally or on GCS.
+"""
+import collections
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from dateutil import parser as date_parser
+from google.api_core import exceptions as gcp_exceptions
+from google.cloud import storage  # pylint: disable=no-name-in-module
+
+from kubeflow.testing import util
+
+# States returned by Inventory.observe
+NEW = "new"
+EXPIRED = "expired"
+UNCHANGED = "unchanged"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS resources (
+  kind TEXT NOT NULL,
+  self_link TEXT NOT NULL,
+  creation_timestamp TEXT NOT NULL,
+  name TEXT NOT NULL,
+  infra_type TEXT,
+  expires_at REAL,
+  last_seen REAL NOT NULL,
+  PRIMARY KEY (kind, self_link, creation_timestamp)
+)
+"""
+
+DIFF = collections.namedtuple("DIFF", ("new", "expired", "removed"))
+
+def resource_key(resource):
+  """Return the (self_link, creation_timestamp) identifying a resource.
+
+  Resources without a self link (e.g. service accounts) are identified by
+  their name.
+  """
+  self_link = resource.get("selfLink") or resource["name"]
+  return self_link, resource.get("creationTimestamp", "")
+
+def expiration_time(creation_timestamp, max_age):
+  """Return the time in seconds since the epoch at which a resource expires.
+
+  Args:
+    creation_timestamp: RFC3339 creation timestamp of the resource.
+    max_age: datetime.timedelta with the max lifetime of the resource.
+  """
+  created = date_parser.parse(creation_timestamp)
+  return (created + max_age).timestamp()
+
+class Inventory:
+  """An inventory of resources backed by a SQLite file.
+
+  The inventory is thread safe so concurrent sweepers can share it.
+  """
+
+  def __init__(self, path):
+    """Create the inventory.
+
+    Args:
+      path: Local path or GCS URI of the SQLite file. The file is created
+        if it doesn't exist.
+    """
+    self.path = path
+    self._lock = threading.Lock()
+
+    if path.lower().startswith("gs://"):
+      handle, self._local_path = tempfile.mkstemp(suffix=".sqlite")
+      os.close(handle)
+      self._download()
+    else:
+      self._local_path = path
+
+    self._conn = sqlite3.connect(self._local_path, check_same_thread=False)
+    self._conn.execute(_SCHEMA)
+
+    # Map from kind to the keys observed in this run.
+    self._seen = collections.defaultdict(set)
+    # Map from kind to the names of new and expired resources in this run.
+    self._new = collections.defaultdict(list)
+    self._expired = collections.defaultdict(list)
+
+  def _download(self):
+    bucket_name, blob_path = util.split_gcs_uri(self.path)
+    blob = storage.Client().bucket(bucket_name).blob(blob_path)
+    try:
+      blob.download_to_filename(self._local_path)
+      logging.info("Downloaded inventory snapshot %s", self.path)
+    except gcp_exceptions.NotFound:
+      logging.info("Inventory snapshot %s doesn't exist; starting a new one",
+                   self.path)
+
+  def observe(self, kind, resource, now=None):
+    """Mark a resource as seen in this run and return its state.
+
+    Args:
+      kind: The kind of resource e.g. "disk".
+      resource: Dictionary describing the resource as returned by GCP.
+      now: (Optional) Current time in seconds since the epoch.
+
+    Returns:
+      state: NEW if the resource isn't in the snapshot, EXPIRED if it
+        crossed its expiration time since it was classified and UNCHANGED
+        otherwise.
+    """
+    if now is None:
+      now = time.time()
+    key = resource_key(resource)
+
+    with self._lock:
+      self._seen[kind].add(key)
+      row = self._conn.execute(
+        "SELECT expires_at FROM resources WHERE kind=? AND self_link=? AND "
+        "creation_timestamp=?", (kind,) + key).fetchone()
+
+      if row is None:
+        self._new[kind].append(resource["name"])
+        return NEW
+
+      expires_at = row[0]
+      if expires_at is not None and expires_at <= now:
+        self._expired[kind].append(resource["name"])
+        return EXPIRED
+
+      return UNCHANGED
+
+  def record(self, kind, resource, infra_type, expires_at, now=None):
+    """Record how a resource was classified.
+
+    Args:
+      kind: The kind of resource e.g. "disk".
+      resource: Dictionary describing the resource as returned by GCP.
+      infra_type: The infra type of the resource or None if it didn't match
+        any infra type.
+      expires_at: Time in seconds since the epoch at which the resource
+        expires or None if it never expires.
+      now: (Optional) Current time in seconds since the epoch.
+    """
+    if now is None:
+      now = time.time()
+    self_link, creation_timestamp = resource_key(resource)
+
+    with self._lock:
+      self._conn.execute(
+        "INSERT OR REPLACE INTO resources VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (kind, self_link, creation_timestamp, resource["name"], infra_type,
+         expires_at, now))
+
+  def diff(self):
+    """Compare the resources observed in this run to the previous snapshot.
+
+    Only kinds observed in this run are compared.
+
+    Returns:
+      diffs: Dictionary mapping kinds to a DIFF with the names of new,
+        expired and removed resources.
+    """
+    diffs = {}
+    with self._lock:
+      for kind, seen in self._seen.items():
+        removed = [name for self_link, creation_timestamp, name in
+                   self._conn.execute(
+                     "SELECT self_link, creation_timestamp, name FROM "
+                     "resources WHERE kind=?", (kind,))
+                   if (self_link, creation_timestamp) not in seen]
+        diffs[kind] = DIFF(sorted(self._new[kind]),
+                           sorted(self._expired[kind]), sorted(removed))
+    return diffs
+
+  def log_diff(self):
+    """Log the diff against the previous snapshot."""
+    for kind, d in sorted(self.diff().items()):
+      logging.info("Inventory diff for %s: %d new, %d expired, %d removed\n"
+                   "new:\n%s\nexpired:\n%s\nremoved:\n%s", kind, len(d.new),
+                   len(d.expired), len(d.removed), "\n".join(d.new),
+                   "\n".join(d.expired), "\n".join(d.removed))
+
+  def save(self):
+    """Save the snapshot.
+
+    Resources of the kinds observed in this run that weren't seen are
+    dropped from the snapshot.
+    """
+    with self._lock:
+      for kind, seen in self._seen.items():
+        rows = self._conn.execute(
+          "SELECT self_link, creation_timestamp FROM resources WHERE kind=?",
+          (kind,)).fetchall()
+        stale = [(kind,) + tuple(r) for r in rows if tuple(r) not in seen]
+        self._conn.executemany(
+          "DELETE FROM resources WHERE kind=? AND self_link=? AND "
+          "creation_timestamp=?", stale)
+      self._conn.commit()
+
+    if self._local_path != self.path:
+      util.upload_file_to_gcs(self._local_path, self.path)
+
+    logging.info("Saved inventory snapshot %s", self.path)
+
+  def close(self):
+    self._conn.close()
+    if self._local_path != self.path:
+      os.remove(self._local_path)
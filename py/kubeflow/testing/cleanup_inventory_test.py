@@ -0,0 +1,64 @@
+import datetime
+import logging
+import os
+import pytest
+
+from kubeflow.testing import cleanup_inventory
+
+def _disk(name, created="2020-01-01T00:00:00.000-00:00"):
+  return {
+    "name": name,
+    "selfLink": "https://compute/disks/" + name,
+    "creationTimestamp": created,
+  }
+
+def test_observe_and_diff(tmpdir):
+  path = os.path.join(str(tmpdir), "inventory.sqlite")
+
+  inventory = cleanup_inventory.Inventory(path)
+  expires_at = cleanup_inventory.expiration_time(
+    "2020-01-01T00:00:00.000-00:00", datetime.timedelta(hours=3))
+
+  for name in ["expiring", "unchanged", "removed"]:
+    assert inventory.observe("disk", _disk(name)) == cleanup_inventory.NEW
+  inventory.record("disk", _disk("expiring"), "e2e", expires_at)
+  inventory.record("disk", _disk("unchanged"), None, None)
+  inventory.record("disk", _disk("removed"), "e2e", expires_at)
+  inventory.save()
+  inventory.close()
+
+  now = expires_at + 1
+  inventory = cleanup_inventory.Inventory(path)
+  assert inventory.observe("disk", _disk("expiring"),
+                           now=now) == cleanup_inventory.EXPIRED
+  assert inventory.observe("disk", _disk("unchanged"),
+                           now=now) == cleanup_inventory.UNCHANGED
+  assert inventory.observe("disk", _disk("added"),
+                           now=now) == cleanup_inventory.NEW
+  # A resource recreated with the same name is a new resource.
+  assert inventory.observe(
+    "disk", _disk("unchanged", created="2020-02-01T00:00:00.000-00:00"),
+    now=now) == cleanup_inventory.NEW
+
+  diff = inventory.diff()
+  assert list(diff.keys()) == ["disk"]
+  assert diff["disk"] == cleanup_inventory.DIFF(["added", "unchanged"],
+                                                ["expiring"], ["removed"])
+
+  inventory.save()
+  inventory.close()
+
+  inventory = cleanup_inventory.Inventory(path)
+  assert inventory.observe("disk", _disk("removed"),
+                           now=now) == cleanup_inventory.NEW
+  inventory.close()
+
+if __name__ == "__main__":
+  logging.basicConfig(
+      level=logging.INFO,
+      format=('%(levelname)s|%(asctime)s'
+            '|%(pathname)s|%(lineno)d| %(message)s'),
+    datefmt='%Y-%m-%dT%H:%M:%S',
+    )
+  logging.getLogger().setLevel(logging.INFO)
+  pytest.main()
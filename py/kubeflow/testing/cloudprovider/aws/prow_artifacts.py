@@ -18,10 +18,12 @@ from kubeflow.testing.cloudprovider.aws import util as aws_util
 AWS_PROW_RESULTS_BUCKET = "aws-kubernetes-jenkins"
 
 
-def create_started(ui_urls):
+def create_started(ui_urls, submit_seconds=None):
     """Return a string containing the contents of started.json for gubernator.
     ui_urls: Dictionary of workflow name to URL corresponding to the Argo UI
         for the workflows launched.
+    submit_seconds: (Optional) Dictionary of workflow name to the number of
+        seconds it took to submit the workflow.
     """
     # See:
     # https://github.com/kubernetes/test-infra/tree/master/gubernator#job-artifact-gcs-layout
@@ -54,6 +56,9 @@ def create_started(ui_urls):
 
     for n, v in items:
         started["metadata"][n + "-ui"] = v
+
+    for n, v in (submit_seconds or {}).items():
+        started["metadata"][n + "-submit-seconds"] = round(v, 1)
     return json.dumps(started)
 
 
@@ -15,6 +15,13 @@ def pytest_addoption(parser):
       action="store",
       help=("Path to the rcfile."))
 
+  parser.addoption(
+      "--lint_cache",
+      default="",
+      action="store",
+      help=("Path of a JSON file caching lint results. Files whose contents, "
+            "rcfile and pylint version didn't change aren't linted again."))
+
 @pytest.fixture
 def rcfile(request):
   return request.config.getoption("--rcfile")
@@ -219,7 +219,8 @@ class BlueprintRunner:
     @retrying.retry(stop_max_delay=total_time.total_seconds() * 1000,
                     retry_on_exception=is_retryable_exception)
     def run_apply():
-      util.run(["make", "apply"], cwd=blueprint_dir, env=env)
+      util.run(["make", "apply"], cwd=blueprint_dir, env=env,
+               max_output_lines=util.ERROR_OUTPUT_LINES)
 
     run_apply()
 
@@ -120,9 +120,11 @@ def deploy_with_kfctl_go(kfctl_path, args, app_dir, env):
   util.run([kfctl_path, "init", app_dir, "-V", "--config=" + config_file],
            env=env)
 
-  util.run([kfctl_path, "generate", "-V", "all"], env=env, cwd=app_dir)
+  util.run([kfctl_path, "generate", "-V", "all"], env=env, cwd=app_dir,
+           max_output_lines=util.ERROR_OUTPUT_LINES)
 
-  util.run([kfctl_path, "apply", "-V", "all"], env=env, cwd=app_dir)
+  util.run([kfctl_path, "apply", "-V", "all"], env=env, cwd=app_dir,
+           max_output_lines=util.ERROR_OUTPUT_LINES)
 
 def main(): # pylint: disable=too-many-locals,too-many-statements
   logging.basicConfig(level=logging.INFO,
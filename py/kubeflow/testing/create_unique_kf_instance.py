@@ -257,9 +257,11 @@ def deploy_with_kfctl_go(kfctl_path, args, app_dir, env, labels=None): # pylint:
     util.run([kfctl_path, "init", app_dir, "-V", "--config=" + config_file],
              env=env)
 
-    util.run([kfctl_path, "generate", "-V", "all"], env=env, cwd=app_dir)
+    util.run([kfctl_path, "generate", "-V", "all"], env=env, cwd=app_dir,
+             max_output_lines=util.ERROR_OUTPUT_LINES)
 
-    util.run([kfctl_path, "apply", "-V", "all"], env=env, cwd=app_dir)
+    util.run([kfctl_path, "apply", "-V", "all"], env=env, cwd=app_dir,
+             max_output_lines=util.ERROR_OUTPUT_LINES)
   else:
     logging.info("Deploying using v07 syntax")
 
@@ -272,7 +274,8 @@ def deploy_with_kfctl_go(kfctl_path, args, app_dir, env, labels=None): # pylint:
       logging.info("Writing file %s", config_file)
       yaml.dump(config_spec, hf)
 
-    util.run([kfctl_path, "apply", "-V", "-f", config_file], env=env)
+    util.run([kfctl_path, "apply", "-V", "-f", config_file], env=env,
+             max_output_lines=util.ERROR_OUTPUT_LINES)
 
   # We will hit lets encrypt rate limiting with the managed certificates
   # So create a self signed certificate and update the ingress to use it.
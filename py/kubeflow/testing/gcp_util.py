@@ -1,8 +1,12 @@
 import logging
 import re
+import threading
+
+import httplib2
 import retrying
 
 from googleapiclient import discovery
+from googleapiclient import http as googleapiclient_http
 from oauth2client.client import GoogleCredentials
 
 ZONE_PATTERN = re.compile("[^-]+-[^-]+-[^-]")
@@ -37,10 +41,63 @@ def get_gcp_credentials():
   logging.info("Successfully obtain GCP default credentials")
   return credentials
 
+_thread_local = threading.local()
+
+def thread_http(credentials):
+  """Return an authorized http object owned by the calling thread.
+
+  httplib2.Http isn't thread safe so threads can't share an http object.
+  Each thread reuses its own object and thus its connections.
+  """
+  if getattr(_thread_local, "credentials", None) is not credentials:
+    _thread_local.credentials = credentials
+    _thread_local.http = credentials.authorize(httplib2.Http())
+  return _thread_local.http
+
+_clients_lock = threading.Lock()
+_clients = {}
+_credentials = []
+
+def get_credentials():
+  """Return the GCP default credentials shared by the clients."""
+  with _clients_lock:
+    if not _credentials:
+      _credentials.append(get_gcp_credentials())
+    return _credentials[0]
+
+def get_client(service, version):
+  """Return a discovery client shared by all the threads of the process.
+
+  Building a client parses its discovery document, which is fetched unless
+  the client library bundles it. Clients are built once per (service,
+  version) instead.
+
+  The requests of the client are sent through an http object owned by the
+  thread building them (see thread_http), so threads can share the client.
+
+  Args:
+    service: The name of the API e.g. "compute".
+    version: The version of the API e.g. "v1".
+  """
+  credentials = get_credentials()
+
+  def _build_request(_, *args, **kwargs):
+    return googleapiclient_http.HttpRequest(thread_http(credentials), *args,
+                                            **kwargs)
+
+  key = (service, version)
+  with _clients_lock:
+    if key not in _clients:
+      logging.info("Building client for %s %s", service, version)
+      _clients[key] = discovery.build(service, version,
+                                      http=thread_http(credentials),
+                                      requestBuilder=_build_request,
+                                      cache_discovery=False)
+    return _clients[key]
+
 def deployments_iterator(project):
   """Iterate over all deployments"""
-  credentials = GoogleCredentials.get_application_default()
-  dm = discovery.build("deploymentmanager", "v2", credentials=credentials)
+  dm = get_client("deploymentmanager", "v2")
 
   deployments_client = dm.deployments()
 
@@ -60,9 +117,7 @@ def deployments_iterator(project):
 
 
 def url_maps_iterator(project):
-
-  credentials = GoogleCredentials.get_application_default()
-  compute = discovery.build('compute', 'v1', credentials=credentials)
+  compute = get_client('compute', 'v1')
   urlMaps = compute.urlMaps()
 
   next_page_token = None
@@ -1,5 +1,8 @@
 
 import logging
+import threading
+
+import httplib2
 import pytest
 
 from kubeflow.testing import gcp_util
@@ -8,6 +11,44 @@ def test_location():
   assert gcp_util.location_to_type("us-central1-f") == gcp_util.ZONE_LOCATION
   assert gcp_util.location_to_type("us-central1") == gcp_util.REGION_LOCATION
 
+class FakeCredentials:
+  def __init__(self):
+    self.authorized = []
+
+  def authorize(self, http):
+    self.authorized.append(http)
+    return http
+
+def test_get_client(monkeypatch):
+  credentials = FakeCredentials()
+  monkeypatch.setattr(gcp_util, "get_gcp_credentials", lambda: credentials)
+  monkeypatch.setattr(gcp_util, "_credentials", [])
+  monkeypatch.setattr(gcp_util, "_clients", {})
+
+  builds = []
+  def build(service, version, **kwargs):
+    builds.append((service, version))
+    return kwargs["requestBuilder"]
+
+  monkeypatch.setattr(gcp_util.discovery, "build", build)
+
+  build_request = gcp_util.get_client("compute", "v1")
+  assert gcp_util.get_client("compute", "v1") is build_request
+  assert builds == [("compute", "v1")]
+
+  # Requests use an http object owned by the thread building them.
+  args = (None, "https://compute/list", "GET")
+  http = build_request(None, *args).http
+  assert build_request(None, *args).http is http
+
+  other = []
+  thread = threading.Thread(
+    target=lambda: other.append(build_request(None, *args).http))
+  thread.start()
+  thread.join()
+  assert other[0] is not http
+  assert all(isinstance(h, httplib2.Http) for h in credentials.authorized)
+
 if __name__ == "__main__":
   logging.basicConfig(
       level=logging.INFO,
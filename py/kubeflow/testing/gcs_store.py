@@ -0,0 +1,168 @@
+"""Process wide access to GCS objects.
+
+util.upload_to_gcs and friends used to create a storage.Client and fetch the
+bucket's metadata with get_bucket on every call. GcsStore creates the client
+once and hands out bucket handles without fetching their metadata; an
+unknown bucket surfaces as an error on the first request instead.
+
+The store is accessed through get_store so tests and benchmarks can swap in
+a LocalStore backed by a local directory with set_store.
+"""
+from concurrent import futures
+import logging
+import os
+import threading
+
+# Default number of objects to upload concurrently in write_many.
+DEFAULT_MAX_WORKERS = 16
+
+class GcsStore:
+  """Read and write GCS objects through a shared client.
+
+  The client and bucket handles are created on first use and shared by all
+  threads.
+  """
+
+  def __init__(self, client=None):
+    self._client = client
+    self._lock = threading.Lock()
+    self._buckets = {}
+
+  @property
+  def client(self):
+    with self._lock:
+      if self._client is None:
+        # Imported here so the module can be imported without the GCS
+        # libraries; e.g. when running on AWS.
+        from google.cloud import storage  # pylint: disable=no-name-in-module,import-outside-toplevel
+        self._client = storage.Client()
+      return self._client
+
+  def bucket(self, bucket_name):
+    """Return a handle for a bucket without fetching its metadata."""
+    client = self.client
+    with self._lock:
+      if bucket_name not in self._buckets:
+        self._buckets[bucket_name] = client.bucket(bucket_name)
+      return self._buckets[bucket_name]
+
+  def write(self, bucket_name, name, contents):
+    self.bucket(bucket_name).blob(name).upload_from_string(contents)
+
+  def upload_file(self, source, bucket_name, name):
+    self.bucket(bucket_name).blob(name).upload_from_filename(source)
+
+  def read(self, bucket_name, name, start=None, end=None):
+    """Read an object; start and end select an inclusive byte range."""
+    blob = self.bucket(bucket_name).blob(name)
+    if start is None and end is None:
+      return blob.download_as_string()
+    return blob.download_as_string(start=start, end=end)
+
+  def list_names(self, bucket_name, prefix):
+    """Return the names of the objects starting with prefix."""
+    return [b.name for b in self.bucket(bucket_name).list_blobs(prefix=prefix)]
+
+class LocalStore:
+  """Stand in for GCS backed by a local directory.
+
+  The object gs://bucket/name is stored at root_dir/bucket/name.
+  """
+
+  def __init__(self, root_dir):
+    self.root_dir = root_dir
+
+  def _path(self, bucket_name, name):
+    path = os.path.join(self.root_dir, bucket_name, name)
+    parent = os.path.dirname(path)
+    if not os.path.exists(parent):
+      os.makedirs(parent, exist_ok=True)
+    return path
+
+  def write(self, bucket_name, name, contents):
+    if isinstance(contents, str):
+      contents = contents.encode()
+    with open(self._path(bucket_name, name), "wb") as hf:
+      hf.write(contents)
+
+  def upload_file(self, source, bucket_name, name):
+    with open(source, "rb") as hf:
+      self.write(bucket_name, name, hf.read())
+
+  def read(self, bucket_name, name, start=None, end=None):
+    with open(os.path.join(self.root_dir, bucket_name, name), "rb") as hf:
+      if start is None and end is None:
+        return hf.read()
+      start = start or 0
+      hf.seek(start)
+      if end is None:
+        return hf.read()
+      return hf.read(end - start + 1)
+
+  def list_names(self, bucket_name, prefix):
+    bucket_dir = os.path.join(self.root_dir, bucket_name)
+    names = []
+    for dirpath, _, files in os.walk(bucket_dir):
+      for f in files:
+        name = os.path.relpath(os.path.join(dirpath, f), bucket_dir)
+        if name.startswith(prefix):
+          names.append(name)
+    return sorted(names)
+
+def write_many(store, objects, max_workers=DEFAULT_MAX_WORKERS):
+  """Write several objects concurrently.
+
+  All the writes are attempted even if some of them fail.
+
+  Args:
+    store: The store to write to.
+    objects: Iterable of (bucket_name, name, contents) tuples.
+    max_workers: Max number of objects to write at the same time.
+
+  Raises:
+    Exception: The error of the first write that failed.
+  """
+  objects = list(objects)
+  if not objects:
+    return
+
+  with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+    pending = [(bucket_name, name,
+                executor.submit(store.write, bucket_name, name, contents))
+               for bucket_name, name, contents in objects]
+
+  errors = []
+  for bucket_name, name, f in pending:
+    e = f.exception()
+    if e:
+      logging.error("Error writing gs://%s/%s; %s", bucket_name, name, e)
+      errors.append(e)
+  if errors:
+    raise errors[0]
+
+# The GcsStore of the process; its client is shared even if the store
+# returned by get_store is replaced.
+_gcs_store = GcsStore()
+
+_store_lock = threading.Lock()
+_store = [_gcs_store]
+
+def get_client():
+  """Return the storage.Client shared by the process."""
+  return _gcs_store.client
+
+def get_store():
+  """Return the store shared by the process; a GcsStore by default."""
+  with _store_lock:
+    return _store[0]
+
+def set_store(store):
+  """Replace the store shared by the process.
+
+  Returns:
+    previous: The store that was replaced.
+  """
+  with _store_lock:
+    previous = _store[0]
+    _store[0] = store
+  return previous
@@ -0,0 +1,89 @@
+import logging
+import os
+
+from kubeflow.testing import gcs_store
+from kubeflow.testing import util
+
+import pytest
+
+class FakeBlob:
+  def __init__(self, objects, name):
+    self._objects = objects
+    self._name = name
+
+  def upload_from_string(self, contents):
+    if self._name.startswith("fail"):
+      raise ValueError("upload failed")
+    self._objects[self._name] = contents
+
+  def download_as_string(self):
+    return self._objects[self._name]
+
+class FakeBucket:
+  def __init__(self):
+    self.objects = {}
+
+  def blob(self, name):
+    return FakeBlob(self.objects, name)
+
+class FakeClient:
+  def __init__(self):
+    self.buckets = []
+
+  def bucket(self, name):
+    self.buckets.append(name)
+    return FakeBucket()
+
+def test_gcs_store_reuses_buckets():
+  client = FakeClient()
+  store = gcs_store.GcsStore(client)
+
+  store.write("bucket", "a", "1")
+  store.write("bucket", "b", "2")
+  assert store.read("bucket", "a") == "1"
+  assert client.buckets == ["bucket"]
+
+def test_write_many():
+  store = gcs_store.GcsStore(FakeClient())
+  gcs_store.write_many(store, [("bucket", str(i), str(i)) for i in range(20)])
+  assert store.bucket("bucket").objects == dict(
+    (str(i), str(i)) for i in range(20))
+
+def test_write_many_error():
+  store = gcs_store.GcsStore(FakeClient())
+  with pytest.raises(ValueError):
+    gcs_store.write_many(store, [("bucket", "fail", "1"),
+                                 ("bucket", "ok", "2")])
+  # Writes after the failure still happen.
+  assert store.bucket("bucket").objects == {"ok": "2"}
+
+def test_util_with_local_store(tmpdir):
+  root_dir = str(tmpdir.join("gcs"))
+  previous = gcs_store.set_store(gcs_store.LocalStore(root_dir))
+  try:
+    util.upload_to_gcs("hello", "gs://bucket/some/dir/hello.txt")
+    assert os.path.exists(os.path.join(root_dir, "bucket", "some", "dir",
+                                       "hello.txt"))
+    assert util.read_file("gs://bucket/some/dir/hello.txt") == b"hello"
+
+    store = gcs_store.get_store()
+    assert store.read("bucket", "some/dir/hello.txt", start=1, end=3) == b"ell"
+    assert store.list_names("bucket", "some/") == ["some/dir/hello.txt"]
+
+    source = str(tmpdir.join("source.txt"))
+    with open(source, "w") as hf:
+      hf.write("source")
+    util.upload_file_to_gcs(source, "gs://bucket/source.txt")
+    assert util.read_file("gs://bucket/source.txt") == b"source"
+    assert util.read_file(source) == "source"
+  finally:
+    gcs_store.set_store(previous)
+
+if __name__ == "__main__":
+  logging.basicConfig(level=logging.INFO,
+                      format=('%(levelname)s|%(asctime)s'
+                              '|%(pathname)s|%(lineno)d| %(message)s'),
+                      datefmt='%Y-%m-%dT%H:%M:%S',
+                      )
+  logging.getLogger().setLevel(logging.INFO)
+  pytest.main()
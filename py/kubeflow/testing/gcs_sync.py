@@ -0,0 +1,141 @@
+"""Sync a local directory to GCS in process.
+
+This replaces shelling out to `gsutil -m rsync -r`. Files are uploaded
+concurrently with a thread pool and files whose MD5 matches the object
+already in GCS are skipped. Large files are uploaded with chunked resumable
+uploads so a transient error only retries the failed chunk.
+
+The storage is accessed through a backend so a local directory can stand in
+for GCS in tests.
+"""
+import base64
+import collections
+from concurrent import futures
+import hashlib
+import logging
+import os
+import shutil
+import time
+
+from kubeflow.testing import gcs_store
+from kubeflow.testing import util
+
+# Default number of files to upload concurrently.
+DEFAULT_MAX_WORKERS = 16
+
+# Files larger than this are uploaded with chunked resumable uploads.
+RESUMABLE_THRESHOLD_BYTES = 32 * 1024 * 1024
+
+# Chunk size for resumable uploads; must be a multiple of 256 KB.
+RESUMABLE_CHUNK_SIZE = 8 * 1024 * 1024
+
+# An entry in the manifest returned by sync_dir.
+UPLOAD_RESULT = collections.namedtuple(
+  "UPLOAD_RESULT", ("source", "target", "num_bytes", "seconds", "skipped"))
+
+def file_md5(path):
+  """Return the base64 encoded MD5 of a file; the format used by GCS."""
+  md5 = hashlib.md5()
+  with open(path, "rb") as hf:
+    for chunk in iter(lambda: hf.read(1024 * 1024), b""):
+      md5.update(chunk)
+  return base64.b64encode(md5.digest()).decode()
+
+class GcsBackend:
+  """Read and write objects in GCS."""
+
+  def __init__(self, client=None):
+    self._client = client or gcs_store.get_client()
+
+  def list_md5s(self, bucket_name, prefix):
+    """Return a dictionary mapping object names under prefix to their MD5."""
+    return dict((b.name, b.md5_hash) for b in
+                self._client.list_blobs(bucket_name, prefix=prefix))
+
+  def upload(self, source, bucket_name, name):
+    blob = self._client.bucket(bucket_name).blob(name)
+    if os.path.getsize(source) > RESUMABLE_THRESHOLD_BYTES:
+      blob.chunk_size = RESUMABLE_CHUNK_SIZE
+    blob.upload_from_filename(source)
+
+class LocalBackend:
+  """Stand in for GCS backed by a local directory.
+
+  The object gs://bucket/name is stored at root_dir/bucket/name.
+  """
+
+  def __init__(self, root_dir):
+    self.root_dir = root_dir
+
+  def list_md5s(self, bucket_name, prefix):
+    bucket_dir = os.path.join(self.root_dir, bucket_name)
+    md5s = {}
+    for dirpath, _, files in os.walk(bucket_dir):
+      for filename in files:
+        path = os.path.join(dirpath, filename)
+        name = os.path.relpath(path, bucket_dir).replace(os.sep, "/")
+        if name.startswith(prefix):
+          md5s[name] = file_md5(path)
+    return md5s
+
+  def upload(self, source, bucket_name, name):
+    target = os.path.join(self.root_dir, bucket_name, name)
+    util.makedirs(os.path.dirname(target))
+    shutil.copyfile(source, target)
+
+def _upload(backend, source, bucket_name, name, remote_md5):
+  start = time.time()
+  num_bytes = os.path.getsize(source)
+  skipped = remote_md5 is not None and remote_md5 == file_md5(source)
+  if not skipped:
+    backend.upload(source, bucket_name, name)
+  return UPLOAD_RESULT(source, util.to_gcs_uri(bucket_name, name), num_bytes,
+                       time.time() - start, skipped)
+
+def sync_dir(source_dir, target, backend=None,
+             max_workers=DEFAULT_MAX_WORKERS):
+  """Recursively upload a directory to GCS.
+
+  Like `gsutil rsync -r` objects in GCS that don't exist locally are not
+  deleted.
+
+  Args:
+    source_dir: Local directory to upload.
+    target: GCS URI to upload to.
+    backend: (Optional) Storage backend; defaults to GcsBackend.
+    max_workers: Max number of files to upload concurrently.
+
+  Returns:
+    manifest: List of UPLOAD_RESULT; one for each file in source_dir.
+  """
+  backend = backend or GcsBackend()
+  bucket_name, prefix = util.split_gcs_uri(target)
+  prefix = prefix.rstrip("/")
+  if prefix:
+    prefix += "/"
+
+  start = time.time()
+  remote_md5s = backend.list_md5s(bucket_name, prefix)
+
+  manifest = []
+  with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+    pending = []
+    for dirpath, _, files in os.walk(source_dir):
+      for filename in files:
+        source = os.path.join(dirpath, filename)
+        name = prefix + os.path.relpath(source, source_dir).replace(os.sep,
+                                                                    "/")
+        pending.append(executor.submit(_upload, backend, source, bucket_name,
+                                       name, remote_md5s.get(name)))
+
+    for f in futures.as_completed(pending):
+      manifest.append(f.result())
+
+  manifest.sort(key=lambda r: r.target)
+  uploaded = [r for r in manifest if not r.skipped]
+  logging.info("Synced %s to %s in %.1f seconds; uploaded %s files (%s bytes) "
+               "and skipped %s unchanged files", source_dir, target,
+               time.time() - start, len(uploaded),
+               sum(r.num_bytes for r in uploaded),
+               len(manifest) - len(uploaded))
+  return manifest
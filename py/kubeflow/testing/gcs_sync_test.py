@@ -0,0 +1,48 @@
+import logging
+import os
+
+import pytest
+
+from kubeflow.testing import gcs_sync
+
+def _write(path, contents):
+  os.makedirs(os.path.dirname(path), exist_ok=True)
+  with open(path, "w") as hf:
+    hf.write(contents)
+
+def test_sync_dir(tmpdir):
+  source_dir = os.path.join(str(tmpdir), "artifacts")
+  root_dir = os.path.join(str(tmpdir), "gcs")
+  _write(os.path.join(source_dir, "junit_a.xml"), "a")
+  _write(os.path.join(source_dir, "logs", "b.log"), "bb")
+
+  backend = gcs_sync.LocalBackend(root_dir)
+  manifest = gcs_sync.sync_dir(source_dir, "gs://some-bucket/some/dir",
+                               backend=backend)
+
+  assert [(r.target, r.num_bytes, r.skipped) for r in manifest] == [
+    ("gs://some-bucket/some/dir/junit_a.xml", 1, False),
+    ("gs://some-bucket/some/dir/logs/b.log", 2, False),
+  ]
+  with open(os.path.join(root_dir, "some-bucket", "some", "dir", "logs",
+                         "b.log")) as hf:
+    assert hf.read() == "bb"
+
+  # Only the modified file is uploaded again.
+  _write(os.path.join(source_dir, "logs", "b.log"), "ccc")
+  manifest = gcs_sync.sync_dir(source_dir, "gs://some-bucket/some/dir/",
+                               backend=backend)
+  assert [(r.target, r.num_bytes, r.skipped) for r in manifest] == [
+    ("gs://some-bucket/some/dir/junit_a.xml", 1, True),
+    ("gs://some-bucket/some/dir/logs/b.log", 3, False),
+  ]
+
+if __name__ == "__main__":
+  logging.basicConfig(
+      level=logging.INFO,
+      format=('%(levelname)s|%(asctime)s'
+            '|%(pathname)s|%(lineno)d| %(message)s'),
+    datefmt='%Y-%m-%dT%H:%M:%S',
+    )
+  logging.getLogger().setLevel(logging.INFO)
+  pytest.main()
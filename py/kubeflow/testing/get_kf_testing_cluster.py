@@ -23,8 +23,8 @@ import yaml
 
 import fire
 from googleapiclient import discovery
+from kubeflow.testing import gcp_util
 from kubeflow.testing import util
-from oauth2client.client import GoogleCredentials
 from retrying import retry
 
 # Default pattern to match auto deployed clusters from master
@@ -71,8 +71,7 @@ def list_deployments(project, name_pattern, testing_label, http=None,
     # This should only be used in testing.
     dm = discovery.build("deploymentmanager", "v2", http=http)
   else:
-    credentials = GoogleCredentials.get_application_default()
-    dm = discovery.build("deploymentmanager", "v2", credentials=credentials)
+    dm = gcp_util.get_client("deploymentmanager", "v2")
   dm_client = dm.deployments()
   resource_client = dm.resources()
 
@@ -141,9 +140,7 @@ ZONE_PATTERN = re.compile("([^-]+)-([^-]+)-([^-]+)")
 
 def _iter_cluster(project, location):
   """Iterate over all clusters in the given location"""
-  credentials = GoogleCredentials.get_application_default()
-
-  gke = discovery.build("container", "v1", credentials=credentials)
+  gke = gcp_util.get_client("container", "v1")
 
   clusters_client = gke.projects().locations().clusters()
 
@@ -0,0 +1,122 @@
+"""A cache of bare git mirrors shared by the clones of a repository.
+
+Cloning a repository from GitHub every time a job or reconciler needs it
+downloads the whole history again. MirrorCache keeps a bare mirror of each
+repository, keyed by URL. Clones are made with --reference to the mirror,
+so they borrow its objects and only fetch what the mirror doesn't have yet.
+Clones that may outlive the mirror or be used from another machine should
+pass dissociate=True to copy the borrowed objects.
+
+The mirrors are stored in $KF_GIT_MIRROR_DIR; point it at a volume shared by
+the pods on a node to share them across jobs.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+
+import filelock
+
+from kubeflow.testing import subprocess_util
+
+MIRROR_DIR_ENV = "KF_GIT_MIRROR_DIR"
+DEFAULT_MIRROR_DIR = os.path.join(os.path.expanduser("~"), ".cache",
+                                  "kf-git-mirrors")
+
+# How long to wait for another process creating or updating a mirror.
+LOCK_TIMEOUT_SECONDS = 30 * 60
+
+def _run(command, cwd=None):
+  return subprocess_util.run_many([command], cwd=cwd)[0]
+
+def last_commit(repo_dir, branch, path=None):
+  """Get the last commit of a change to the source.
+
+  The branch is not checked out.
+
+  Args:
+    repo_dir: Directory of the repository.
+    branch: The branch e.g. origin/master
+    path: (Optional) The path relative to the root of the repository; if
+      none or empty the last commit of the branch is returned.
+
+  Returns:
+    commit: The short hash of the commit.
+  """
+  command = ["git", "log", "-n", "1", "--pretty=format:%h", branch]
+  if path:
+    command.extend(["--", path])
+  return _run(command, cwd=repo_dir).strip()
+
+class MirrorCache(object):
+  """Bare mirrors of git repositories keyed by URL."""
+
+  def __init__(self, cache_dir=None):
+    """Create the cache.
+
+    Args:
+      cache_dir: (Optional) Directory containing the mirrors; defaults to
+        $KF_GIT_MIRROR_DIR or ~/.cache/kf-git-mirrors.
+    """
+    self.cache_dir = (cache_dir or os.getenv(MIRROR_DIR_ENV) or
+                      DEFAULT_MIRROR_DIR)
+
+  def mirror_dir(self, url):
+    """Return the directory of the mirror of url."""
+    # A readable name plus a hash of the URL so URLs never collide.
+    name = re.sub(r"[^A-Za-z0-9._-]+", "_", url.rstrip("/"))[-64:]
+    digest = hashlib.sha256(url.encode()).hexdigest()[:12]
+    return os.path.join(self.cache_dir, "{0}-{1}".format(name, digest))
+
+  def update(self, url):
+    """Create or update the mirror of url.
+
+    Returns:
+      mirror_dir: The directory of the mirror.
+    """
+    mirror_dir = self.mirror_dir(url)
+    if not os.path.exists(self.cache_dir):
+      os.makedirs(self.cache_dir)
+
+    with filelock.FileLock(mirror_dir + ".lock",
+                           timeout=LOCK_TIMEOUT_SECONDS):
+      if os.path.exists(mirror_dir):
+        logging.info("Updating git mirror %s of %s", mirror_dir, url)
+        _run(["git", "fetch", "--prune", "--tags", "origin"], cwd=mirror_dir)
+        return mirror_dir
+
+      logging.info("Creating git mirror %s of %s", mirror_dir, url)
+      tmp_dir = mirror_dir + ".tmp"
+      if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+      _run(["git", "clone", "--bare", url, tmp_dir])
+      # Only mirror branches and tags; GitHub also has a ref for every PR.
+      _run(["git", "config", "remote.origin.fetch",
+            "+refs/heads/*:refs/heads/*"], cwd=tmp_dir)
+      # Clones borrow objects from the mirror so they must never be pruned.
+      _run(["git", "config", "gc.pruneExpire", "never"], cwd=tmp_dir)
+      os.rename(tmp_dir, mirror_dir)
+    return mirror_dir
+
+  def clone(self, url, dest, dissociate=False):
+    """Clone url to dest borrowing objects from the mirror of url.
+
+    The clone's origin is url so fetching works as for any other clone.
+
+    Args:
+      url: The URL of the repository.
+      dest: The directory to clone to.
+      dissociate: If true the clone copies the objects it borrowed from the
+        mirror so it keeps working without it; e.g. when it is used from
+        another pod. Otherwise the clone breaks if the mirror is deleted.
+    """
+    mirror_dir = self.update(url)
+    parent_dir = os.path.dirname(os.path.abspath(dest))
+    if not os.path.exists(parent_dir):
+      os.makedirs(parent_dir)
+    command = ["git", "clone", "--reference", mirror_dir]
+    if dissociate:
+      command.append("--dissociate")
+    _run(command + [url, dest])
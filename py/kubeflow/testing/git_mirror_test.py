@@ -0,0 +1,89 @@
+import logging
+import os
+import shutil
+import subprocess
+
+from kubeflow.testing import git_mirror
+
+import pytest
+
+def _git(args, cwd):
+  return subprocess.check_output(["git"] + args, cwd=cwd).decode().strip()
+
+def _commit(repo_dir, name):
+  with open(os.path.join(repo_dir, name), "w") as hf:
+    hf.write(name)
+  _git(["add", name], repo_dir)
+  _git(["commit", "-q", "-m", name], repo_dir)
+  return _git(["rev-parse", "HEAD"], repo_dir)
+
+@pytest.fixture(name="upstream")
+def fixture_upstream(tmpdir):
+  repo_dir = str(tmpdir.join("upstream"))
+  os.makedirs(repo_dir)
+  _git(["init", "-q"], repo_dir)
+  _git(["config", "user.email", "test@example.com"], repo_dir)
+  _git(["config", "user.name", "test"], repo_dir)
+  _commit(repo_dir, "a")
+  return repo_dir
+
+def test_mirror_dir():
+  cache = git_mirror.MirrorCache("/cache")
+  a = cache.mirror_dir("https://github.com/kubeflow/testing.git")
+  b = cache.mirror_dir("https://github.com/kubeflow/testing")
+
+  assert a.startswith("/cache/https_github.com_kubeflow_testing.git-")
+  assert a != b
+
+def test_clone_uses_mirror(tmpdir, upstream):
+  cache = git_mirror.MirrorCache(str(tmpdir.join("mirrors")))
+  url = "file://" + upstream
+
+  dest = str(tmpdir.join("clones", "first"))
+  cache.clone(url, dest)
+  mirror_dir = cache.mirror_dir(url)
+
+  alternates = os.path.join(dest, ".git", "objects", "info", "alternates")
+  with open(alternates) as hf:
+    assert hf.read().strip() == os.path.join(mirror_dir, "objects")
+  assert _git(["config", "remote.origin.url"], dest) == url
+
+  # A second clone updates the mirror with the new commits.
+  sha = _commit(upstream, "b")
+  dest = str(tmpdir.join("clones", "second"))
+  cache.clone(url, dest)
+  assert _git(["rev-parse", "HEAD"], dest) == sha
+  assert _git(["cat-file", "-t", sha], mirror_dir) == "commit"
+
+def test_clone_dissociate(tmpdir, upstream):
+  cache = git_mirror.MirrorCache(str(tmpdir.join("mirrors")))
+  url = "file://" + upstream
+
+  dest = str(tmpdir.join("clones", "first"))
+  cache.clone(url, dest, dissociate=True)
+  sha = _git(["rev-parse", "HEAD"], dest)
+
+  # The clone keeps working after the mirror is deleted.
+  shutil.rmtree(cache.mirror_dir(url))
+  assert not os.path.exists(
+    os.path.join(dest, ".git", "objects", "info", "alternates"))
+  assert _git(["cat-file", "-t", sha], dest) == "commit"
+
+def test_last_commit(upstream):
+  first = _commit(upstream, "b")
+  second = _commit(upstream, "c")
+  branch = _git(["rev-parse", "--abbrev-ref", "HEAD"], upstream)
+  _git(["checkout", "-q", "-b", "other", "HEAD~2"], upstream)
+
+  assert git_mirror.last_commit(upstream, branch, "b") == first[:7]
+  assert git_mirror.last_commit(upstream, branch, "") == second[:7]
+  assert _git(["rev-parse", "--abbrev-ref", "HEAD"], upstream) == "other"
+
+if __name__ == "__main__":
+  logging.basicConfig(level=logging.INFO,
+                      format=('%(levelname)s|%(asctime)s'
+                              '|%(pathname)s|%(lineno)d| %(message)s'),
+                      datefmt='%Y-%m-%dT%H:%M:%S',
+                      )
+  logging.getLogger().setLevel(logging.INFO)
+  pytest.main()
@@ -6,6 +6,7 @@ import os
 import re
 import tempfile
 
+from kubeflow.testing import git_mirror
 from kubeflow.testing import util
 
 GIT_URL_RE = re.compile(r"([^:]*):([^/]*)/([^\.]*)\.git")
@@ -23,7 +24,8 @@ def parse_git_url(url):
 class GitRepoManager:
   """Manage a clone of a repository."""
 
-  def __init__(self, url=None, local_dir=None, remote_name="origin"):
+  def __init__(self, url=None, local_dir=None, remote_name="origin",
+               mirror_cache=None):
     """Initialize the GitRepoManager.
 
     Args:
@@ -32,6 +34,8 @@ class GitRepoManager:
         specified a temporay directory is used. If the directory
         exists it should already be a clone of the repo (we currently don't
         check)
+      mirror_cache: (Optional) git_mirror.MirrorCache to clone from; defaults
+        to the cache in $KF_GIT_MIRROR_DIR.
     """
 
     self.url = url
@@ -45,6 +49,7 @@ class GitRepoManager:
       self.local_dir = os.path.join(self.local_dir, name.owner, name.repo)
 
     self.remote_name = remote_name
+    self.mirror_cache = mirror_cache or git_mirror.MirrorCache()
 
   def _run_git(self, *args):
     """Run a subprocess command inside the repo directory."""
@@ -62,26 +67,18 @@ class GitRepoManager:
 
     if not os.path.exists(self.local_dir):
       logging.info(f"Clone {self.url}")
-      util.run(["git", "clone", self.url, self.local_dir])
+      self.mirror_cache.clone(self.url, self.local_dir)
 
     self._run_git(["git", "fetch", self.remote_name])
 
   def last_commit(self, branch, path):
     """Get the last commit of a change to the source.
 
+    The branch is not checked out.
+
     Args:
       branch: The branch in the form {remote_name}/{branch}
 
       path: The relative path
     """
-
-    self._run_git(["git", "checkout", branch])
-
-    command = ["git", "log", "-n", "1", "--pretty=format:\"%h\""]
-
-    if path:
-      command.append(path)
-
-    output = self._run_git(command)
-
-    return output.strip('"')
+    return git_mirror.last_commit(self.local_dir, branch, path)
@@ -1,14 +1,50 @@
 import logging
+import os
+import subprocess
 
-from kubeflow.testing import github_repo_manager # pylint: disable=no-name-in-module
+from kubeflow.testing import git_mirror
+from kubeflow.testing import git_repo_manager
 
 import pytest
 
 def test_parse_git_url():
-  result = github_repo_manager._parse_git_url("git@github.com:kubeflow/manifests.git") # pylint: disable=protected-access
+  result = git_repo_manager.parse_git_url("git@github.com:kubeflow/manifests.git")
+
+  assert result == git_repo_manager.GIT_TUPLE("git@github.com", "kubeflow",
+                                              "manifests")
+
+def _git(args, cwd):
+  return subprocess.check_output(["git"] + args, cwd=cwd).decode().strip()
+
+def test_fetch_and_last_commit(tmpdir):
+  upstream = str(tmpdir.join("upstream"))
+  os.makedirs(upstream)
+  _git(["init", "-q"], upstream)
+  _git(["config", "user.email", "test@example.com"], upstream)
+  _git(["config", "user.name", "test"], upstream)
+  for name in ["a", "b"]:
+    with open(os.path.join(upstream, name), "w") as hf:
+      hf.write(name)
+    _git(["add", name], upstream)
+    _git(["commit", "-q", "-m", name], upstream)
+  branch = _git(["rev-parse", "--abbrev-ref", "HEAD"], upstream)
+
+  cache = git_mirror.MirrorCache(str(tmpdir.join("mirrors")))
+  local_dir = str(tmpdir.join("clone", "repo"))
+  manager = git_repo_manager.GitRepoManager(url="file://" + upstream,
+                                            local_dir=local_dir,
+                                            mirror_cache=cache)
+  manager.fetch()
+
+  assert os.path.exists(cache.mirror_dir(manager.url))
+  full_branch = "origin/" + branch
+  assert (manager.last_commit(full_branch, "a") ==
+          _git(["log", "-n", "1", "--pretty=format:%h", "HEAD~1"], upstream))
+  assert (manager.last_commit(full_branch, "") ==
+          _git(["log", "-n", "1", "--pretty=format:%h", "HEAD"], upstream))
+  # last_commit doesn't check out the branch.
+  assert _git(["status", "--porcelain"], local_dir) == ""
 
-  assert result == github_repo_manager.GIT_TUPLE("git@github.com", "kubeflow",
-                                                 "manifests")
 if __name__ == "__main__":
   logging.basicConfig(level=logging.INFO,
                       format=('%(levelname)s|%(asctime)s'
@@ -0,0 +1,157 @@
+"""Aggregate junit files without loading them into memory.
+
+Test suites can produce junit files of 100MB or more. JunitAggregator parses
+them with iterparse and frees each testcase once it has been recorded, so
+only the results of the tests are kept in memory.
+"""
+
+import collections
+import json
+import logging
+import os
+import re
+from xml.etree import ElementTree
+
+JUNIT_PATTERN = re.compile(r"junit.*\.xml")
+
+# Maximum number of characters of a failure message to keep.
+MAX_MESSAGE_LENGTH = 1024
+
+PASSED = "passed"
+FAILURE = "failure"
+ERROR = "error"
+SKIPPED = "skipped"
+
+# The result of a single testcase.
+TEST_RESULT = collections.namedtuple(
+  "TEST_RESULT",
+  ("file", "suite", "classname", "name", "time", "status", "message"))
+
+def find_junit_files(artifacts_dir):
+  """Return the sorted paths of the junit files in artifacts_dir."""
+  paths = []
+  for dirpath, _, files in os.walk(artifacts_dir):
+    for filename in files:
+      if JUNIT_PATTERN.match(filename):
+        paths.append(os.path.join(dirpath, filename))
+  return sorted(paths)
+
+def _testcase_result(path, suite, testcase):
+  status = PASSED
+  message = ""
+  for child in testcase:
+    if child.tag in (FAILURE, ERROR, SKIPPED):
+      status = child.tag
+      message = child.attrib.get("message") or (child.text or "").strip()
+      break
+
+  return TEST_RESULT(path, suite, testcase.attrib.get("classname", ""),
+                     testcase.attrib.get("name", "unknown-test"),
+                     float(testcase.attrib.get("time", 0) or 0), status,
+                     message[:MAX_MESSAGE_LENGTH])
+
+class JunitAggregator(object):
+  """Sum the results of several junit files."""
+
+  def __init__(self):
+    self.results = []
+    self.num_files = 0
+    # Failures and errors reported by test suites without any testcases.
+    self._suite_counts = collections.Counter()
+
+  def add_file(self, path, name=None):
+    """Parse a junit file and record its results.
+
+    Args:
+      path: Path of the junit file.
+      name: (Optional) Name to record the results under; defaults to path.
+    """
+    name = name or path
+    self.num_files += 1
+    # Stack of the open elements so finished testcases can be removed from
+    # their parent.
+    stack = []
+    suites = []
+    for event, e in ElementTree.iterparse(path, events=("start", "end")):
+      if event == "start":
+        stack.append(e)
+        if e.tag == "testsuite":
+          suites.append([e.attrib.get("name", ""), 0])
+        continue
+
+      stack.pop()
+      if e.tag == "testcase":
+        suite = suites[-1][0] if suites else ""
+        if suites:
+          suites[-1][1] += 1
+        self.results.append(_testcase_result(name, suite, e))
+        if stack:
+          stack[-1].remove(e)
+      elif e.tag == "testsuite":
+        _, num_testcases = suites.pop()
+        if not num_testcases:
+          for k in (FAILURE, ERROR):
+            self._suite_counts[k] += int(e.attrib.get(k + "s", 0) or 0)
+        e.clear()
+
+  def count(self, status):
+    """Return the number of tests with the given status."""
+    num = sum(1 for r in self.results if r.status == status)
+    return num + self._suite_counts[status]
+
+  @property
+  def num_failed(self):
+    """The total number of failures and errors."""
+    return self.count(FAILURE) + self.count(ERROR)
+
+  def log_results(self):
+    for r in self.results:
+      if r.status in (FAILURE, ERROR):
+        logging.error("%s has %s: %s", r.name, r.status, r.message)
+      else:
+        logging.info("%s %s.", r.name, r.status)
+    logging.info("%s junit files; %s tests, %s failures, %s errors, %s "
+                 "skipped", self.num_files, len(self.results),
+                 self.count(FAILURE), self.count(ERROR), self.count(SKIPPED))
+
+  def write_junit(self, path, name="summary"):
+    """Write a single junit file with the results of all the files.
+
+    Each junit file becomes a testsuite.
+    """
+    root = ElementTree.Element("testsuites", {
+      "name": name,
+      "tests": str(len(self.results)),
+      "failures": str(self.count(FAILURE)),
+      "errors": str(self.count(ERROR)),
+      "skipped": str(self.count(SKIPPED)),
+    })
+
+    by_file = collections.OrderedDict()
+    for r in self.results:
+      by_file.setdefault(r.file, []).append(r)
+
+    for file_name, results in by_file.items():
+      suite = ElementTree.SubElement(root, "testsuite", {
+        "name": file_name,
+        "tests": str(len(results)),
+        "failures": str(sum(1 for r in results if r.status == FAILURE)),
+        "errors": str(sum(1 for r in results if r.status == ERROR)),
+        "time": "{0:.3f}".format(sum(r.time for r in results)),
+      })
+      for r in results:
+        testcase = ElementTree.SubElement(suite, "testcase", {
+          "classname": r.classname,
+          "name": r.name,
+          "time": "{0:.3f}".format(r.time),
+        })
+        if r.status != PASSED:
+          ElementTree.SubElement(testcase, r.status, {"message": r.message})
+
+    ElementTree.ElementTree(root).write(path, encoding="utf-8",
+                                        xml_declaration=True)
+
+  def write_index(self, path):
+    """Write a JSON file with one entry per test."""
+    with open(path, "w") as hf:
+      json.dump([r._asdict() for r in self.results], hf, indent=1)
@@ -0,0 +1,86 @@
+import json
+import logging
+import os
+from xml.etree import ElementTree
+
+import pytest
+
+from kubeflow.testing import junit_aggregator
+
+JUNIT_SUITE = """<?xml version="1.0" encoding="utf-8"?>
+<testsuite name="suite-a" tests="3" failures="1" errors="1">
+  <testcase classname="a" name="test_pass" time="1.5"/>
+  <testcase classname="a" name="test_fail" time="2">
+    <failure message="assert 1 == 2">Traceback</failure>
+  </testcase>
+  <testcase classname="a" name="test_error">
+    <error>boom</error>
+  </testcase>
+</testsuite>
+"""
+
+JUNIT_SUITES = """<testsuites failures="1">
+  <testsuite name="suite-b" failures="1">
+    <testcase classname="b" name="test_fail"><failure message="bad"/></testcase>
+    <testcase classname="b" name="test_skip"><skipped/></testcase>
+  </testsuite>
+  <testsuite name="suite-c" failures="2"/>
+</testsuites>
+"""
+
+def test_aggregate(tmpdir):
+  artifacts_dir = str(tmpdir)
+  os.makedirs(os.path.join(artifacts_dir, "nested"))
+  with open(os.path.join(artifacts_dir, "junit_a.xml"), "w") as hf:
+    hf.write(JUNIT_SUITE)
+  with open(os.path.join(artifacts_dir, "nested", "junit_b.xml"), "w") as hf:
+    hf.write(JUNIT_SUITES)
+  with open(os.path.join(artifacts_dir, "other.xml"), "w") as hf:
+    hf.write(JUNIT_SUITE)
+
+  paths = junit_aggregator.find_junit_files(artifacts_dir)
+  assert paths == [os.path.join(artifacts_dir, "junit_a.xml"),
+                   os.path.join(artifacts_dir, "nested", "junit_b.xml")]
+
+  aggregator = junit_aggregator.JunitAggregator()
+  for p in paths:
+    aggregator.add_file(p, os.path.relpath(p, artifacts_dir))
+
+  assert [(r.suite, r.name, r.status) for r in aggregator.results] == [
+    ("suite-a", "test_pass", "passed"),
+    ("suite-a", "test_fail", "failure"),
+    ("suite-a", "test_error", "error"),
+    ("suite-b", "test_fail", "failure"),
+    ("suite-b", "test_skip", "skipped"),
+  ]
+  assert aggregator.results[1].message == "assert 1 == 2"
+  assert aggregator.results[2].message == "boom"
+  # suite-c has no testcases so its failures attribute is used.
+  assert aggregator.count("failure") == 4
+  assert aggregator.num_failed == 5
+
+  junit_path = os.path.join(artifacts_dir, "summary.xml")
+  aggregator.write_junit(junit_path)
+  root = ElementTree.parse(junit_path).getroot()
+  assert root.attrib["tests"] == "5"
+  assert root.attrib["failures"] == "4"
+  assert [s.attrib["name"] for s in root] == ["junit_a.xml",
+                                               "nested/junit_b.xml"]
+
+  index_path = os.path.join(artifacts_dir, "summary.json")
+  aggregator.write_index(index_path)
+  with open(index_path) as hf:
+    index = json.load(hf)
+  assert index[0] == {"file": "junit_a.xml", "suite": "suite-a",
+                      "classname": "a", "name": "test_pass", "time": 1.5,
+                      "status": "passed", "message": ""}
+
+if __name__ == "__main__":
+  logging.basicConfig(
+      level=logging.INFO,
+      format=('%(levelname)s|%(asctime)s'
+            '|%(pathname)s|%(lineno)d| %(message)s'),
+    datefmt='%Y-%m-%dT%H:%M:%S',
+    )
+  logging.getLogger().setLevel(logging.INFO)
+  pytest.main()
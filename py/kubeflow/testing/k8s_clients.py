@@ -0,0 +1,221 @@
+"""Long lived K8s ApiClients shared by the code talking to a cluster.
+
+Every ApiClient has its own urllib3 connection pool, so creating a client
+per request means a new connection and TLS handshake per request. Code used
+to do that, and reload the kubeconfig on auth errors, to get a fresh GCP token
+(https://github.com/kubernetes-client/python-base/issues/59).
+
+ClientFactory instead keeps one ApiClient per cluster. It refreshes the
+client's credentials in a background thread before the token expires.
+COUNTERS keeps track of the requests, retries and token refreshes.
+
+get_cluster_api_client returns the client for a GKE cluster. Its
+credentials are written to a kubeconfig file of its own, so several clusters
+can be used at the same time. The current kubectl context isn't switched.
+"""
+
+import atexit
+import collections
+import datetime
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+from kubernetes import client as k8s_client
+from kubernetes.config import kube_config
+
+from kubeflow.testing import util
+
+# How often to reload the credentials. The kubernetes client refreshes GCP
+# tokens which expire within 5 minutes, so reloading more often than that
+# refreshes the token before it expires.
+REFRESH_INTERVAL = datetime.timedelta(minutes=4)
+
+class Counters(object):
+  """Thread safe counters."""
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._counts = collections.Counter()
+
+  def increment(self, name, value=1):
+    with self._lock:
+      self._counts[name] += value
+
+  def snapshot(self):
+    """Return a dictionary with the current value of the counters."""
+    with self._lock:
+      return dict(self._counts)
+
+# Counters for all the shared clients: "requests" made, "retries" of failed
+# requests and "refreshes" of GCP tokens.
+COUNTERS = Counters()
+
+class _CountingApiClient(k8s_client.ApiClient):
+  """ApiClient counting the requests it makes."""
+
+  def request(self, *args, **kwargs): # pylint: disable=arguments-differ
+    COUNTERS.increment("requests")
+    return super(_CountingApiClient, self).request(*args, **kwargs)
+
+def _get_google_credentials():
+  COUNTERS.increment("refreshes")
+  return util._refresh_credentials() # pylint: disable=protected-access
+
+class ClientFactory(object): # pylint: disable=too-many-instance-attributes
+  """A long lived ApiClient for a kube context.
+
+  The ApiClient is created once. The credentials in its configuration are
+  reloaded every refresh_interval.
+  """
+
+  def __init__(self, config_file=None, context=None, persist_config=False,
+               configuration=None, refresh_interval=REFRESH_INTERVAL):
+    """Create the client.
+
+    Args:
+      config_file: (Optional) The kubeconfig file; defaults to $KUBECONFIG or
+        ~/.kube/config. If it doesn't exist the default configuration is used
+        and credentials aren't refreshed; e.g. when running in a pod.
+      context: (Optional) The kube context; defaults to the current context.
+      persist_config: Whether refreshed credentials are written back to
+        config_file.
+      configuration: (Optional) k8s_client.Configuration to use instead of
+        loading config_file; its credentials aren't refreshed.
+      refresh_interval: datetime.timedelta; how often to reload the
+        credentials.
+    """
+    self._config_file = config_file or os.path.expanduser(
+      kube_config.KUBE_CONFIG_DEFAULT_LOCATION)
+    self._context = context
+    self._persist_config = persist_config
+    self._refreshable = configuration is None
+    self._lock = threading.Lock()
+    self._stop = threading.Event()
+    self.configuration = configuration or k8s_client.Configuration()
+
+    self._thread = None
+    if self._refreshable and os.path.exists(self._config_file):
+      self.refresh()
+      self._thread = threading.Thread(
+        target=self._refresh_loop, args=(refresh_interval.total_seconds(),))
+      self._thread.daemon = True
+      self._thread.start()
+
+    self.api_client = _CountingApiClient(self.configuration)
+
+  def refresh(self):
+    """Reload the credentials; this refreshes the GCP token if needed."""
+    if not self._refreshable or not os.path.exists(self._config_file):
+      return
+    with self._lock:
+      util.load_kube_config(config_file=self._config_file,
+                            context=self._context,
+                            client_configuration=self.configuration,
+                            persist_config=self._persist_config,
+                            get_google_credentials=_get_google_credentials)
+
+  def _refresh_loop(self, interval):
+    while not self._stop.wait(interval):
+      try:
+        self.refresh()
+      except Exception as e: # pylint: disable=broad-except
+        logging.error("Error refreshing K8s credentials; %s", e)
+
+  def close(self):
+    """Stop refreshing the credentials."""
+    self._stop.set()
+
+_factories = {}
+_factories_lock = threading.Lock()
+
+def get_factory():
+  """Return the shared factory for the default configuration.
+
+  util.load_kube_config changes the default configuration, so this follows
+  the config file and context it was last called with. If the default was
+  set some other way, e.g. by load_incluster_config, the factory uses a copy
+  of it.
+  """
+  configuration = k8s_client.Configuration()
+  kwargs = util.default_kube_config_args()
+  key = (configuration.host,)
+  if kwargs:
+    key += (kwargs["config_file"], kwargs["context"], kwargs["persist_config"])
+  with _factories_lock:
+    factory = _factories.get(key)
+    if not factory:
+      logging.info("Creating K8s client for %s", key)
+      if kwargs:
+        factory = ClientFactory(**kwargs)
+      else:
+        factory = ClientFactory(configuration=configuration)
+      _factories[key] = factory
+    return factory
+
+def get_api_client():
+  """Return the shared ApiClient for the default cluster."""
+  return get_factory().api_client
+
+
+_cluster_factories = {}
+# Locks held while getting the credentials of a cluster; keyed like
+# _cluster_factories.
+_cluster_locks = collections.defaultdict(threading.Lock)
+_kubeconfig_dir = []
+
+def _get_kubeconfig_dir():
+  """Return the directory of the kubeconfig files of the clusters.
+
+  It holds cluster credentials so it is removed when the process exits.
+  """
+  with _factories_lock:
+    if not _kubeconfig_dir:
+      kubeconfig_dir = tempfile.mkdtemp(prefix="kubeconfigs")
+      atexit.register(shutil.rmtree, kubeconfig_dir, ignore_errors=True)
+      _kubeconfig_dir.append(kubeconfig_dir)
+    return _kubeconfig_dir[0]
+
+def get_cluster_factory(project, zone, cluster_name):
+  """Return the shared factory for a GKE cluster.
+
+  The first call for a cluster runs gcloud to get its credentials. They are
+  written to a kubeconfig file used only for this cluster.
+  """
+  key = (project, zone, cluster_name)
+  with _factories_lock:
+    factory = _cluster_factories.get(key)
+    if factory:
+      return factory
+    cluster_lock = _cluster_locks[key]
+
+  # gcloud takes seconds so it runs without holding _factories_lock; the
+  # clients of other clusters shouldn't wait for it.
+  with cluster_lock:
+    with _factories_lock:
+      factory = _cluster_factories.get(key)
+    if factory:
+      return factory
+
+    config_file = os.path.join(_get_kubeconfig_dir(), "_".join(key))
+    env = os.environ.copy()
+    env["KUBECONFIG"] = config_file
+    util.run(["gcloud", "--project=" + project, "container", "clusters",
+              "--zone=" + zone, "get-credentials", cluster_name], env=env)
+    factory = ClientFactory(config_file=config_file)
+    with _factories_lock:
+      _cluster_factories[key] = factory
+    return factory
+
+def get_cluster_api_client(project, zone, cluster_name):
+  """Return the shared ApiClient for a GKE cluster."""
+  return get_cluster_factory(project, zone, cluster_name).api_client
+
+def refresh():
+  """Refresh the credentials of all the shared clients."""
+  with _factories_lock:
+    factories = list(_factories.values()) + list(_cluster_factories.values())
+  for f in factories:
+    f.refresh()
@@ -0,0 +1,193 @@
+import datetime
+import logging
+import os
+import shutil
+import threading
+
+import mock
+import pytest
+import yaml
+
+from kubeflow.testing import k8s_clients
+from kubeflow.testing import util
+from kubernetes import client as k8s_client
+
+def _write_kubeconfig(path, token):
+  config = {
+    "apiVersion": "v1",
+    "kind": "Config",
+    "clusters": [{"name": "some-cluster",
+                  "cluster": {"server": "https://10.0.0.1"}}],
+    "users": [{"name": "some-user", "user": {"token": token}}],
+    "contexts": [{"name": "some-context",
+                  "context": {"cluster": "some-cluster",
+                              "user": "some-user"}}],
+    "current-context": "some-context",
+  }
+  with open(path, "w") as hf:
+    yaml.safe_dump(config, hf)
+
+def test_client_factory(tmpdir):
+  config_file = os.path.join(str(tmpdir), "kubeconfig")
+  _write_kubeconfig(config_file, "token-1")
+
+  factory = k8s_clients.ClientFactory(
+    config_file=config_file, refresh_interval=datetime.timedelta(hours=1))
+  try:
+    api_client = factory.api_client
+    assert api_client.configuration.host == "https://10.0.0.1"
+    assert (api_client.configuration.api_key["authorization"] ==
+            "Bearer token-1")
+
+    # Refreshing updates the credentials of the existing client.
+    _write_kubeconfig(config_file, "token-2")
+    factory.refresh()
+    assert factory.api_client is api_client
+    assert (api_client.configuration.api_key["authorization"] ==
+            "Bearer token-2")
+
+    before = k8s_clients.COUNTERS.snapshot().get("requests", 0)
+    with mock.patch.object(api_client, "rest_client"):
+      api_client.request("GET", "https://10.0.0.1/api")
+    assert k8s_clients.COUNTERS.snapshot()["requests"] == before + 1
+  finally:
+    factory.close()
+
+@mock.patch("kubeflow.testing.k8s_clients.util.run")
+def test_get_cluster_api_client(mock_run):
+  def _get_credentials(command, env=None):
+    assert command[-1] == "some-cluster"
+    _write_kubeconfig(env["KUBECONFIG"], "cluster-token")
+  mock_run.side_effect = _get_credentials
+
+  api_client = k8s_clients.get_cluster_api_client("some-project", "some-zone",
+                                                  "some-cluster")
+  try:
+    assert (api_client.configuration.api_key["authorization"] ==
+            "Bearer cluster-token")
+    # gcloud is only run the first time.
+    assert api_client is k8s_clients.get_cluster_api_client(
+      "some-project", "some-zone", "some-cluster")
+    assert mock_run.call_count == 1
+  finally:
+    k8s_clients.get_cluster_factory("some-project", "some-zone",
+                                    "some-cluster").close()
+
+@mock.patch("kubeflow.testing.k8s_clients.util.run")
+def test_get_cluster_api_client_concurrent(mock_run):
+  blocked = threading.Event()
+  release = threading.Event()
+
+  def _get_credentials(command, env=None):
+    if command[-1] == "slow-cluster":
+      blocked.set()
+      assert release.wait(10)
+    _write_kubeconfig(env["KUBECONFIG"], "cluster-token")
+  mock_run.side_effect = _get_credentials
+
+  slow = threading.Thread(target=k8s_clients.get_cluster_api_client,
+                          args=("some-project", "some-zone", "slow-cluster"))
+  slow.start()
+  try:
+    assert blocked.wait(10)
+    # Clients of other clusters don't wait for gcloud to finish.
+    k8s_clients.get_cluster_api_client("some-project", "some-zone",
+                                       "fast-cluster")
+  finally:
+    release.set()
+    slow.join()
+
+  for name in ["slow-cluster", "fast-cluster"]:
+    k8s_clients.get_cluster_factory("some-project", "some-zone",
+                                    name).close()
+  assert mock_run.call_count == 2
+
+@mock.patch("kubeflow.testing.k8s_clients.atexit.register")
+def test_kubeconfig_dir_removed_at_exit(mock_register):
+  with mock.patch.object(k8s_clients, "_kubeconfig_dir", []):
+    kubeconfig_dir = k8s_clients._get_kubeconfig_dir() # pylint: disable=protected-access
+  try:
+    mock_register.assert_called_once_with(shutil.rmtree, kubeconfig_dir,
+                                          ignore_errors=True)
+  finally:
+    shutil.rmtree(kubeconfig_dir)
+
+@pytest.fixture
+def restore_default():
+  default = k8s_client.Configuration()
+  yield
+  k8s_client.Configuration.set_default(default)
+  k8s_clients._factories.clear() # pylint: disable=protected-access
+
+def _write_two_contexts(path, current_context):
+  config = {
+    "apiVersion": "v1",
+    "kind": "Config",
+    "clusters": [{"name": "cluster-a",
+                  "cluster": {"server": "https://10.0.0.1"}},
+                 {"name": "cluster-b",
+                  "cluster": {"server": "https://10.0.0.2"}}],
+    "users": [{"name": "some-user", "user": {"token": "some-token"}}],
+    "contexts": [{"name": "context-a",
+                  "context": {"cluster": "cluster-a", "user": "some-user"}},
+                 {"name": "context-b",
+                  "context": {"cluster": "cluster-b", "user": "some-user"}}],
+    "current-context": current_context,
+  }
+  with open(path, "w") as hf:
+    yaml.safe_dump(config, hf)
+
+@pytest.mark.usefixtures("restore_default")
+def test_get_factory_uses_loaded_context(tmpdir):
+  config_file = os.path.join(str(tmpdir), "kubeconfig")
+  _write_two_contexts(config_file, "context-a")
+  util.load_kube_config(config_file=config_file, context="context-b",
+                        persist_config=False)
+
+  factory = k8s_clients.get_factory()
+  try:
+    assert factory.configuration.host == "https://10.0.0.2"
+
+    # Refreshing keeps using the loaded context even if the current context
+    # of the file changes.
+    _write_two_contexts(config_file, "context-a")
+    with mock.patch("kubeflow.testing.k8s_clients.util.load_kube_config",
+                    wraps=util.load_kube_config) as mock_load:
+      factory.refresh()
+    assert mock_load.call_args[1]["persist_config"] is False
+    assert factory.configuration.host == "https://10.0.0.2"
+    assert factory is k8s_clients.get_factory()
+  finally:
+    factory.close()
+
+@pytest.mark.usefixtures("restore_default")
+def test_get_factory_copies_other_defaults(tmpdir):
+  config_file = os.path.join(str(tmpdir), "kubeconfig")
+  _write_two_contexts(config_file, "context-a")
+  util.load_kube_config(config_file=config_file, persist_config=False)
+
+  # E.g. load_incluster_config sets the default without util.load_kube_config.
+  configuration = k8s_client.Configuration()
+  configuration.host = "https://10.0.0.3"
+  k8s_client.Configuration.set_default(configuration)
+
+  factory = k8s_clients.get_factory()
+  assert factory.configuration.host == "https://10.0.0.3"
+  factory.refresh()
+  assert factory.configuration.host == "https://10.0.0.3"
+
+def test_counters():
+  counters = k8s_clients.Counters()
+  counters.increment("retries")
+  counters.increment("retries", 2)
+  assert counters.snapshot() == {"retries": 3}
+
+if __name__ == "__main__":
+  logging.basicConfig(
+      level=logging.INFO,
+      format=('%(levelname)s|%(asctime)s'
+            '|%(pathname)s|%(lineno)d| %(message)s'),
+    datefmt='%Y-%m-%dT%H:%M:%S',
+    )
+  logging.getLogger().setLevel(logging.INFO)
+  pytest.main()
@@ -0,0 +1,313 @@
+"""A watch based engine for waiting on Kubernetes resources.
+
+Waits on resources of the same kind in the same namespace share a single
+informer; i.e. a cache of the objects kept up to date by one list followed by
+a watch. Many waits are multiplexed over one stream instead of each wait
+polling the APIServer.
+
+If the watch fails (e.g. because RBAC doesn't allow watching) the informer
+falls back to polling by listing the objects every polling interval until
+the watch can be established again.
+"""
+import collections
+import logging
+import threading
+import time
+import weakref
+
+from kubernetes import client as k8s_client
+from kubernetes import watch
+
+# How long a single watch request stays open before it is resumed.
+WATCH_TIMEOUT_SECONDS = 60
+
+# Custom resources are identified by their group, version and plural.
+CustomResource = collections.namedtuple("CustomResource",
+                                        ("group", "version", "plural"))
+
+# Map from kind to a function returning the API method to list objects of
+# that kind in a namespace.
+KINDS = {
+  "Deployment": lambda c: k8s_client.AppsV1Api(c).list_namespaced_deployment,
+  "StatefulSet": lambda c: k8s_client.AppsV1Api(c).list_namespaced_stateful_set,
+  "DaemonSet": lambda c: k8s_client.AppsV1Api(c).list_namespaced_daemon_set,
+  "Job": lambda c: k8s_client.BatchV1Api(c).list_namespaced_job,
+  "Ingress": lambda c: k8s_client.NetworkingV1beta1Api(c).list_namespaced_ingress,
+}
+
+class WaitTimeoutError(Exception):
+  """Timeout waiting for a predicate to be satisfied.
+
+  last_objects stores the matching objects last seen by the wait.
+  """
+
+  def __init__(self, message, last_objects):
+    super(WaitTimeoutError, self).__init__(message)
+    self.last_objects = last_objects
+
+def _metadata(obj, field):
+  """Return a metadata field of either a dict or a K8s model object.
+
+  field is the snake case name of the field e.g. resource_version.
+  """
+  if isinstance(obj, dict):
+    parts = field.split("_")
+    key = parts[0] + "".join(p.capitalize() for p in parts[1:])
+    return obj.get("metadata", {}).get(key)
+  return getattr(obj.metadata, field)
+
+class _Informer: # pylint: disable=too-many-instance-attributes
+  """A cache of the objects of one kind in a namespace.
+
+  The cache is populated by a list and then kept up to date by a watch run on
+  a background thread.
+  """
+
+  def __init__(self, list_func, args, namespace, label_selector,
+               polling_interval):
+    """Create the informer.
+
+    Args:
+      list_func: The API method used to list and watch the objects.
+      args: Positional arguments for list_func.
+      namespace: Namespace of the objects; used in log messages.
+      label_selector: (Optional) Label selector for the list and watch.
+      polling_interval: Seconds between lists when the watch fails.
+    """
+    self._list_func = list_func
+    self._args = args
+    self._namespace = namespace
+    self._kwargs = {}
+    if label_selector:
+      self._kwargs["label_selector"] = label_selector
+    self._polling_interval = polling_interval
+
+    self._cond = threading.Condition()
+    self._stopped = threading.Event()
+    self._thread = None
+    self._resource_version = None
+    # Map from name to the most recent version of the object.
+    self._cache = {}
+    # Incremented each time the cache changes.
+    self._generation = 0
+    self._synced = False
+    self.last_error = None
+    self.users = 0
+
+  def start(self):
+    self._thread = threading.Thread(target=self._run, daemon=True)
+    self._thread.start()
+
+  def stop(self):
+    self._stopped.set()
+
+  def _run(self):
+    while not self._stopped.is_set():
+      try:
+        self._list()
+        while not self._stopped.is_set() and self._watch():
+          pass
+      except Exception as e: # pylint: disable=broad-except
+        logging.warning("Watch on %s in namespace %s failed; polling every "
+                        "%s seconds; error: %s", self._list_func.__name__,
+                        self._namespace, self._polling_interval, e)
+        with self._cond:
+          self.last_error = e
+        self._stopped.wait(self._polling_interval)
+
+  def _list(self):
+    results = self._list_func(*self._args, **self._kwargs)
+    if isinstance(results, dict):
+      items = results.get("items", [])
+    else:
+      items = results.items
+    resource_version = _metadata(results, "resource_version")
+
+    with self._cond:
+      self._cache = dict((_metadata(i, "name"), i) for i in items)
+      self._resource_version = resource_version
+      self._synced = True
+      self._generation += 1
+      self._cond.notify_all()
+
+  def _watch(self):
+    """Follow the watch from the last resourceVersion.
+
+    Returns:
+      resume: True if the watch can be resumed and False if the objects need
+        to be listed again.
+    """
+    w = watch.Watch()
+    kwargs = dict(self._kwargs)
+    kwargs["resource_version"] = self._resource_version
+
+    try:
+      for event in w.stream(self._list_func, *self._args,
+                            timeout_seconds=WATCH_TIMEOUT_SECONDS, **kwargs):
+        if self._stopped.is_set():
+          return False
+
+        obj = event["object"]
+        if event["type"] == "ERROR":
+          # Most likely the resourceVersion is too old (410 Gone).
+          logging.info("Watch on %s returned an error; relisting: %s",
+                       self._list_func.__name__, obj)
+          return False
+
+        with self._cond:
+          self._resource_version = _metadata(obj, "resource_version")
+          if event["type"] == "DELETED":
+            self._cache.pop(_metadata(obj, "name"), None)
+          else:
+            self._cache[_metadata(obj, "name")] = obj
+          self.last_error = None
+          self._generation += 1
+          self._cond.notify_all()
+    finally:
+      w.stop()
+    return True
+
+  def wait(self, predicate, timeout):
+    """Wait until predicate returns a truthy value.
+
+    Args:
+      predicate: Function taking a dictionary mapping names to objects. It is
+        evaluated on a snapshot of the cache each time the cache changes,
+        without holding the informer's lock, so it may do I/O (e.g. log the
+        status) without blocking the watch or other waits.
+      timeout: Seconds to wait.
+
+    Returns:
+      result: The value returned by predicate.
+
+    Raises:
+      WaitTimeoutError: If the predicate isn't satisfied before the timeout.
+    """
+    deadline = time.time() + timeout
+    # The generation of the last snapshot passed to predicate.
+    seen = None
+    while True:
+      with self._cond:
+        while not self._synced or self._generation == seen:
+          remaining = deadline - time.time()
+          if remaining <= 0:
+            raise self._timeout_error()
+          self._cond.wait(remaining)
+        seen = self._generation
+        snapshot = dict(self._cache)
+
+      result = predicate(snapshot)
+      if result:
+        return result
+
+      if time.time() >= deadline:
+        with self._cond:
+          raise self._timeout_error()
+
+  def _timeout_error(self):
+    """Return the error for a timed out wait; called holding the lock."""
+    message = "Timeout waiting on {0} in namespace {1}".format(
+      self._list_func.__name__, self._namespace)
+    if self.last_error:
+      message += "; last error: {0}".format(self.last_error)
+    return WaitTimeoutError(message, dict(self._cache))
+
+class Waiter:
+  """Multiplex waits on Kubernetes resources over shared informers.
+
+  Waits on the same kind in the same namespace with the same label selector
+  share an informer. An informer is stopped once no waits are using it.
+  """
+
+  def __init__(self, api_client, polling_interval=10):
+    """Create the waiter.
+
+    Args:
+      api_client: K8s api client to use.
+      polling_interval: Seconds between lists when a watch fails.
+    """
+    self._api_client = api_client
+    self._polling_interval = polling_interval
+    self._lock = threading.Lock()
+    self._informers = {}
+
+  def _list_func(self, kind, namespace):
+    if isinstance(kind, CustomResource):
+      api = k8s_client.CustomObjectsApi(self._api_client)
+      return (api.list_namespaced_custom_object,
+              (kind.group, kind.version, namespace, kind.plural))
+
+    if kind not in KINDS:
+      raise ValueError("Unsupported kind {0}; supported kinds are {1}".format(
+        kind, sorted(KINDS.keys())))
+    return KINDS[kind](self._api_client), (namespace,)
+
+  def _acquire(self, kind, namespace, label_selector, polling_interval):
+    key = (kind, namespace, label_selector)
+    with self._lock:
+      informer = self._informers.get(key)
+      if not informer:
+        list_func, args = self._list_func(kind, namespace)
+        informer = _Informer(list_func, args, namespace, label_selector,
+                             polling_interval or self._polling_interval)
+        informer.start()
+        self._informers[key] = informer
+      informer.users += 1
+      return key, informer
+
+  def _release(self, key, informer):
+    with self._lock:
+      informer.users -= 1
+      if not informer.users:
+        informer.stop()
+        del self._informers[key]
+
+  def wait(self, kind, namespace, predicate, name=None, label_selector=None,
+           timeout=600, polling_interval=None):
+    """Wait for objects of a kind to satisfy a predicate.
+
+    Args:
+      kind: One of KINDS or a CustomResource.
+      namespace: Namespace of the objects.
+      predicate: If name is set a function taking the object with that name
+        (or None if it doesn't exist). Otherwise a function taking the list of
+        objects matching label_selector. The wait finishes when predicate
+        returns a truthy value. Exceptions raised by predicate are propagated.
+      name: (Optional) Name of the object to wait for.
+      label_selector: (Optional) Label selector for the objects.
+      timeout: Seconds to wait.
+      polling_interval: (Optional) Seconds between lists if the watch fails.
+        Only used if no other wait is sharing the informer.
+
+    Returns:
+      result: The value returned by predicate.
+
+    Raises:
+      WaitTimeoutError: If the predicate isn't satisfied before the timeout.
+    """
+    def select(cache):
+      if name:
+        return predicate(cache.get(name))
+      return predicate(list(cache.values()))
+
+    key, informer = self._acquire(kind, namespace, label_selector,
+                                  polling_interval)
+    try:
+      return informer.wait(select, timeout)
+    finally:
+      self._release(key, informer)
+
+_waiters_lock = threading.Lock()
+_waiters = weakref.WeakKeyDictionary()
+
+def get_waiter(api_client):
+  """Return the Waiter shared by all waits using api_client.
+
+  The waiter is dropped once api_client is garbage collected.
+  """
+  with _waiters_lock:
+    if api_client not in _waiters:
+      # The waiter only holds a proxy to the client; a strong reference from
+      # the value would keep the weak key alive forever.
+      _waiters[api_client] = Waiter(weakref.proxy(api_client))
+    return _waiters[api_client]
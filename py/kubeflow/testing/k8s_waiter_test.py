@@ -0,0 +1,159 @@
+import gc
+import logging
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+from kubeflow.testing import k8s_waiter
+
+def _job(name, phase, resource_version="1"):
+  return {
+    "metadata": {
+      "name": name,
+      "resourceVersion": resource_version,
+    },
+    "status": {
+      "phase": phase,
+    },
+  }
+
+def _phase(phase):
+  return lambda job: job if job and job["status"]["phase"] == phase else None
+
+class FakeList:
+  """Fake list function returning a fixed sequence of results."""
+
+  __name__ = "list_namespaced_custom_object"
+
+  def __init__(self, results):
+    self.results = results
+    self.calls = 0
+
+  def __call__(self, *args, **kwargs):
+    result = self.results[min(self.calls, len(self.results) - 1)]
+    self.calls += 1
+    return result
+
+@mock.patch("kubeflow.testing.k8s_waiter.k8s_client.CustomObjectsApi")
+@mock.patch("kubeflow.testing.k8s_waiter.watch.Watch")
+def test_wait_multiplexed(mock_watch, mock_api):
+  list_func = FakeList([{"metadata": {"resourceVersion": "1"},
+                         "items": [_job("a", "Running"),
+                                   _job("b", "Running")]}])
+  mock_api.return_value.list_namespaced_custom_object = list_func
+
+  def stream(*_args, **_kwargs):
+    yield {"type": "MODIFIED", "object": _job("a", "Succeeded", "2")}
+    yield {"type": "MODIFIED", "object": _job("b", "Succeeded", "3")}
+    time.sleep(.1)
+  mock_watch.return_value.stream.side_effect = stream
+
+  waiter = k8s_waiter.Waiter(mock.MagicMock(), polling_interval=0)
+  kind = k8s_waiter.CustomResource("argoproj.io", "v1alpha1", "workflows")
+
+  result = waiter.wait(kind, "kubeflow-test-infra", _phase("Succeeded"),
+                       name="b", timeout=10)
+  assert result["metadata"]["name"] == "b"
+
+  # The informer is stopped once there are no more waits.
+  assert not waiter._informers # pylint: disable=protected-access
+
+@mock.patch("kubeflow.testing.k8s_waiter.k8s_client.CustomObjectsApi")
+@mock.patch("kubeflow.testing.k8s_waiter.watch.Watch")
+def test_wait_polling_fallback(mock_watch, mock_api):
+  """If the watch fails the objects are listed again."""
+  list_func = FakeList([{"metadata": {"resourceVersion": "1"},
+                         "items": [_job("a", "Running")]},
+                        {"metadata": {"resourceVersion": "2"},
+                         "items": [_job("a", "Succeeded", "2")]}])
+  mock_api.return_value.list_namespaced_custom_object = list_func
+  mock_watch.return_value.stream.side_effect = RuntimeError("forbidden")
+
+  waiter = k8s_waiter.Waiter(mock.MagicMock(), polling_interval=0)
+  kind = k8s_waiter.CustomResource("argoproj.io", "v1alpha1", "workflows")
+
+  result = waiter.wait(kind, "kubeflow-test-infra", _phase("Succeeded"),
+                       name="a", timeout=10)
+  assert result["status"]["phase"] == "Succeeded"
+  assert list_func.calls >= 2
+
+@mock.patch("kubeflow.testing.k8s_waiter.k8s_client.CustomObjectsApi")
+@mock.patch("kubeflow.testing.k8s_waiter.watch.Watch")
+def test_wait_timeout(mock_watch, mock_api):
+  list_func = FakeList([{"metadata": {"resourceVersion": "1"},
+                         "items": [_job("a", "Running")]}])
+  mock_api.return_value.list_namespaced_custom_object = list_func
+  def stream(*_args, **_kwargs):
+    time.sleep(.1)
+    return iter([])
+  mock_watch.return_value.stream.side_effect = stream
+
+  waiter = k8s_waiter.Waiter(mock.MagicMock(), polling_interval=0)
+  kind = k8s_waiter.CustomResource("argoproj.io", "v1alpha1", "workflows")
+
+  with pytest.raises(k8s_waiter.WaitTimeoutError) as e:
+    waiter.wait(kind, "kubeflow-test-infra", _phase("Succeeded"), name="a",
+                timeout=.1)
+  assert e.value.last_objects["a"]["status"]["phase"] == "Running"
+
+@mock.patch("kubeflow.testing.k8s_waiter.k8s_client.CustomObjectsApi")
+@mock.patch("kubeflow.testing.k8s_waiter.watch.Watch")
+def test_predicate_runs_without_lock(mock_watch, mock_api):
+  """A slow predicate doesn't block the watch."""
+  list_func = FakeList([{"metadata": {"resourceVersion": "1"},
+                         "items": [_job("a", "Running")]}])
+  mock_api.return_value.list_namespaced_custom_object = list_func
+
+  def stream(*_args, **_kwargs):
+    yield {"type": "MODIFIED", "object": _job("a", "Succeeded", "2")}
+    time.sleep(.1)
+  mock_watch.return_value.stream.side_effect = stream
+
+  waiter = k8s_waiter.Waiter(mock.MagicMock(), polling_interval=0)
+  kind = k8s_waiter.CustomResource("argoproj.io", "v1alpha1", "workflows")
+
+  def can_lock(cond):
+    acquired = []
+    def acquire():
+      if cond.acquire(timeout=1):
+        acquired.append(True)
+        cond.release()
+    t = threading.Thread(target=acquire)
+    t.start()
+    t.join()
+    return bool(acquired)
+
+  def predicate(job):
+    informer = list(waiter._informers.values())[0] # pylint: disable=protected-access
+    # Another thread can take the informer's lock while predicate runs.
+    assert can_lock(informer._cond) # pylint: disable=protected-access
+    return _phase("Succeeded")(job)
+
+  result = waiter.wait(kind, "kubeflow-test-infra", predicate, name="a",
+                       timeout=10)
+  assert result["status"]["phase"] == "Succeeded"
+
+class FakeApiClient:
+  pass
+
+def test_get_waiter_released():
+  clients = [FakeApiClient() for _ in range(5)]
+  waiters = [k8s_waiter.get_waiter(c) for c in clients]
+  assert k8s_waiter.get_waiter(clients[0]) is waiters[0]
+
+  del clients
+  del waiters
+  gc.collect()
+  assert not k8s_waiter._waiters # pylint: disable=protected-access
+
+if __name__ == "__main__":
+  logging.basicConfig(
+      level=logging.INFO,
+      format=('%(levelname)s|%(asctime)s'
+            '|%(pathname)s|%(lineno)d| %(message)s'),
+    datefmt='%Y-%m-%dT%H:%M:%S',
+    )
+  logging.getLogger().setLevel(logging.INFO)
+  pytest.main()
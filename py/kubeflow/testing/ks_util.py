@@ -1,6 +1,7 @@
 """Utilities for working with ksonnet in the tests."""
 
 import filelock
+import json
 import logging
 import os
 import re
@@ -9,6 +10,15 @@ import yaml
 
 from kubeflow.testing import util
 
+# Matches the start of the component overrides in the params.libsonnet file
+# "ks env add" creates for an environment.
+ENV_COMPONENTS_PATTERN = re.compile(r"components\s*\+:\s*\{")
+
+# JSON numbers. Jsonnet can't parse numbers with leading zeros (e.g. an all
+# digit commit SHA) so those are quoted as strings.
+NUMBER_PATTERN = re.compile(
+  r"^-?(0|[1-9][0-9]*)(\.[0-9]+)?([eE][-+]?[0-9]+)?$")
+
 def setup_ks_app(app_dir, env, namespace, component, params, ks_cmd=None):
   """Setup the ksonnet app"""
 
@@ -57,3 +67,76 @@ def get_ksonnet_cmd(app_dir):
 
   # For compatibility reasons we'll keep the default cmd as "ks".
   return "ks"
+
+def param_value(value):
+  """Return the jsonnet literal for a parameter value.
+
+  The value is interpreted the same way "ks param set" does; i.e. numbers
+  and booleans are not quoted, JSON arrays and objects are kept as is and
+  anything else is a string.
+
+  Args:
+    value: The value of the parameter; it is converted to a string first.
+
+  Returns:
+    literal: String containing the jsonnet literal.
+
+  Raises:
+    ValueError: If value is None; "ks param set" fails without a value.
+  """
+  if value is None:
+    raise ValueError("Parameter value can't be None")
+  value = "{0}".format(value)
+  if NUMBER_PATTERN.match(value):
+    return value
+
+  if value.lower() in ("true", "false"):
+    return value.lower()
+
+  if value.startswith(("[", "{")):
+    try:
+      return json.dumps(json.loads(value))
+    except ValueError:
+      pass
+
+  return json.dumps(value)
+
+def set_env_params(app_dir, env, component, params):
+  """Set the parameters of a component in a new environment.
+
+  This is equivalent to running "ks param set --env=<env>" for each
+  parameter but writes environments/<env>/params.libsonnet once rather than
+  running ks once per parameter. The environment must have just been created
+  with "ks env add" so it doesn't override the component yet.
+
+  Args:
+    app_dir: Directory of the ksonnet application.
+    env: Name of the environment.
+    component: Name of the component.
+    params: Dictionary of parameter names to values.
+  """
+  params_file = os.path.join(app_dir, "environments", env, "params.libsonnet")
+  with open(params_file) as hf:
+    contents = hf.read()
+
+  match = ENV_COMPONENTS_PATTERN.search(contents)
+  if not match:
+    raise ValueError("{0} doesn't define the components of environment "
+                     "{1}".format(params_file, env))
+
+  missing = sorted(k for k, v in params.items() if v is None)
+  if missing:
+    raise ValueError("Parameters {0} of component {1} have no value".format(
+      ", ".join(missing), component))
+
+  lines = ["", "    {0}+: {{".format(json.dumps(component))]
+  for k in sorted(params):
+    lines.append("      {0}: {1},".format(json.dumps(k),
+                                           param_value(params[k])))
+  lines.append("    },")
+
+  logging.info("Setting params for component %s in %s", component,
+               params_file)
+  with open(params_file, "w") as hf:
+    hf.write(contents[:match.end()] + "\n".join(lines) +
+             contents[match.end():])
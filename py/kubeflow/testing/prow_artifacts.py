@@ -4,13 +4,18 @@ For reference see:
 https://github.com/kubernetes/test-infra/tree/master/gubernator
 """
 import argparse
+import collections
+from concurrent import futures
+import io
 import logging
 import json
 import os
 import six
+import threading
 import time
-if not os.getenv("CLOUD_PROVIDER") or os.getenv("CLOUD_PROVIDER") == "gcp":
-  from google.cloud import storage  # pylint: disable=no-name-in-module
+from xml.etree import ElementTree
+from kubeflow.testing import gcs_store
+from kubeflow.testing import gcs_sync
 from kubeflow.testing import test_util
 from kubeflow.testing import util
 
@@ -20,14 +25,35 @@ from kubeflow.testing import util
 # bucket and not a bucket in project kubelfow-ci
 PROW_RESULTS_BUCKET = "kubernetes-jenkins"
 
+# Max number of junit files to download concurrently.
+JUNIT_MAX_WORKERS = 16
+
+# Number of bytes to download from each junit file. Only the attributes of the
+# root element are needed so we don't download the whole file.
+JUNIT_HEADER_BYTES = 16 * 1024
+
+# Summary of the junit files; failing_files is a dictionary mapping the
+# GCS URIs of the files with failures to the number of failures.
+JUNIT_SUMMARY = collections.namedtuple(
+  "JUNIT_SUMMARY", ("num_files", "num_failures", "failing_files"))
+
+# Max number of artifacts ProwJobArtifacts writes concurrently.
+ARTIFACTS_MAX_WORKERS = 16
+
+# The time it took to write an artifact.
+ARTIFACT_WRITE = collections.namedtuple(
+  "ARTIFACT_WRITE", ("target", "num_bytes", "seconds"))
+
 # TODO(jlewi): Replace create_finished in tensorflow/k8s/py/prow.py with this
 # version. We should do that when we switch tensorflow/k8s to use Argo instead
 # of Airflow.
-def create_started(ui_urls):
+def create_started(ui_urls, submit_seconds=None):
   """Return a string containing the contents of started.json for gubernator.
 
   ui_urls: Dictionary of workflow name to URL corresponding to the Argo UI
       for the workflows launched.
+  submit_seconds: (Optional) Dictionary of workflow name to the number of
+      seconds it took to submit the workflow.
   """
   # See:
   # https://github.com/kubernetes/test-infra/tree/master/gubernator#job-artifact-gcs-layout
@@ -62,6 +88,9 @@ def create_started(ui_urls):
 
   for n, v in items:
     started["metadata"][n + "-ui"] = v
+
+  for n, v in (submit_seconds or {}).items():
+    started["metadata"][n + "-submit-seconds"] = round(v, 1)
   return json.dumps(started)
 
 # TODO(jlewi): Replace create_finished in tensorflow/k8s/py/prow.py with this
@@ -177,8 +206,7 @@ def copy_artifacts(args):
         new_path = os.path.join(dirpath, new_name)
         logging.info("Rename %s to %s", full_path, new_path)
         os.rename(full_path, new_path)
-  util.maybe_activate_service_account()
-  util.run(["gsutil", "-m", "rsync", "-r", args.artifacts_dir, output])
+  return gcs_sync.sync_dir(args.artifacts_dir, output)
 
 def create_pr_symlink(args):
   """Create a 'symlink' in GCS pointing at the results for a PR.
@@ -186,51 +214,246 @@ def create_pr_symlink(args):
   This is a null op if PROW environment variables indicate this is not a PR
   job.
   """
-  gcs_client = storage.Client()
-  # GCS layout is defined here:
-  # https://github.com/kubernetes/test-infra/tree/master/gubernator#job-artifact-gcs-layout
-  pull_number = os.getenv("PULL_NUMBER")
-  if not pull_number:
-    # Symlinks are only created for pull requests.
-    return
+  artifacts = ProwJobArtifacts(args.bucket)
+  artifacts.add_pr_symlink()
+  artifacts.flush()
 
-  path = "pr-logs/directory/{job}/{build}.txt".format(
-      job=os.getenv("JOB_NAME"), build=os.getenv("BUILD_NUMBER"))
+def _junit_failures(store, bucket_name, name):
+  """Return the number of failures in a junit file stored in GCS."""
+  header = store.read(bucket_name, name, start=0, end=JUNIT_HEADER_BYTES - 1)
+  try:
+    return test_util.get_num_failures_from_stream(io.BytesIO(header))
+  except ElementTree.ParseError:
+    # The start of the root element didn't fit in the header.
+    return test_util.get_num_failures(store.read(bucket_name, name))
 
-  pull_number = os.getenv("PULL_NUMBER")
+def summarize_junit(gcs_client, artifacts_dir, max_workers=JUNIT_MAX_WORKERS,
+                    store=None):
+  """Summarize the failures in the junit files in the artifacts directory.
 
-  source = util.to_gcs_uri(args.bucket, path)
-  target = get_gcs_dir(args.bucket)
-  logging.info("Creating symlink %s pointing to %s", source, target)
-  bucket = gcs_client.get_bucket(args.bucket)
-  blob = bucket.blob(path)
-  blob.upload_from_string(target)
+  The junit files are downloaded concurrently.
 
-def check_no_errors(gcs_client, artifacts_dir):
-  """Check that all the XML files exist and there were no errors.
   Args:
-    gcs_client: The GCS client.
+    gcs_client: The GCS client; ignored if store is set.
     artifacts_dir: The directory where artifacts should be stored.
+    max_workers: Max number of files to download concurrently.
+    store: (Optional) gcs_store store to read the files from.
   Returns:
-    True if there were no errors and false otherwise.
+    summary: JUNIT_SUMMARY for the junit files.
   """
+  store = store or gcs_store.GcsStore(gcs_client)
   bucket_name, prefix = util.split_gcs_uri(artifacts_dir)
-  bucket = gcs_client.get_bucket(bucket_name)
-  no_errors = True
 
-  for b in bucket.list_blobs(prefix=os.path.join(prefix, "junit")):
-    full_path = util.to_gcs_uri(b.bucket, b.path)
-    if not os.path.splitext(b.path)[-1] == ".xml":
+  names = {}
+  for name in store.list_names(bucket_name, os.path.join(prefix, "junit")):
+    full_path = util.to_gcs_uri(bucket_name, name)
+    if not os.path.splitext(name)[-1] == ".xml":
       logging.info("Skipping %s; not an xml file", full_path)
       continue
-    logging.info("Checking %s", full_path)
-    xml_contents = b.download_as_string()
+    names[full_path] = name
+
+  failing_files = {}
+  with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+    pending = dict((executor.submit(_junit_failures, store, bucket_name, n),
+                    full_path) for full_path, n in names.items())
+    for f in futures.as_completed(pending):
+      full_path = pending[f]
+      num_failures = f.result()
+      logging.info("Checked %s; %s failures", full_path, num_failures)
+      if num_failures > 0:
+        failing_files[full_path] = num_failures
+
+  return JUNIT_SUMMARY(len(names), sum(failing_files.values()), failing_files)
+
+def check_no_errors(gcs_client, artifacts_dir, store=None):
+  """Check that all the XML files exist and there were no errors.
+  Args:
+    gcs_client: The GCS client; ignored if store is set.
+    artifacts_dir: The directory where artifacts should be stored.
+    store: (Optional) gcs_store store to read the files from.
+  Returns:
+    True if there were no errors and false otherwise.
+  """
+  summary = summarize_junit(gcs_client, artifacts_dir, store=store)
+
+  logging.info("Checked %s junit files; %s failures in %s files",
+               summary.num_files, summary.num_failures,
+               len(summary.failing_files))
+  for full_path, num_failures in sorted(summary.failing_files.items()):
+    logging.info("Test failures in %s: %s", full_path, num_failures)
 
-    if test_util.get_num_failures(xml_contents) > 0:
-      logging.info("Test failures in %s", full_path)
-      no_errors = False
+  return not summary.failing_files
 
-  return no_errors
+class _TimedStore:
+  """Adapter recording the size and latency of the writes to a store.
+
+  The contents passed to write are the (contents, source) pairs pending in
+  ProwJobArtifacts; source is uploaded if contents is None.
+  """
+
+  def __init__(self, store):
+    self._store = store
+    self._lock = threading.Lock()
+    self.writes = []
+
+  def write(self, bucket_name, name, value):
+    contents, source = value
+    start = time.time()
+    if contents is None:
+      num_bytes = os.path.getsize(source)
+      self._store.upload_file(source, bucket_name, name)
+    else:
+      num_bytes = len(contents.encode() if isinstance(contents, str)
+                      else contents)
+      self._store.write(bucket_name, name, contents)
+    write = ARTIFACT_WRITE(util.to_gcs_uri(bucket_name, name), num_bytes,
+                           time.time() - start)
+    with self._lock:
+      self.writes.append(write)
+
+class ProwJobArtifacts:
+  """Collect the artifacts of a prow job and write them in one batch.
+
+  Artifacts are kept in memory (files are read when flushed) and flush
+  writes them concurrently, so the time it takes doesn't grow with the
+  number of artifacts:
+
+    artifacts = ProwJobArtifacts(bucket)
+    artifacts.add("some-workflow.yaml", status_yaml)
+    artifacts.add_file("build-log.txt", log_file)
+    test_success = artifacts.finalize(workflow_success, workflow_phase,
+                                      ui_urls)
+  """
+
+  def __init__(self, bucket, store=None, max_workers=ARTIFACTS_MAX_WORKERS):
+    """Create the session.
+
+    Args:
+      bucket: The bucket where results are stored.
+      store: (Optional) gcs_store store to write to; defaults to the store
+        shared by the process.
+      max_workers: Max number of artifacts to write concurrently.
+    """
+    self.bucket = bucket
+    self.output_dir = get_gcs_dir(bucket)
+    self._store = store or gcs_store.get_store()
+    self._max_workers = max_workers
+    self._lock = threading.Lock()
+    # Ordered map from the GCS URI of each artifact to a (contents, source)
+    # pair; source is the local file to upload if contents is None.
+    self._pending = collections.OrderedDict()
+
+  def _add(self, target, contents=None, source=None):
+    with self._lock:
+      self._pending[target] = (contents, source)
+
+  def add(self, name, contents):
+    """Add an artifact; name is relative to the job's output directory."""
+    self._add(os.path.join(self.output_dir, name), contents=contents)
+
+  def add_file(self, name, source):
+    """Add a local file as an artifact; it is read when flushed."""
+    self._add(os.path.join(self.output_dir, name), source=source)
+
+  def add_started(self, ui_urls, submit_seconds=None):
+    self.add("started.json", create_started(ui_urls, submit_seconds))
+
+  def add_finished(self, success, workflow_phase, ui_urls):
+    self.add("finished.json", create_finished(success, workflow_phase,
+                                              ui_urls))
+
+  def add_pr_symlink(self):
+    """Add the 'symlink' pointing at the results for a PR.
+
+    This is a null op if PROW environment variables indicate this is not a
+    PR job.
+    """
+    # GCS layout is defined here:
+    # https://github.com/kubernetes/test-infra/tree/master/gubernator#job-artifact-gcs-layout
+    if not os.getenv("PULL_NUMBER"):
+      # Symlinks are only created for pull requests.
+      return
+
+    path = "pr-logs/directory/{job}/{build}.txt".format(
+        job=os.getenv("JOB_NAME"), build=os.getenv("BUILD_NUMBER"))
+
+    source = util.to_gcs_uri(self.bucket, path)
+    logging.info("Creating symlink %s pointing to %s", source,
+                 self.output_dir)
+    self._add(source, contents=self.output_dir)
+
+  def flush(self):
+    """Write the pending artifacts concurrently.
+
+    All the writes are attempted even if some of them fail.
+
+    Returns:
+      writes: List of ARTIFACT_WRITE for the artifacts written.
+
+    Raises:
+      Exception: The error of the first write that failed.
+    """
+    with self._lock:
+      pending = self._pending
+      self._pending = collections.OrderedDict()
+    if not pending:
+      return []
+
+    timed_store = _TimedStore(self._store)
+    objects = []
+    for target, value in pending.items():
+      bucket_name, path = util.split_gcs_uri(target)
+      objects.append((bucket_name, path, value))
+
+    start = time.time()
+    try:
+      gcs_store.write_many(timed_store, objects,
+                           max_workers=self._max_workers)
+    finally:
+      writes = timed_store.writes
+      if writes:
+        seconds = sorted(w.seconds for w in writes)
+        slowest = max(writes, key=lambda w: w.seconds)
+        logging.info("Wrote %s artifacts (%s bytes) in %.2f seconds; latency "
+                     "median %.3fs max %.3fs (%s)", len(writes),
+                     sum(w.num_bytes for w in writes), time.time() - start,
+                     seconds[len(seconds) // 2], slowest.seconds,
+                     slowest.target)
+    order = dict((target, i) for i, target in enumerate(pending))
+    return sorted(writes, key=lambda w: order[w.target])
+
+  def finalize(self, workflow_success, workflow_phase, ui_urls):
+    """Finalize the prow job.
+
+    Determines the status of the job by looking at the junit files and then
+    writes the pending artifacts followed by finished.json. finished.json
+    is written last because it marks the job as done.
+
+    Args:
+      workflow_success: Bool indicating whether the job should be considered
+        succeeded or failed.
+      workflow_phase: Dictionary of workflow name to phase the workflow is in.
+      ui_urls: Dictionary of workflow name to URL corresponding to the Argo
+        UI for the workflows launched.
+
+    Returns:
+      test_success: Bool indicating whether all tests succeeded.
+    """
+    artifacts_dir = os.path.join(self.output_dir, "artifacts")
+
+    # If the workflow failed then we will mark the prow job as failed.
+    # We don't need to check the junit files for test failures because we
+    # already know it failed; furthermore we can't rely on the junit files
+    # if the workflow didn't succeed because not all junit files might be
+    # there.
+    test_success = False
+    if workflow_success:
+      test_success = check_no_errors(None, artifacts_dir, store=self._store)
+
+    self.flush()
+    self.add_finished(test_success, workflow_phase, ui_urls)
+    self.flush()
+    return test_success
 
 def finalize_prow_job(bucket, workflow_success, workflow_phase, ui_urls):
   """Finalize a prow job.
@@ -247,23 +470,8 @@ def finalize_prow_job(bucket, workflow_success, workflow_phase, ui_urls):
   Returns:
     test_success: Bool indicating whether all tests succeeded.
   """
-  gcs_client = storage.Client()
-
-  output_dir = get_gcs_dir(bucket)
-  artifacts_dir = os.path.join(output_dir, "artifacts")
-
-  # If the workflow failed then we will mark the prow job as failed.
-  # We don't need to check the junit files for test failures because we
-  # already know it failed; furthermore we can't rely on the junit files
-  # if the workflow didn't succeed because not all junit files might be there.
-  test_success = True
-  if workflow_success:
-    test_success = check_no_errors(gcs_client, artifacts_dir)
-  else:
-    test_success = False
-
-  create_finished_file(bucket, test_success, workflow_phase, ui_urls)
-  return test_success
+  return ProwJobArtifacts(bucket).finalize(workflow_success, workflow_phase,
+                                           ui_urls)
 
 def main(unparsed_args=None):  # pylint: disable=too-many-locals
   logging.getLogger().setLevel(logging.INFO) # pylint: disable=too-many-locals
@@ -0,0 +1,144 @@
+"""Render py_func workflows in a long lived worker process.
+
+run_e2e_workflow used to shell out to e2e_tool once per py_func workflow.
+Each invocation paid the cost of starting python and importing the py_func
+module along with its dependencies (e.g. the kubernetes client).
+
+Importing py_func modules appears to break when sys.path is adjusted
+dynamically (https://github.com/kubeflow/testing/issues/467) whereas setting
+PYTHONPATH before launching python works. So we still render the workflows
+in a separate process with PYTHONPATH set but we start it once and send it
+requests over a pipe.
+
+The protocol is one JSON object per line. Requests are
+{"py_func": ..., "kwargs": {...}} and responses are either
+{"workflow": {...}} or {"error": "<traceback>"}.
+"""
+
+import importlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import traceback
+
+class PyFuncError(Exception):
+  """Raised when the worker fails to render a py_func."""
+
+def py_func_import(py_func, kwargs):
+  """Imports and executes the function py_func."""
+  path, create_function = py_func.rsplit('.', 1)
+  logging.info("Importing path %s", path)
+  mod = importlib.import_module(path)
+  met = getattr(mod, create_function)
+  return met(**kwargs)
+
+class PyFuncRenderer(object):
+  """Client for a worker process rendering py_func workflows.
+
+  Use it as a context manager so the worker is shut down when done:
+
+    with PyFuncRenderer(python_paths) as renderer:
+      workflow = renderer.render("my.module.create_workflow", kwargs)
+  """
+
+  def __init__(self, python_paths, python=None):
+    """Start the worker.
+
+    Args:
+      python_paths: List of directories to set PYTHONPATH to in the worker.
+      python: The python interpreter to use; defaults to the current one.
+    """
+    env = os.environ.copy()
+    env["PYTHONPATH"] = ":".join(python_paths)
+    command = [python or sys.executable, "-m",
+               "kubeflow.testing.py_func_worker"]
+    logging.info("Starting py_func worker with PYTHONPATH=%s",
+                 env["PYTHONPATH"])
+    # stderr is inherited so the worker's logs show up in ours.
+    self._process = subprocess.Popen(command, stdin=subprocess.PIPE,
+                                     stdout=subprocess.PIPE, env=env,
+                                     universal_newlines=True)
+    self._lock = threading.Lock()
+
+  def render(self, py_func, kwargs):
+    """Render a workflow.
+
+    Args:
+      py_func: Dotted name of the function defining the workflow.
+      kwargs: Dictionary of keyword arguments for py_func; it must be
+        serializable to JSON.
+
+    Returns:
+      workflow: The dictionary returned by py_func.
+
+    Raises:
+      PyFuncError: If py_func raised an exception or the worker died.
+    """
+    request = json.dumps({"py_func": py_func, "kwargs": kwargs})
+    with self._lock:
+      try:
+        self._process.stdin.write(request + "\n")
+        self._process.stdin.flush()
+        line = self._process.stdout.readline()
+      except (BrokenPipeError, ValueError) as e:
+        raise PyFuncError("py_func worker isn't running; {0}".format(e))
+
+    if not line:
+      raise PyFuncError("py_func worker exited with code {0} while rendering "
+                        "{1}".format(self._process.poll(), py_func))
+
+    response = json.loads(line)
+    if "error" in response:
+      raise PyFuncError("Rendering {0} failed:\n{1}".format(
+        py_func, response["error"]))
+    return response["workflow"]
+
+  def close(self):
+    """Stop the worker."""
+    if self._process.poll() is not None:
+      return
+    self._process.stdin.close()
+    self._process.wait()
+    self._process.stdout.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *_):
+    self.close()
+
+def serve(requests, responses):
+  """Render each request read from requests and write it to responses."""
+  for line in requests:
+    if not line.strip():
+      continue
+    try:
+      request = json.loads(line)
+      workflow = py_func_import(request["py_func"], request["kwargs"])
+      # Serialize in the worker so that a workflow that isn't valid JSON
+      # is reported as an error for this request.
+      response = json.dumps({"workflow": workflow})
+    except Exception: # pylint: disable=broad-except
+      response = json.dumps({"error": traceback.format_exc()})
+    responses.write(response + "\n")
+    responses.flush()
+
+def main():
+  # py_funcs might print to stdout; keep stdout for responses and send
+  # everything else to stderr.
+  responses = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+  os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+  sys.stdout = sys.stderr
+  serve(sys.stdin, responses)
+
+if __name__ == "__main__":
+  logging.basicConfig(level=logging.INFO,
+                      format=('%(levelname)s|%(asctime)s'
+                              '|%(pathname)s|%(lineno)d| %(message)s'),
+                      datefmt='%Y-%m-%dT%H:%M:%S',
+                      )
+  logging.getLogger().setLevel(logging.INFO)
+  main()
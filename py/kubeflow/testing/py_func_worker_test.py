@@ -0,0 +1,62 @@
+import logging
+import os
+import sys
+
+import pytest
+
+from kubeflow.testing import py_func_worker
+
+# A py_func printing to stdout which mustn't corrupt the responses.
+WORKFLOWS = """
+import sys
+
+def create_workflow(name=None, namespace=None, **kwargs):
+  print("Creating workflow " + name)
+  return {"metadata": {"name": name, "namespace": namespace},
+          "spec": kwargs, "path": sys.path}
+
+def broken_workflow(**_):
+  raise ValueError("some error")
+"""
+
+def test_render(tmpdir):
+  package_dir = os.path.join(str(tmpdir), "some_package")
+  os.makedirs(package_dir)
+  with open(os.path.join(package_dir, "__init__.py"), "w") as hf:
+    hf.write("")
+  with open(os.path.join(package_dir, "workflows.py"), "w") as hf:
+    hf.write(WORKFLOWS)
+
+  # The worker needs to import kubeflow.testing as well as the py_func.
+  testing_py = os.path.abspath(os.path.join(os.path.dirname(__file__), "..",
+                                            ".."))
+  with py_func_worker.PyFuncRenderer([str(tmpdir), testing_py]) as renderer:
+    for i in range(2):
+      workflow = renderer.render("some_package.workflows.create_workflow",
+                                 {"name": "w{0}".format(i),
+                                  "namespace": "kf-ci", "index": i})
+      assert workflow["metadata"] == {"name": "w{0}".format(i),
+                                      "namespace": "kf-ci"}
+      assert workflow["spec"] == {"index": i}
+      assert str(tmpdir) in workflow["path"]
+
+    with pytest.raises(py_func_worker.PyFuncError) as e:
+      renderer.render("some_package.workflows.broken_workflow", {})
+    assert "some error" in str(e.value)
+
+    # The worker keeps serving after an error.
+    workflow = renderer.render("some_package.workflows.create_workflow",
+                               {"name": "last"})
+    assert workflow["metadata"]["name"] == "last"
+
+  assert str(tmpdir) not in sys.path
+
+if __name__ == "__main__":
+  logging.basicConfig(
+      level=logging.INFO,
+      format=('%(levelname)s|%(asctime)s'
+            '|%(pathname)s|%(lineno)d| %(message)s'),
+    datefmt='%Y-%m-%dT%H:%M:%S',
+    )
+  logging.getLogger().setLevel(logging.INFO)
+  pytest.main()
@@ -1,8 +1,7 @@
-import fnmatch
 import logging
 import os
-import subprocess
 
+from kubeflow.testing import pylint_runner
 from kubeflow.testing import util
 
 import pytest
@@ -15,78 +14,52 @@ logging.basicConfig(
 )
 logging.getLogger().setLevel(logging.INFO)
 
-def should_exclude(root, full_dir_excludes):
-  for e in full_dir_excludes:
-    if root.startswith(e):
-      return True
-  return False
-
+# kubeflow_testing is imported as a submodule so we should exclude it
+# TODO(jlewi): We should make this an argument.
+DIR_EXCLUDES = [
+  "dashboard/frontend/node_modules",
+  "kubeflow_testing",
+  "dev-kubeflow-org/ks-app/vendor",
+  # TODO(https://github.com/kubeflow/testing/issues/560) stop skipping
+  # py/kubeflow/testing/cd once we update python & pylint so f style
+  # strings don't generate lint errors.
+  "kubeflow/testing",
+  "release-infra",
+]
+
+def pytest_generate_tests(metafunc):
+  """Generate a test for each file so findings are reported per file."""
+  if "lint_file" not in metafunc.fixturenames:
+    return
+  src_dir = os.path.abspath(metafunc.config.getoption("--src_dir"))
+  files = pylint_runner.find_files(src_dir, DIR_EXCLUDES)
+  metafunc.parametrize("lint_file", files,
+                       ids=[os.path.relpath(f, src_dir) for f in files])
+
+@pytest.fixture(scope="module")
+def lint_results(request):
+  """Lint all the files at once; results are shared by the tests."""
+  src_dir = os.path.abspath(request.config.getoption("--src_dir")) # pylint: disable=redefined-outer-name
+  rcfile = request.config.getoption("--rcfile")
+  if not rcfile:
+    rcfile = os.path.join(src_dir, ".pylintrc")
+  files = pylint_runner.find_files(src_dir, DIR_EXCLUDES)
+  return pylint_runner.lint_files(
+    files, src_dir, rcfile,
+    cache_path=request.config.getoption("--lint_cache"))
 
-def test_lint(record_xml_attribute, src_dir, rcfile): # pylint: disable=redefined-outer-name
+def test_lint(record_xml_attribute, src_dir, lint_results, lint_file): # pylint: disable=redefined-outer-name
   # Override the classname attribute in the junit file.
   # This makes it easy to group related tests in test grid.
   # http://doc.pytest.org/en/latest/usage.html#record-xml-attribute
-  util.set_pytest_junit(record_xml_attribute, "test_py_lint")
-  logging.info('Running test_lint')
-
-  pylint_bin = "pylint"
-
-  # Print out the pylint version because different versions can produce
-  # different results.
-  util.run([pylint_bin, "--version"])
-
-  # kubeflow_testing is imported as a submodule so we should exclude it
-  # TODO(jlewi): We should make this an argument.
-  dir_excludes = [
-    "dashboard/frontend/node_modules",
-    "kubeflow_testing",
-    "dev-kubeflow-org/ks-app/vendor",
-    # TODO(https://github.com/kubeflow/testing/issues/560) stop skipping
-    # py/kubeflow/testing/cd once we update python & pylint so f style
-    # strings don't generate lint errors.
-    "kubeflow/testing",
-    "release-infra",
-  ]
-  full_dir_excludes = [
-    os.path.join(os.path.abspath(src_dir), f) for f in dir_excludes
-  ]
-
-  logging.info("Directories to be excluded: %s", ",".join(full_dir_excludes))
-
-  # TODO(jlewi): Use pathlib once we switch to python3.
-  includes = ["*.py"]
-  failed_files = []
-  if not rcfile:
-    rcfile = os.path.join(src_dir, ".pylintrc")
-
-  for root, dirs, files in os.walk(os.path.abspath(src_dir), topdown=True):
-    # Exclude vendor directories and all sub files.
-    if "vendor" in root.split(os.sep):
-      continue
-
-    # excludes can be done with fnmatch.filter and complementary set,
-    # but it's more annoying to read.
-    if should_exclude(root, full_dir_excludes):
-      logging.info("Skipping directory %s", root)
-      continue
+  name = os.path.relpath(lint_file, os.path.abspath(src_dir))
+  util.set_pytest_junit(record_xml_attribute, "test_py_lint/" + name)
 
-    dirs[:] = [d for d in dirs]
-    for pat in includes:
-      for f in fnmatch.filter(files, pat):
-        full_path = os.path.join(root, f)
-        try:
-          util.run(
-            [pylint_bin, "--rcfile=" + rcfile, full_path], cwd=src_dir)
-        except subprocess.CalledProcessError:
-          failed_files.append(full_path[len(src_dir):])
-  if failed_files:
-    failed_files.sort()
-    logging.error("%s files had lint errors:\n%s", len(failed_files),
-                  "\n".join(failed_files))
-  else:
-    logging.info("No lint issues.")
+  result = lint_results[lint_file]
+  if result.findings:
+    logging.error("%s has lint errors:\n%s", name, "\n".join(result.findings))
 
-  assert not failed_files
+  assert not result.findings, "\n".join(result.findings)
 
 if __name__ == "__main__":
   logging.basicConfig(
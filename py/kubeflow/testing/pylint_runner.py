@@ -0,0 +1,205 @@
+"""Run pylint over a source tree.
+
+Files are split into shards and each shard is linted by a single pylint
+invocation; the shards run concurrently. This avoids paying the pylint startup
+and re-parsing the modules shared by the files for every file.
+
+Checks comparing the files linted together (duplicate-code and
+cyclic-import) are disabled, otherwise a file's findings would depend on
+which files end up in its shard. Each invocation uses a single job since the
+shards already run concurrently.
+
+Results are cached on disk keyed by the contents of the file, the rcfile and
+the pylint version so unchanged files don't need to be linted again.
+Messages depending on other files (e.g. no-member for an imported module)
+are only refreshed when the file itself, the rcfile or pylint changes.
+"""
+import collections
+from concurrent import futures
+import fnmatch
+import hashlib
+import json
+import logging
+import os
+import subprocess
+
+# Findings for a file; cached is True if they were read from the cache.
+LINT_RESULT = collections.namedtuple("LINT_RESULT",
+                                     ("path", "findings", "cached"))
+
+# Flags added to every pylint invocation; see the module docstring.
+SHARD_FLAGS = ["--disable=duplicate-code,cyclic-import", "--jobs=1"]
+
+def should_exclude(root, full_dir_excludes):
+  for e in full_dir_excludes:
+    if root.startswith(e):
+      return True
+  return False
+
+def find_files(src_dir, dir_excludes, includes=None):
+  """Find the files to lint.
+
+  Args:
+    src_dir: The root directory of the source tree.
+    dir_excludes: Directories relative to src_dir to exclude. Vendor
+      directories are always excluded.
+    includes: (Optional) List of glob patterns for the files; defaults to
+      ["*.py"].
+
+  Returns:
+    files: Sorted list with the full paths of the files.
+  """
+  includes = includes or ["*.py"]
+  full_dir_excludes = [
+    os.path.join(os.path.abspath(src_dir), f) for f in dir_excludes
+  ]
+  logging.info("Directories to be excluded: %s", ",".join(full_dir_excludes))
+
+  matches = []
+  for root, _, files in os.walk(os.path.abspath(src_dir), topdown=True):
+    # Exclude vendor directories and all sub files.
+    if "vendor" in root.split(os.sep):
+      continue
+
+    if should_exclude(root, full_dir_excludes):
+      logging.info("Skipping directory %s", root)
+      continue
+
+    for pat in includes:
+      for f in fnmatch.filter(files, pat):
+        matches.append(os.path.join(root, f))
+  return sorted(matches)
+
+def _hash_file(path):
+  with open(path, "rb") as hf:
+    return hashlib.sha256(hf.read()).hexdigest()
+
+class LintCache:
+  """A JSON file mapping files to their cache key and findings."""
+
+  def __init__(self, path):
+    self.path = path
+    self._entries = {}
+    if path and os.path.exists(path):
+      with open(path) as hf:
+        self._entries = json.load(hf)
+      logging.info("Loaded %s cached lint results from %s",
+                   len(self._entries), path)
+
+  def get(self, path, key):
+    entry = self._entries.get(path)
+    if entry and entry["key"] == key:
+      return entry["findings"]
+    return None
+
+  def put(self, path, key, findings):
+    self._entries[path] = {"key": key, "findings": findings}
+
+  def save(self):
+    if not self.path:
+      return
+    cache_dir = os.path.dirname(self.path)
+    if cache_dir and not os.path.exists(cache_dir):
+      os.makedirs(cache_dir)
+    with open(self.path, "w") as hf:
+      json.dump(self._entries, hf)
+
+def _format_message(message):
+  return "{0}:{1}:{2}: {3}: {4} ({5})".format(
+    message.get("path"), message.get("line"), message.get("column"),
+    message.get("message-id"), message.get("message"), message.get("symbol"))
+
+def _lint_shard(pylint_bin, rcfile, src_dir, files):
+  """Lint a shard of files with a single pylint invocation.
+
+  Returns:
+    findings: Dictionary mapping each file to a list of findings.
+    ok: False if pylint failed without reporting its messages.
+  """
+  command = ([pylint_bin, "--rcfile=" + rcfile, "--output-format=json"] +
+             SHARD_FLAGS + files)
+  process = subprocess.run(command, cwd=src_dir, stdout=subprocess.PIPE,
+                           stderr=subprocess.PIPE, check=False)
+  findings = dict((f, []) for f in files)
+  try:
+    stdout = process.stdout.decode().strip()
+    if not stdout and process.returncode:
+      # e.g. a usage error.
+      raise ValueError("pylint didn't report any messages")
+    messages = json.loads(stdout or "[]")
+  except ValueError:
+    error = "pylint exited with code {0}: {1}".format(
+      process.returncode, process.stderr.decode()[-2000:])
+    for f in files:
+      findings[f].append(error)
+    return findings, False
+
+  for m in messages:
+    path = os.path.abspath(os.path.join(src_dir, m.get("path", "")))
+    findings.setdefault(path, []).append(_format_message(m))
+  return findings, True
+
+def pylint_version(pylint_bin="pylint"):
+  """Return the output of pylint --version."""
+  return subprocess.check_output([pylint_bin, "--version"]).decode()
+
+def lint_files(files, src_dir, rcfile, pylint_bin="pylint", cache_path=None,
+               num_shards=None):
+  """Lint files.
+
+  Args:
+    files: List of full paths of the files to lint.
+    src_dir: The root directory of the source tree; pylint is run from it.
+    rcfile: Path to the rcfile.
+    pylint_bin: (Optional) The pylint binary.
+    cache_path: (Optional) Path of the JSON file caching the results. No
+      cache is used if it isn't set.
+    num_shards: (Optional) Number of concurrent pylint invocations; defaults
+      to the number of CPUs.
+
+  Returns:
+    results: Dictionary mapping each file to a LINT_RESULT.
+  """
+  version = pylint_version(pylint_bin)
+  logging.info("pylint version:\n%s", version)
+  rcfile_hash = _hash_file(rcfile) if os.path.exists(rcfile) else ""
+  config_key = hashlib.sha256(
+    (rcfile_hash + version + " ".join(SHARD_FLAGS)).encode()).hexdigest()
+
+  cache = LintCache(cache_path)
+  results = {}
+  keys = {}
+  pending = []
+  for f in files:
+    keys[f] = hashlib.sha256(
+      (_hash_file(f) + config_key).encode()).hexdigest()
+    findings = cache.get(f, keys[f])
+    if findings is None:
+      pending.append(f)
+    else:
+      results[f] = LINT_RESULT(f, findings, True)
+
+  logging.info("Linting %s files; %s files are cached", len(pending),
+               len(results))
+
+  num_shards = min(num_shards or os.cpu_count() or 1, len(pending))
+  # Assign files to shards largest first to balance the shards.
+  shards = [[] for _ in range(num_shards)]
+  for i, f in enumerate(sorted(pending, key=os.path.getsize, reverse=True)):
+    shards[i % num_shards].append(f)
+
+  if shards:
+    with futures.ThreadPoolExecutor(max_workers=num_shards) as executor:
+      shard_futures = [executor.submit(_lint_shard, pylint_bin, rcfile,
+                                       src_dir, s) for s in shards]
+      for shard_future in futures.as_completed(shard_futures):
+        findings, ok = shard_future.result()
+        for f, file_findings in findings.items():
+          if f not in keys:
+            continue
+          results[f] = LINT_RESULT(f, file_findings, False)
+          if ok:
+            cache.put(f, keys[f], file_findings)
+
+  cache.save()
+  return results
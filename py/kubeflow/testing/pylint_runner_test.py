@@ -0,0 +1,124 @@
+import json
+import logging
+import os
+import shutil
+import stat
+import sys
+
+import pytest
+
+from kubeflow.testing import pylint_runner
+
+# A fake pylint reporting a message for every file containing "bad" and
+# recording the files it was invoked on.
+FAKE_PYLINT = """#!{python}
+import json
+import sys
+
+if sys.argv[1] == "--version":
+  print("pylint 0.0.0")
+  sys.exit(0)
+
+files = [a for a in sys.argv[1:] if not a.startswith("--")]
+with open({calls!r}, "a") as hf:
+  hf.write(json.dumps(files) + "\\n")
+
+messages = []
+for f in files:
+  with open(f) as hf:
+    if "bad" in hf.read():
+      messages.append({{"path": f, "line": 1, "column": 0,
+                        "message-id": "C0000", "message": "bad",
+                        "symbol": "bad"}})
+print(json.dumps(messages))
+"""
+
+def _write(path, contents):
+  with open(path, "w") as hf:
+    hf.write(contents)
+
+def test_lint_files(tmpdir):
+  tmpdir = str(tmpdir)
+  calls = os.path.join(tmpdir, "calls.txt")
+  pylint_bin = os.path.join(tmpdir, "pylint")
+  _write(pylint_bin, FAKE_PYLINT.format(python=sys.executable, calls=calls))
+  os.chmod(pylint_bin, os.stat(pylint_bin).st_mode | stat.S_IEXEC)
+
+  src_dir = os.path.join(tmpdir, "src")
+  os.makedirs(os.path.join(src_dir, "vendor"))
+  _write(os.path.join(src_dir, "good.py"), "good")
+  _write(os.path.join(src_dir, "bad.py"), "bad")
+  _write(os.path.join(src_dir, "vendor", "skipped.py"), "bad")
+  rcfile = os.path.join(tmpdir, ".pylintrc")
+  _write(rcfile, "")
+  cache_path = os.path.join(tmpdir, "cache.json")
+
+  files = pylint_runner.find_files(src_dir, [])
+  assert files == [os.path.join(src_dir, "bad.py"),
+                   os.path.join(src_dir, "good.py")]
+
+  results = pylint_runner.lint_files(files, src_dir, rcfile,
+                                     pylint_bin=pylint_bin,
+                                     cache_path=cache_path, num_shards=2)
+  assert [len(results[f].findings) for f in files] == [1, 0]
+  assert not any(r.cached for r in results.values())
+
+  # Only the modified file is linted again.
+  _write(os.path.join(src_dir, "good.py"), "now bad")
+  results = pylint_runner.lint_files(files, src_dir, rcfile,
+                                     pylint_bin=pylint_bin,
+                                     cache_path=cache_path, num_shards=2)
+  assert [len(results[f].findings) for f in files] == [1, 1]
+  assert [results[f].cached for f in files] == [True, False]
+
+  with open(calls) as hf:
+    invocations = [json.loads(l) for l in hf]
+  assert invocations[-1] == [os.path.join(src_dir, "good.py")]
+
+# Two modules with the same body; pylint reports duplicate-code (R0801) when
+# they are linted together.
+DUPLICATED_MODULE = """\"\"\"A module.\"\"\"
+
+def {name}(values):
+  \"\"\"Sum the squares of the even values.\"\"\"
+  total = 0
+  for v in values:
+    if v % 2 == 0:
+      squared = v * v
+      total += squared
+      print("adding", squared)
+      print("total", total)
+  return total
+"""
+
+@pytest.mark.skipif(not shutil.which("pylint"), reason="pylint not installed")
+def test_findings_independent_of_shards(tmpdir):
+  tmpdir = str(tmpdir)
+  src_dir = os.path.join(tmpdir, "src")
+  os.makedirs(src_dir)
+  for name in ["first", "second"]:
+    _write(os.path.join(src_dir, name + ".py"),
+           DUPLICATED_MODULE.format(name=name))
+  rcfile = os.path.join(tmpdir, ".pylintrc")
+  _write(rcfile, "[MESSAGES CONTROL]\ndisable=missing-docstring\n")
+  files = pylint_runner.find_files(src_dir, [])
+
+  findings = []
+  for num_shards in [1, 2]:
+    results = pylint_runner.lint_files(files, src_dir, rcfile,
+                                       num_shards=num_shards)
+    findings.append(dict((f, r.findings) for f, r in results.items()))
+
+  assert findings[0] == findings[1]
+  assert not any("duplicate-code" in m for f in findings[0].values()
+                 for m in f)
+
+if __name__ == "__main__":
+  logging.basicConfig(
+      level=logging.INFO,
+      format=('%(levelname)s|%(asctime)s'
+            '|%(pathname)s|%(lineno)d| %(message)s'),
+    datefmt='%Y-%m-%dT%H:%M:%S',
+    )
+  logging.getLogger().setLevel(logging.INFO)
+  pytest.main()
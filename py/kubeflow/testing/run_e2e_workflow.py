@@ -53,18 +53,22 @@ as a command line argument.
 """
 
 import argparse
+import collections
+from concurrent import futures
 import datetime
-import fnmatch
-import importlib
 import logging
 import os
 import tempfile
+import time
 import six
 from kubernetes import client as k8s_client
 from kubeflow.testing import argo_client
+from kubeflow.testing import k8s_clients
 from kubeflow.testing import ks_util
 from kubeflow.testing import prow_artifacts
+from kubeflow.testing import py_func_worker
 from kubeflow.testing import tekton_client
+from kubeflow.testing import trigger_index
 from kubeflow.testing import util
 import uuid
 import subprocess
@@ -87,6 +91,9 @@ TEST_TARGET_ARG_NAME = "test_target_name"
 TEKTON_CLUSTER_NAME = "kf-ci-v1"
 TEKTON_CLUSTER_ZONE = "us-east1-d"
 
+# The maximum number of py_func workflows to submit concurrently.
+MAX_SUBMIT_WORKERS = 8
+
 if six.PY2:
   FileNotFoundError = IOError
 
@@ -101,13 +108,7 @@ def get_namespace(args):
   return "kubeflow-test-infra"
 
 # imports py_func
-def py_func_import(py_func, kwargs):
-  """Imports and executes the function py_func."""
-  path, create_function = py_func.rsplit('.', 1)
-  logging.info("Importing path %s", path)
-  mod = importlib.import_module(path)
-  met = getattr(mod, create_function)
-  return met(**kwargs)
+py_func_import = py_func_worker.py_func_import
 
 class WorkflowComponent(object): # pylint: disable=too-many-instance-attributes
   """Datastructure to represent a component to submit a workflow."""
@@ -125,20 +126,166 @@ class WorkflowComponent(object): # pylint: disable=too-many-instance-attributes
     self.py_func = data.get("py_func")
     self.kwargs = data.get("kwargs", {})
 
+def _get_ui_url(args, workflow_name):
+  if not args.cloud_provider or args.cloud_provider == "gcp":
+    return ("http://testing-argo.kubeflow.org/workflows/kubeflow-test-infra/{0}"
+            "?tab=workflow".format(workflow_name))
+  return (args.aws_argo_cluster_endpoint + "/workflows/kubeflow-test-infra/{0}"
+          "?tab=workflow".format(workflow_name))
+
+def _create_workflow(workflow):
+  group, version = workflow["apiVersion"].split("/")
+  k8s_co = k8s_client.CustomObjectsApi()
+  result = k8s_co.create_namespaced_custom_object(
+    group=group,
+    version=version,
+    namespace=workflow["metadata"]["namespace"],
+    plural="workflows",
+    body=workflow)
+  logging.info("Created workflow:\n%s", yaml.safe_dump(result))
+
+def _apply_ks_workflow(ks_cmd, app_dir, env, component):
+  # For debugging print out the manifest
+  util.run([ks_cmd, "show", env, "-c", component], cwd=app_dir)
+  util.run([ks_cmd, "apply", env, "-c", component], cwd=app_dir)
+
+def _apply_ks_workflows(namespace, ks_workflows):
+  """Apply the workflows of one ksonnet app one at a time.
+
+  ks isn't safe to run concurrently on the same app; the runs share the
+  app's lib and cache on disk. Each workflow is labeled with
+  argo_client.RUNNER_LABEL after it is applied.
+
+  Returns:
+    submit_seconds: Dictionary mapping the name of each workflow to the
+      number of seconds it took to apply it.
+  """
+  submit_seconds = {}
+  for name, ks_cmd, w in ks_workflows:
+    start = time.time()
+    _apply_ks_workflow(ks_cmd, w.app_dir, name, w.component)
+    argo_client.add_runner_label(namespace, name)
+    submit_seconds[name] = time.time() - start
+  return submit_seconds
+
+def _create_workflow_timed(name, workflow):
+  start = time.time()
+  _create_workflow(workflow)
+  return {name: time.time() - start}
+
+def _submit_workflows(namespace, ks_workflows, py_func_workflows,
+                      extra_py_paths):
+  """Render and submit the Argo workflows concurrently.
+
+  Workflows of different ksonnet apps are applied concurrently; workflows
+  of the same app are applied one at a time.
+
+  py_func workflows are rendered by a single worker process started with
+  PYTHONPATH set to extra_py_paths; see py_func_worker. Each workflow is
+  submitted as soon as it is rendered while the next one renders.
+
+  The workflows are labeled with argo_client.RUNNER_LABEL so
+  argo_client.wait_for_workflows can select them.
+
+  Args:
+    namespace: The namespace of the workflows.
+    ks_workflows: List of (name, ks_cmd, WorkflowComponent) tuples for the
+      ksonnet workflows. The environment named name must have been created
+      with its params set.
+    py_func_workflows: List of WorkflowComponents with a py_func.
+    extra_py_paths: List of paths containing the py_func modules.
+
+  Returns:
+    submit_seconds: Dictionary mapping the name of each workflow to the
+      number of seconds it took to render and submit it.
+  """
+  submit_seconds = {}
+  pending = []
+  by_app = collections.OrderedDict()
+  for name, ks_cmd, w in ks_workflows:
+    by_app.setdefault(w.app_dir, []).append((name, ks_cmd, w))
+
+  with futures.ThreadPoolExecutor(max_workers=MAX_SUBMIT_WORKERS) as executor:
+    for app_workflows in by_app.values():
+      pending.append(executor.submit(_apply_ks_workflows, namespace,
+                                     app_workflows))
+
+    if py_func_workflows:
+      with py_func_worker.PyFuncRenderer(extra_py_paths) as renderer:
+        for w in py_func_workflows:
+          start = time.time()
+          workflow = renderer.render(w.py_func, w.kwargs)
+          labels = workflow["metadata"].setdefault("labels", {})
+          labels[argo_client.RUNNER_LABEL] = argo_client.RUNNER_ID
+          name = workflow["metadata"]["name"]
+          submit_seconds[name] = time.time() - start
+          pending.append(executor.submit(_create_workflow_timed, name,
+                                         workflow))
+
+    for f in futures.as_completed(pending):
+      for name, seconds in f.result().items():
+        submit_seconds[name] = submit_seconds.get(name, 0) + seconds
+        logging.info("Submitted workflow %s in %.1f seconds", name,
+                     submit_seconds[name])
+  return submit_seconds
+
+def get_changed_files(repo_dir, job_type, base_branch_name, pull_base_sha):
+  """Return the list of files modified by a presubmit or postsubmit job.
+
+  Args:
+    repo_dir: The directory the repository is checked out in.
+    job_type: Either presubmit or postsubmit.
+    base_branch_name: The branch a presubmit will be merged into.
+    pull_base_sha: The commit a postsubmit is testing.
+
+  Returns:
+    changed_files: List of paths relative to the root of the repository.
+  """
+  if job_type == "presubmit":
+    util.run(["git", "fetch", "origin", base_branch_name +
+              ":refs/remotes/origin/" + base_branch_name], cwd=repo_dir)
+
+    diff_branch = "remotes/origin/{}".format(base_branch_name)
+    # A...B diffs B against the common ancestor of A and B.
+    diff_command = ["git", "diff", "--name-only", diff_branch + "...HEAD"]
+    try:
+      output = subprocess.check_output(diff_command, cwd=repo_dir,
+                                       universal_newlines=True)
+      return output.splitlines()
+    except subprocess.CalledProcessError:
+      logging.warning("git merge-base failed; see "
+                      "https://github.com/kubeflow/kubeflow/issues/3523. Diff "
+                      "will be computed against the current master and "
+                      "therefore files not changed in the PR might be "
+                      "considered when determining which tests to trigger")
+      diff_command = ["git", "diff", "--name-only", diff_branch]
+  else:
+    # See: https://git-scm.com/docs/git-diff
+    # This syntax compares the commit before pull_base_sha with the commit
+    # at pull_base_sha
+    diff_command = ["git", "diff", "--name-only", pull_base_sha + "^",
+                    pull_base_sha]
+
+  # The output isn't streamed through the logs since changes can touch
+  # thousands of files.
+  output = subprocess.check_output(diff_command, cwd=repo_dir,
+                                   universal_newlines=True)
+  return output.splitlines()
+
 def _get_src_dir():
   return os.path.abspath(os.path.join(__file__, "..",))
 
-def create_started_file(bucket, ui_urls):
+def create_started_file(bucket, ui_urls, submit_seconds=None):
   """Create the started file in gcs for gubernator."""
-  contents = prow_artifacts.create_started(ui_urls)
+  contents = prow_artifacts.create_started(ui_urls, submit_seconds)
 
   target = os.path.join(prow_artifacts.get_gcs_dir(bucket), "started.json")
   util.upload_to_gcs(contents, target)
 
 
-def create_started_file_s3(bucket, ui_urls):
+def create_started_file_s3(bucket, ui_urls, submit_seconds=None):
   """Create the started file in S3 for gubernator."""
-  contents = aws_prow_artifacts.create_started(ui_urls)
+  contents = aws_prow_artifacts.create_started(ui_urls, submit_seconds)
 
   target = os.path.join(aws_prow_artifacts.get_s3_dir(bucket), "started.json")
   aws_util.upload_to_s3(contents, target, "started.json")
@@ -182,42 +329,16 @@ def run(args, file_handler): # pylint: disable=too-many-statements,too-many-bran
   base_branch_name = os.getenv("PULL_BASE_REF")
   pull_base_sha = os.getenv("PULL_BASE_SHA")
 
-  # For presubmit/postsubmit jobs, find the list of files changed by the PR.
-  diff_command = []
-  if job_type == "presubmit":
-    # We need to get a common ancestor for the PR and the base branch
-    cloned_repo_dir = os.path.join(args.repos_dir, repo_owner, repo_name)
-
-    _ = util.run(["git", "fetch", "origin", base_branch_name + ":refs/remotes/origin/" +
-                  base_branch_name], cwd=cloned_repo_dir)
-
-    diff_command = ["git", "diff", "--name-only"]
-    diff_branch = "remotes/origin/{}".format(base_branch_name)
-    try:
-      common_ancestor = util.run(["git", "merge-base", "HEAD", diff_branch],
-                                 cwd=cloned_repo_dir)
-      diff_command.append(common_ancestor)
-    except subprocess.CalledProcessError as e:
-      logging.warning("git merge-base failed; see "
-                      "https://github.com/kubeflow/kubeflow/issues/3523. Diff "
-                      "will be computed against the current master and "
-                      "therefore files not changed in the PR might be "
-                      "considered when determining which tests to trigger")
-      diff_command.append(diff_branch)
-
-  elif job_type == "postsubmit":
-    # See: https://git-scm.com/docs/git-diff
-    # This syntax compares the commit before pull_base_sha with the commit
-    # at pull_base_sha
-    diff_command = ["git", "diff", "--name-only", pull_base_sha + "^", pull_base_sha]
-
   changed_files = []
   if job_type in ("presubmit", "postsubmit"):
-    changed_files = util.run(diff_command,
-      cwd=os.path.join(args.repos_dir, repo_owner, repo_name)).splitlines()
+    changed_files = get_changed_files(
+      os.path.join(args.repos_dir, repo_owner, repo_name), job_type,
+      base_branch_name, pull_base_sha)
 
-  for f in changed_files:
-    logging.info("File %s is modified.", f)
+  logging.info("%s files are modified.", len(changed_files))
+  if args.explain:
+    for f in changed_files:
+      logging.info("File %s is modified.", f)
 
   if args.release:
     generate_env_from_head(args)
@@ -257,6 +378,8 @@ def run(args, file_handler): # pylint: disable=too-many-statements,too-many-bran
 
     util.maybe_activate_service_account()
 
+    # kubectl and ks use the test cluster. The Tekton cluster is only
+    # accessed through its own ApiClient; see k8s_clients.
     util.configure_kubectl(args.project, args.zone, args.cluster)
     util.load_kube_config()
   elif args.cloud_provider == "aws":
@@ -268,9 +391,17 @@ def run(args, file_handler): # pylint: disable=too-many-statements,too-many-bran
   workflow_names = []
   tkn_names = []
   tkn_cleanup_args = []
+  ks_workflows = []
+  ks_versions = set()
+  py_func_workflows = []
   ui_urls = {}
 
-  for w in workflows: # pylint: disable=too-many-nested-blocks
+  # Find the workflows triggered by the modified files.
+  triggers = trigger_index.TriggerIndex(
+    {i: w.include_dirs for i, w in enumerate(workflows) if w.include_dirs}
+  ).match(changed_files, explain=args.explain)
+
+  for index, w in enumerate(workflows): # pylint: disable=too-many-nested-blocks
     # Create the name for the workflow
     # We truncate sha numbers to prevent the workflow name from being too large.
     # Workflow name should not be more than 63 characters because its used
@@ -288,18 +419,11 @@ def run(args, file_handler): # pylint: disable=too-many-statements,too-many-bran
       continue
 
     # If we are scoping this workflow to specific directories, check if any files
-    # modified match the specified regex patterns.
-    dir_modified = False
-    if w.include_dirs:
-      for f in changed_files:
-        for d in w.include_dirs:
-          if fnmatch.fnmatch(f, d):
-            dir_modified = True
-            logging.info("Triggering workflow %s because %s in dir %s is modified.",
-                         w.name, f, d)
-            break
-        if dir_modified:
-          break
+    # modified match the specified patterns.
+    dir_modified = bool(triggers.get(index))
+    for t in triggers.get(index, []):
+      logging.info("Triggering workflow %s because %s matches %s.",
+                   w.name, t.path, t.pattern)
 
     # Only consider modified files when the job is pre or post submit, and if
     # the include_dirs stanza is defined.
@@ -338,19 +462,18 @@ def run(args, file_handler): # pylint: disable=too-many-statements,too-many-bran
       ks_cmd = ks_util.get_ksonnet_cmd(w.app_dir)
 
       # Print ksonnet version
-      util.run([ks_cmd, "version"])
+      if ks_cmd not in ks_versions:
+        ks_versions.add(ks_cmd)
+        util.run([ks_cmd, "version"])
 
-      # Create a new environment for this run
+      # Create a new environment for this run. Environments are added
+      # serially because ks env add modifies app.yaml.
       env = workflow_name
 
       util.run([ks_cmd, "env", "add", env,
                 "--namespace=" + get_namespace(args), "--api-spec=version:v1.8.0"],
                  cwd=w.app_dir)
 
-      util.run([ks_cmd, "param", "set", "--env=" + env, w.component,
-                "name", workflow_name],
-               cwd=w.app_dir)
-
       # Set the prow environment variables.
       prow_env = []
 
@@ -363,46 +486,22 @@ def run(args, file_handler): # pylint: disable=too-many-statements,too-many-bran
           continue
         prow_env.append("{0}={1}".format(v, os.getenv(v)))
 
-      util.run([ks_cmd, "param", "set", "--env=" + env, w.component, "prow_env",
-                ",".join(prow_env)], cwd=w.app_dir)
-      util.run([ks_cmd, "param", "set", "--env=" + env, w.component, "namespace",
-                get_namespace(args)], cwd=w.app_dir)
-      util.run([ks_cmd, "param", "set", "--env=" + env, w.component, "bucket",
-                args.bucket], cwd=w.app_dir)
+      params = {
+        "name": workflow_name,
+        "prow_env": ",".join(prow_env),
+        "namespace": get_namespace(args),
+        "bucket": args.bucket,
+      }
       if args.cloud_provider == "aws":
-        util.run([ks_cmd, "param", "set", "--env=" + env, w.component, "cluster_name",
-                  "eks-cluster-{}".format(uuid.uuid4().hex[0:8])], cwd=w.app_dir)
+        params["cluster_name"] = "eks-cluster-{}".format(uuid.uuid4().hex[0:8])
       if args.release:
-        util.run([ks_cmd, "param", "set", "--env=" + env, w.component, "versionTag",
-                  os.getenv("VERSION_TAG")], cwd=w.app_dir)
-
-      # Set any extra params. We do this in alphabetical order to make it easier to verify in
-      # the unittest.
-      param_names = w.params.keys()
-      if six.PY3:
-        # In python3, dict_keys.sort() not work given
-        # https://docs.python.org/3/whatsnew/3.0.html#views-and-iterators-instead-of-lists
-        param_names = sorted(param_names)
-      else:
-        param_names.sort()
-      for k in param_names:
-        util.run([ks_cmd, "param", "set", "--env=" + env, w.component, k,
-                  "{0}".format(w.params[k])], cwd=w.app_dir)
-
-      # For debugging print out the manifest
-      util.run([ks_cmd, "show", env, "-c", w.component], cwd=w.app_dir)
-      util.run([ks_cmd, "apply", env, "-c", w.component], cwd=w.app_dir)
-
-      if not args.cloud_provider or args.cloud_provider == "gcp":
-        ui_url = ("http://testing-argo.kubeflow.org/workflows/kubeflow-test-infra/{0}"
-                  "?tab=workflow".format(workflow_name))
-      elif args.cloud_provider == "aws":
-        ui_url = (
-          args.aws_argo_cluster_endpoint +
-          "/workflows/kubeflow-test-infra/{0}"
-          "?tab=workflow".format(workflow_name))
-      ui_urls[workflow_name] = ui_url
-      logging.info("URL for workflow: %s", ui_url)
+        params["versionTag"] = os.getenv("VERSION_TAG")
+
+      # Set any extra params.
+      params.update(w.params)
+      ks_util.set_env_params(w.app_dir, env, w.component, params)
+
+      ks_workflows.append((workflow_name, ks_cmd, w))
     elif w.tekton_run:
       pull_revision = None
       if os.getenv("PULL_NUMBER"):
@@ -449,62 +548,25 @@ def run(args, file_handler): # pylint: disable=too-many-statements,too-many-bran
                      w.name, TEST_TARGET_ARG_NAME,
                      w.kwargs[TEST_TARGET_ARG_NAME])
 
-      # TODO(https://github.com/kubeflow/testing/issues/467): We shell out
-      # to e2e_tool in order to dump the Argo workflow to a file which then
-      # reimport. We do this because importing the py_func module appears
-      # to break when we have to dynamically adjust sys.path to insert
-      # new paths. Setting PYTHONPATH before launching python however appears
-      # to work which is why we shell out to e2e_tool.
-      command = ["python", "-m", "kubeflow.testing.e2e_tool", "show",
-                 w.py_func]
-      for k, v in w.kwargs.items():
-        # The fire module turns underscores in parameter names into hyphens
-        # so we convert underscores in parameter names to hyphens
-        command.append("--{0}={1}".format(k.replace("_", "-"), v))
-
-      with tempfile.NamedTemporaryFile(delete=False) as hf:
-        workflow_file = hf.name
-
-      command.append("--output=" + hf.name)
-      env = os.environ.copy()
-      env["PYTHONPATH"] = ":".join(extra_py_paths)
-      util.run(command, env=env)
-
-      with open(workflow_file) as hf:
-        wf_result = yaml.load(hf)
-
-      group, version = wf_result['apiVersion'].split('/')
-      k8s_co = k8s_client.CustomObjectsApi()
-      workflow_name = wf_result["metadata"]["name"]
-      py_func_result = k8s_co.create_namespaced_custom_object(
-        group=group,
-        version=version,
-        namespace=wf_result["metadata"]["namespace"],
-        plural='workflows',
-        body=wf_result)
-      logging.info("Created workflow:\n%s", yaml.safe_dump(py_func_result))
-
-      if not args.cloud_provider or args.cloud_provider == "gcp":
-        ui_url = ("http://testing-argo.kubeflow.org/workflows/kubeflow-test-infra/{0}"
-                "?tab=workflow".format(workflow_name))
-      elif args.cloud_provider == "aws":
-        ui_url = (args.aws_argo_cluster_endpoint + "/workflows/kubeflow-test-infra/{0}"  # pylint: disable=line-too-long
-                "?tab=workflow".format(workflow_name))
-      ui_urls[workflow_name] = ui_url
-      logging.info("URL for workflow: %s", ui_url)
+      py_func_workflows.append(w)
+
+  submit_seconds = _submit_workflows(get_namespace(args), ks_workflows,
+                                     py_func_workflows, extra_py_paths)
+  for name in sorted(submit_seconds):
+    ui_urls[name] = _get_ui_url(args, name)
+    logging.info("URL for workflow: %s", ui_urls[name])
 
   if not args.cloud_provider or args.cloud_provider == "gcp":
     ui_urls.update(tekton_runner.run(
         tekton_client.ClusterInfo(args.project,
                                   TEKTON_CLUSTER_ZONE,
-                                  TEKTON_CLUSTER_NAME),
-        tekton_client.ClusterInfo(args.project, args.zone, args.cluster)))
+                                  TEKTON_CLUSTER_NAME)))
 
     # We delay creating started.json until we know the Argo workflow URLs
-    create_started_file(args.bucket, ui_urls)
+    create_started_file(args.bucket, ui_urls, submit_seconds)
   elif args.cloud_provider == "aws":
     # We delay creating started.json until we know the Argo workflow URLs
-    create_started_file_s3(args.bucket, ui_urls)
+    create_started_file_s3(args.bucket, ui_urls, submit_seconds)
 
   workflow_success = False
   workflow_phase = {}
@@ -515,11 +577,10 @@ def run(args, file_handler): # pylint: disable=too-many-statements,too-many-bran
     results = argo_client.wait_for_workflows(
       get_namespace(args), workflow_names,
       timeout=datetime.timedelta(minutes=180),
-      status_callback=argo_client.log_status
+      status_callback=argo_client.log_status,
+      label_selector=argo_client.RUNNER_SELECTOR,
     )
     if not args.cloud_provider or args.cloud_provider == "gcp":
-      util.configure_kubectl(args.project, "us-east1-d", "kf-ci-v1")
-      util.load_kube_config()
       tekton_results = tekton_runner.join()
     elif args.cloud_provider == "aws":
       aws_util.load_kube_config()
@@ -535,9 +596,8 @@ def run(args, file_handler): # pylint: disable=too-many-statements,too-many-bran
     raise
   finally:
     if not args.cloud_provider or args.cloud_provider == "gcp":
-      util.configure_kubectl(args.project, args.zone, args.cluster)
-      util.load_kube_config()
-      prow_artifacts_dir = prow_artifacts.get_gcs_dir(args.bucket)
+      # Artifacts are written concurrently in batches by the session.
+      artifacts = prow_artifacts.ProwJobArtifacts(args.bucket)
     elif args.cloud_provider == "aws":
       prow_artifacts_dir = aws_prow_artifacts.get_s3_dir(args.bucket)
 
@@ -551,17 +611,18 @@ def run(args, file_handler): # pylint: disable=too-many-statements,too-many-bran
         workflow_success = False
       logging.info("Workflow %s/%s finished phase: %s", get_namespace(args), name, phase)
 
-      if not args.cloud_provider or args.cloud_provider == "gcp":
-        for wf_name, wf_status in workflow_status_yamls.items():
-          util.upload_to_gcs(
-            wf_status,
-            os.path.join(prow_artifacts_dir, '{}.yaml'.format(wf_name)))
-      elif args.cloud_provider == "aws":
-        for wf_name, wf_status in workflow_status_yamls.items():
-          aws_util.upload_to_s3(
-            wf_status,
-            os.path.join(prow_artifacts_dir, '{}.yaml'.format(wf_name)),
-            '{}.yaml'.format(wf_name))
+    if not args.cloud_provider or args.cloud_provider == "gcp":
+      for wf_name, wf_status in workflow_status_yamls.items():
+        artifacts.add('{}.yaml'.format(wf_name), wf_status)
+      # Write the status now so it is uploaded even if the rest of the
+      # finalization fails.
+      artifacts.flush()
+    elif args.cloud_provider == "aws":
+      for wf_name, wf_status in workflow_status_yamls.items():
+        aws_util.upload_to_s3(
+          wf_status,
+          os.path.join(prow_artifacts_dir, '{}.yaml'.format(wf_name)),
+          '{}.yaml'.format(wf_name))
 
     for r in tekton_results:
       condition = "Failed"
@@ -575,16 +636,17 @@ def run(args, file_handler): # pylint: disable=too-many-statements,too-many-bran
       logging.info("Workflow %s/%s finished phase: %s",
                    args.tekton_namespace, name, condition)
 
+    logging.info("K8s API client counters: %s",
+                 k8s_clients.COUNTERS.snapshot())
+
     # Upload logs to GCS. No logs after this point will appear in the
     # file in gcs
     file_handler.flush()
 
     if not args.cloud_provider or args.cloud_provider == "gcp":
-      util.upload_file_to_gcs(
-        file_handler.baseFilename,
-        os.path.join(prow_artifacts_dir, "build-log.txt"))
-      all_tests_success = prow_artifacts.finalize_prow_job(
-        args.bucket, workflow_success, workflow_phase, ui_urls)
+      artifacts.add_file("build-log.txt", file_handler.baseFilename)
+      all_tests_success = artifacts.finalize(workflow_success, workflow_phase,
+                                             ui_urls)
     elif args.cloud_provider == "aws":
       aws_util.upload_file_to_s3(
         file_handler.baseFilename,
@@ -643,6 +705,12 @@ def main(unparsed_args=None):  # pylint: disable=too-many-locals
     default=False,
     help="Whether workflow is for image release")
 
+  parser.add_argument(
+    "--explain",
+    action='store_true',
+    default=False,
+    help="Log every modified file and which workflows each file triggers.")
+
   parser.add_argument(
     "--namespace",
     default=None,
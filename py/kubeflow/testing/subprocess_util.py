@@ -0,0 +1,165 @@
+"""Run subprocesses and stream their output through logging.
+
+The output of the subprocesses is multiplexed with a selector so it is logged
+as soon as it is produced and many commands can run concurrently without a
+thread per command.
+"""
+import collections
+import logging
+import os
+import selectors
+import subprocess
+import time
+
+# Number of bytes to read from a pipe at a time.
+_READ_SIZE = 64 * 1024
+
+class StreamedProcess:
+  """A subprocess whose stdout and stderr are streamed to logging.
+
+  Only the last max_output_lines lines of output are retained.
+  """
+
+  def __init__(self, command, cwd=None, env=None, max_output_lines=None,
+               prefix=""):
+    """Start the subprocess.
+
+    Args:
+      command: List of arguments for the command.
+      cwd: (Optional) Working directory for the command.
+      env: (Optional) Environment for the command.
+      max_output_lines: (Optional) Number of lines of output to retain. None
+        retains all the output.
+      prefix: (Optional) Prefix added to each line that is logged.
+    """
+    logging.info("Running: %s \ncwd=%s", " ".join(command), cwd)
+    self.command = command
+    self.process = subprocess.Popen(
+      command, cwd=cwd, env=env, stdout=subprocess.PIPE,
+      stderr=subprocess.STDOUT)
+    self.lines = collections.deque(maxlen=max_output_lines)
+    self._prefix = prefix
+    self._partial = b""
+
+  def feed(self, data):
+    """Log and retain a chunk of output; an empty chunk marks the end."""
+    if data:
+      lines = (self._partial + data).split(b"\n")
+      self._partial = lines.pop()
+    else:
+      lines = [self._partial] if self._partial else []
+      self._partial = b""
+
+    for line in lines:
+      line = line.decode(errors="replace").strip()
+      self.lines.append(line)
+      logging.info("%s%s", self._prefix, line)
+
+  @property
+  def output(self):
+    return "\n".join(self.lines)
+
+  def kill(self):
+    if self.process.poll() is None:
+      self.process.kill()
+    self.process.wait()
+
+def _stream(processes, deadline):
+  """Stream the output of processes until they finish or the deadline.
+
+  Returns:
+    timed_out: List of processes that didn't finish before the deadline.
+  """
+  with selectors.DefaultSelector() as selector:
+    for p in processes:
+      selector.register(p.process.stdout, selectors.EVENT_READ, p)
+
+    while selector.get_map():
+      remaining = None
+      if deadline is not None:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+          break
+
+      for key, _ in selector.select(remaining):
+        data = os.read(key.fileobj.fileno(), _READ_SIZE)
+        key.data.feed(data)
+        if not data:
+          selector.unregister(key.fileobj)
+          key.fileobj.close()
+
+    timed_out = [key.data for key in list(selector.get_map().values())]
+    for key in list(selector.get_map().values()):
+      selector.unregister(key.fileobj)
+      key.fileobj.close()
+
+  # A process can close its output before it exits.
+  for p in processes:
+    if p in timed_out:
+      continue
+    try:
+      remaining = None if deadline is None else max(deadline - time.time(), 0)
+      p.process.wait(remaining)
+    except subprocess.TimeoutExpired:
+      timed_out.append(p)
+  return timed_out
+
+def run_many(commands, cwd=None, env=None, timeout=None,
+             max_output_lines=None):
+  """Run commands concurrently and stream their output through logging.
+
+  When more than one command is run each line that is logged is prefixed with
+  the index of its command.
+
+  Args:
+    commands: List of commands; each command is a list of arguments.
+    cwd: (Optional) Working directory for the commands.
+    env: (Optional) Environment for the commands.
+    timeout: (Optional) datetime.timedelta; commands still running after the
+      timeout are killed.
+    max_output_lines: (Optional) Number of lines of output to retain for each
+      command. None retains all the output.
+
+  Returns:
+    outputs: List with the output of each command.
+
+  Raises:
+    subprocess.TimeoutExpired: If a command timed out. output contains the
+      tail of its output.
+    subprocess.CalledProcessError: If a command exited with a non zero code.
+      output contains the tail of its output. If several commands fail the
+      error is for the first one.
+  """
+  deadline = None
+  if timeout is not None:
+    deadline = time.time() + timeout.total_seconds()
+
+  processes = []
+  try:
+    for i, command in enumerate(commands):
+      prefix = "[{0}] ".format(i) if len(commands) > 1 else ""
+      processes.append(StreamedProcess(command, cwd=cwd, env=env,
+                                       max_output_lines=max_output_lines,
+                                       prefix=prefix))
+    logging.info("Subprocess output:\n")
+    timed_out = _stream(processes, deadline)
+  except: # pylint: disable=bare-except
+    for p in processes:
+      p.kill()
+    raise
+
+  for p in timed_out:
+    p.kill()
+    p.feed(b"")
+  if timed_out:
+    p = timed_out[0]
+    raise subprocess.TimeoutExpired(" ".join(p.command),
+                                    timeout.total_seconds(), p.output)
+
+  for p in processes:
+    if p.process.returncode != 0:
+      raise subprocess.CalledProcessError(
+        p.process.returncode, "cmd: {0} exited with code {1}".format(
+          " ".join(p.command), p.process.returncode), p.output)
+
+  return [p.output for p in processes]
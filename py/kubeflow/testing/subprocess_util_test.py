@@ -0,0 +1,49 @@
+import datetime
+import logging
+import subprocess
+import sys
+import time
+
+import pytest
+
+from kubeflow.testing import subprocess_util
+
+def _python(code):
+  return [sys.executable, "-c", code]
+
+def test_run_many():
+  start = time.time()
+  outputs = subprocess_util.run_many([
+    _python("import time; time.sleep(.5); print('a'); print('b')"),
+    _python("import time; time.sleep(.5); print('c', end='')"),
+  ])
+  assert outputs == ["a\nb", "c"]
+  # The commands run concurrently.
+  assert time.time() - start < 1
+
+def test_run_many_tail_on_error():
+  with pytest.raises(subprocess.CalledProcessError) as e:
+    subprocess_util.run_many([
+      _python("import sys\nfor i in range(100): print(i)\nsys.exit(3)"),
+    ], max_output_lines=2)
+  assert e.value.returncode == 3
+  assert e.value.output == "98\n99"
+
+def test_run_many_timeout():
+  start = time.time()
+  with pytest.raises(subprocess.TimeoutExpired) as e:
+    subprocess_util.run_many([
+      _python("import time; print('started', flush=True); time.sleep(30)"),
+    ], timeout=datetime.timedelta(seconds=1))
+  assert e.value.output == "started"
+  assert time.time() - start < 10
+
+if __name__ == "__main__":
+  logging.basicConfig(
+      level=logging.INFO,
+      format=('%(levelname)s|%(asctime)s'
+            '|%(pathname)s|%(lineno)d| %(message)s'),
+    datefmt='%Y-%m-%dT%H:%M:%S',
+    )
+  logging.getLogger().setLevel(logging.INFO)
+  pytest.main()
@@ -1,15 +1,15 @@
 # TODO(jlewi): I think this code has to support a mix of python2 and python3
 # because run_e2e_workflow.py might still be using pyhton2.
+from concurrent import futures
+import datetime
 import logging
 import json
 import six
 import fire
 import os
-from multiprocessing import Pool
-import re
 import tempfile
 import traceback
-from xml.etree import ElementTree as ET
+import uuid
 import yaml
 
 if six.PY3:
@@ -22,7 +22,13 @@ from kubernetes import client as k8s_client # pylint: disable=wrong-import-posit
 from kubernetes.client import rest # pylint: disable=wrong-import-position
 from retrying import retry # pylint: disable=wrong-import-position
 
+from dateutil import parser as date_parser # pylint: disable=wrong-import-position
+
+from kubeflow.testing import gcs_sync # pylint: disable=wrong-import-position
+from kubeflow.testing import junit_aggregator # pylint: disable=wrong-import-position
+from kubeflow.testing import k8s_waiter # pylint: disable=wrong-import-position
 from kubeflow.testing import prow_artifacts # pylint: disable=wrong-import-position
+from kubeflow.testing import k8s_clients # pylint: disable=wrong-import-position
 from kubeflow.testing import util # pylint: disable=wrong-import-position
 
 GROUP = "tekton.dev"
@@ -32,6 +38,22 @@ PLURAL = "pipelineruns"
 # Default namespace for running Tekton jobs.
 DEFAULT_TEKTON_NAMESPACE = "kf-ci"
 
+# Default time to wait for a PipelineRun to finish.
+DEFAULT_TIMEOUT = datetime.timedelta(minutes=30)
+
+# Reasons of the PipelineRun condition once the run finished.
+DONE_REASONS = ["Failed", "Succeeded"]
+
+# Label identifying the PipelineRuns started by this process so waits only
+# list and watch those runs rather than every run in the namespace.
+RUNNER_LABEL = "testing.kubeflow.org/runner-id"
+RUNNER_ID = uuid.uuid4().hex[0:12]
+
+# Names of the files junit_parse_and_upload summarizes the junit files in.
+# They mustn't match junit*.xml so they aren't counted twice.
+SUMMARY_JUNIT = "summary_junit.xml"
+SUMMARY_INDEX = "summary_tests.json"
+
 def log_status(workflow):
   """A callback to use with wait_for_workflow."""
   try:
@@ -81,12 +103,16 @@ def handle_retriable_exception(exception):
       # we need to reload the kube config (which refreshes the GCP token).
       # TODO(richardsliu): Remove this workaround when the k8s client issue
       # is resolved.
-      util.load_kube_config()
+      k8s_clients.refresh()
+      k8s_clients.COUNTERS.increment("retries")
       return True
 
   logging.info("Retry on exception: %s; stack trace:\n%s", exception,
                traceback.format_exc())
-  return not isinstance(exception, util.TimeoutError)
+  if isinstance(exception, util.TimeoutError):
+    return False
+  k8s_clients.COUNTERS.increment("retries")
+  return True
 
 
 # Wait 2^x * 1 second between retries up to a max of 10 seconds between
@@ -106,13 +132,7 @@ def get_namespaced_custom_object_with_retries(namespace, name):
     namespace: namespace for the workflow.
     name: name of the workflow.
   """
-  # Due to https://github.com/kubernetes-client/python-base/issues/59,
-  # we need to recreate the API client since it may contain stale auth
-  # tokens.
-  # TODO(richardsliu): Remove this workaround when the k8s client issue
-  # is resolved.
-  client = k8s_client.ApiClient()
-  crd_api = k8s_client.CustomObjectsApi(client)
+  crd_api = k8s_client.CustomObjectsApi(k8s_clients.get_api_client())
   result = crd_api.get_namespaced_custom_object(
     GROUP, VERSION, namespace, PLURAL, name)
   log_status(result)
@@ -220,13 +240,22 @@ class PipelineRunner(object):
                                   pull_revision)
     self.namespace = self.config["metadata"].get("namespace",
                                                  DEFAULT_TEKTON_NAMESPACE)
+    if not self.config["metadata"].get("labels"):
+      self.config["metadata"]["labels"] = {}
+    self.config["metadata"]["labels"][RUNNER_LABEL] = RUNNER_ID
     self.teardown_runner = None
+    # Queue, start and finish timestamps of the PipelineRun once it finished.
+    self.timestamps = {}
 
-  def run(self):
+  def run(self, api_client=None):
     """Runs the Tekton pipeline async.
+
+    Args:
+      api_client: (Optional) K8s ApiClient for the cluster to run the
+        pipeline on; defaults to the shared client for the default cluster.
     """
-    client = k8s_client.ApiClient()
-    crd_api = k8s_client.CustomObjectsApi(client)
+    crd_api = k8s_client.CustomObjectsApi(
+      api_client or k8s_clients.get_api_client())
 
     group, version = self.config["apiVersion"].split("/")
     try:
@@ -267,23 +296,124 @@ class PipelineRunner(object):
     return ("https://kf-ci-v1.endpoints.kubeflow-ci.cloud.goog/tekton/#/namespaces/"
             "{0}/pipelineruns/{1}".format(self.namespace, self.name))
 
-  def wait(self):
-    """Wait for the workflow to finish.
+  def _wait_for_run(self, api_client, timeout):
+    """Wait for this PipelineRun to finish and return it."""
+    if not self.name:
+      raise ValueError("PipelineRun {0} was never created".format(
+        self.config["metadata"]["generateName"]))
+    last_version = []
+
+    def _done(run):
+      if not run:
+        return None
+      version = run["metadata"].get("resourceVersion")
+      if version not in last_version:
+        last_version[:] = [version]
+        log_status(run)
+      conditions = run.get("status", {}).get("conditions") or [{}]
+      if conditions[0].get("reason") in DONE_REASONS:
+        return run
+      return None
+
+    kind = k8s_waiter.CustomResource(GROUP, VERSION, PLURAL)
+    try:
+      run = k8s_waiter.get_waiter(api_client).wait(
+        kind, self.namespace, _done, name=self.name,
+        label_selector="{0}={1}".format(RUNNER_LABEL, RUNNER_ID),
+        timeout=timeout.total_seconds())
+    except k8s_waiter.WaitTimeoutError:
+      raise util.TimeoutError(
+        "Timeout waiting for PipelineRun {0}.{1} to finish".format(
+          self.namespace, self.name))
+
+    status = run.get("status", {})
+    self.timestamps = {
+      "queued": run["metadata"].get("creationTimestamp"),
+      "started": status.get("startTime"),
+      "finished": status.get("completionTime"),
+    }
+    return run
+
+  def wait_future(self, executor, api_client, timeout=DEFAULT_TIMEOUT):
+    """Wait for the pipeline and its teardown pipeline asynchronously.
+
+    The teardown pipeline is started by a callback once this pipeline
+    finishes.
+
+    Args:
+      executor: futures.Executor used to wait for the pipelines. It needs a
+        worker for this pipeline and each of its teardown pipelines.
+      api_client: K8s ApiClient for the cluster running the pipelines.
+      timeout: How long to wait for each pipeline.
+
+    Returns:
+      future: Future whose result is the list of PipelineRuns of this
+        pipeline followed by its teardown pipelines.
     """
-    r = [get_namespaced_custom_object_with_retries(self.namespace, self.name)]
-    if not self.teardown_runner:
-      logging.info("Skipping teardown process for %s, no teardown process found",
-                   self.name)
-      return r
+    results = futures.Future()
 
-    self.teardown_runner.run()
-    r.extend(self.teardown_runner.wait())
-    return r
+    def _on_teardown_done(teardown, runs):
+      if teardown.exception():
+        results.set_exception(teardown.exception())
+      else:
+        results.set_result(runs + teardown.result())
+
+    def _on_done(run):
+      if run.exception():
+        results.set_exception(run.exception())
+        return
+      runs = [run.result()]
+      if not self.teardown_runner:
+        logging.info("Skipping teardown process for %s, no teardown process "
+                     "found", self.name)
+        results.set_result(runs)
+        return
+
+      try:
+        self.teardown_runner.run(api_client)
+      except Exception as e: # pylint: disable=broad-except
+        results.set_exception(e)
+        return
+      teardown = self.teardown_runner.wait_future(executor, api_client,
+                                                  timeout)
+      teardown.add_done_callback(lambda f: _on_teardown_done(f, runs))
+
+    executor.submit(self._wait_for_run, api_client,
+                    timeout).add_done_callback(_on_done)
+    return results
+
+  def num_pipelines(self):
+    """Return the number of pipelines including teardown pipelines."""
+    if not self.teardown_runner:
+      return 1
+    return 1 + self.teardown_runner.num_pipelines()
 
-# Simple function to invoke wait. Pool is not able to take as input lambda
-# functions.
-def wait_(runner):
-  return runner.wait()
+  def wait(self, timeout=DEFAULT_TIMEOUT, api_client=None):
+    """Wait for the workflow and its teardown workflow to finish.
+    """
+    api_client = api_client or k8s_clients.get_api_client()
+    with futures.ThreadPoolExecutor(
+        max_workers=self.num_pipelines()) as executor:
+      return self.wait_future(executor, api_client, timeout).result()
+
+def _log_timestamps(runners):
+  """Log the queue, start and finish timestamps of the PipelineRuns."""
+  lines = []
+  for r in runners:
+    while r:
+      t = r.timestamps
+      line = "{0}.{1}: queued={2} started={3} finished={4}".format(
+        r.namespace, r.name, t.get("queued"), t.get("started"),
+        t.get("finished"))
+      if all(t.get(k) for k in ["queued", "started", "finished"]):
+        queued, started, finished = [date_parser.parse(t[k]) for k in
+                                     ["queued", "started", "finished"]]
+        line += " queue_seconds={0:.0f} run_seconds={1:.0f}".format(
+          (started - queued).total_seconds(),
+          (finished - started).total_seconds())
+      lines.append(line)
+      r = r.teardown_runner
+  logging.info("Tekton PipelineRun timestamps:\n%s", "\n".join(lines))
 
 class ClusterInfo(object):
   """Simple data carrier to provide access to the cluster running test.
@@ -298,31 +428,33 @@ class TektonRunner(object):
   """
   def __init__(self):
     self.workflows = []
+    # K8s ApiClient for the cluster the pipelines run on; set by run.
+    self.api_client = None
 
   def append(self, runner):
     self.workflows.append(runner)
 
-  def run(self, tekton_cluster_info, current_cluster_info):
+  def run(self, tekton_cluster_info):
     """Kicks off all the Tekton pipelines.
     Args:
       tekton_cluster_info: ClusterInfo having the info to run pipelines on.
       Tekton runs on different cluster right now.
-      current_cluster_info: Current cluster info.
 
     Returns:
       a list of UI urls.
     """
     urls = dict()
+    if not self.workflows:
+      return urls
+
     try:
       # Currently only tekton tests run in kf-ci-v1.
-      util.configure_kubectl(tekton_cluster_info.project,
-                             tekton_cluster_info.zone,
-                             tekton_cluster_info.cluster_name)
-      # util.configure_kubectl(project, "us-east1-d", "kf-ci-v1")
-      util.load_kube_config()
+      self.api_client = k8s_clients.get_cluster_api_client(
+        tekton_cluster_info.project, tekton_cluster_info.zone,
+        tekton_cluster_info.cluster_name)
 
       for w in self.workflows:
-        w.run()
+        w.run(self.api_client)
         urls[w.name] = w.ui_url
         if w.teardown_runner:
           urls[w.teardown_runner.name] = w.teardown_runner.ui_url
@@ -330,25 +462,33 @@ class TektonRunner(object):
     except Exception as e: # pylint: disable=broad-except
       logging.error("Error when starting Tekton workflow: %s;\nstacktrace:\n%s",
                     e, traceback.format_exc())
-    finally:
-      # Restore kubectl
-      util.configure_kubectl(current_cluster_info.project,
-                             current_cluster_info.zone,
-                             current_cluster_info.cluster_name)
-      util.load_kube_config()
 
     return urls
 
-  def join(self):
+  def join(self, timeout=DEFAULT_TIMEOUT):
     """Join all the running pipelines and returns the results.
+
+    All pipelines are waited on by threads sharing a single watch on
+    PipelineRuns.
+
+    Raises:
+      The first exception raised waiting for a pipeline; once all pipelines
+      finished.
     """
     if not self.workflows:
       return []
-    p = Pool(len(self.workflows))
-    results = p.map(wait_, self.workflows)
+
+    api_client = self.api_client or k8s_clients.get_api_client()
+    num_pipelines = sum(w.num_pipelines() for w in self.workflows)
+    with futures.ThreadPoolExecutor(max_workers=num_pipelines) as executor:
+      pending = [w.wait_future(executor, api_client, timeout)
+                 for w in self.workflows]
+      futures.wait(pending)
+
+    _log_timestamps(self.workflows)
     flattened = []
-    for r in results:
-      flattened.extend(r)
+    for f in pending:
+      flattened.extend(f.result())
     return flattened
 
 class CLI(object):
@@ -366,10 +506,12 @@ class CLI(object):
       artifacts_dir: Directory containing artifacts
       outputs_gcs: GCS path to upload to. If empty no artifacts will
         be uploaded.
+
+    Returns:
+      manifest: List of gcs_sync.UPLOAD_RESULT for the uploaded files.
     """
     logging.info("Uploading %s to GCS %s", artifacts_dir, output_gcs)
-    util.maybe_activate_service_account()
-    util.run(["gsutil", "-m", "rsync", "-r", artifacts_dir, output_gcs])
+    return gcs_sync.sync_dir(artifacts_dir, output_gcs)
 
   @staticmethod
   def junit_parse_and_upload(artifacts_dir, output_gcs):
@@ -381,54 +523,39 @@ class CLI(object):
     then report the GitHub status check as failed because the pipeline
     didn't run successfully.
 
+    The junit files are parsed while the artifacts are uploaded. A junit
+    file merging all of them (SUMMARY_JUNIT) and a JSON file with the
+    result of every test (SUMMARY_INDEX) are uploaded to output_gcs too.
+
     Args:
       artifacts_dir: Directory containing artifacts
       outputs_gcs: GCS path to upload to. If empty no artifacts will
         be uploaded.
     """
-    CLI.upload(artifacts_dir, output_gcs)
-
-    logging.info("Walking through directory: %s", artifacts_dir)
-    junit_pattern = re.compile(r"junit.*\.xml")
-    failed_num = 0
-    found_xml = False
-    for root, _, files in os.walk(artifacts_dir):
-      for filename in files:
-        if not junit_pattern.match(filename):
-          continue
-        found_xml = True
-        logging.info("Parsing JUNIT: %s", filename)
-        tree = ET.parse(os.path.join(root, filename))
-        root = tree.getroot()
-        failed_num = int(root.attrib.get(
-            "errors", "0")) + int(root.attrib.get("failures", "0"))
-
-        for testcase in root:
-          testname = testcase.attrib.get("name", "unknown-test")
-          # Detect error and failures from testcase
-          failed_num += int(testcase.attrib.get(
-            "errors", "0")) +int(testcase.attrib.get("failures", "0"))
-          has_failure = False
-          for failure in testcase:
-            has_failure = True
-            failure_element = failure.find('failure')
-            if failure_element is not None:
-              logging.error("%s has failure: %s",
-                            testname,
-                            failure_element.attrib.get("message", "message not found"))
-            else:
-              logging.error("%s has failure: %s",
-                            testname,
-                            failure.attrib.get("message", "message not found"))
-
-          if not has_failure:
-            logging.info("%s has passed all the tests.", testname)
-
-    if not found_xml:
+    with futures.ThreadPoolExecutor(max_workers=1) as executor:
+      upload = executor.submit(CLI.upload, artifacts_dir, output_gcs)
+
+      logging.info("Walking through directory: %s", artifacts_dir)
+      aggregator = junit_aggregator.JunitAggregator()
+      for path in junit_aggregator.find_junit_files(artifacts_dir):
+        logging.info("Parsing JUNIT: %s", path)
+        aggregator.add_file(path, os.path.relpath(path, artifacts_dir))
+
+      upload.result()
+
+    if not aggregator.num_files:
       raise ValueError("No JUNIT artifats found in " + artifacts_dir)
-    if failed_num:
+
+    aggregator.log_results()
+    summary_dir = tempfile.mkdtemp()
+    aggregator.write_junit(os.path.join(summary_dir, SUMMARY_JUNIT))
+    aggregator.write_index(os.path.join(summary_dir, SUMMARY_INDEX))
+    gcs_sync.sync_dir(summary_dir, output_gcs)
+
+    if aggregator.num_failed:
       raise ValueError(
-          "This task is failed with {0} errors/failures.".format(failed_num))
+          "This task is failed with {0} errors/failures.".format(
+            aggregator.num_failed))
 
   @staticmethod
   def create_image_file(image_name, digest_file, output):
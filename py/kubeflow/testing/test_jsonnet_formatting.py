@@ -3,14 +3,19 @@ test_jsonnet_formatting verfies that all jsonnet
 files in args.src_dir are formatted
 """
 import argparse
-import filecmp
+from concurrent import futures
+import difflib
 import fnmatch
+import hashlib
 import itertools
+import json
 import logging
 import os
-import tempfile
+import subprocess
 
-from kubeflow.testing import test_helper, util
+from kubeflow.testing import test_helper
+
+FMT_OPTIONS = ["--string-style", "d", "--comment-style", "s", "--indent", "2"]
 
 
 def parse_args():
@@ -26,20 +31,97 @@ def parse_args():
     default="",
     type=str,
     help="Comma separated directories which should be excluded from the test")
+  parser.add_argument(
+    "--cache_file",
+    default="",
+    type=str,
+    help=("Path of a JSON file caching the files that are formatted. Files "
+          "unchanged since the last run are skipped."))
+  parser.add_argument(
+    "--max_workers",
+    default=os.cpu_count() or 1,
+    type=int,
+    help="Number of files to format concurrently.")
   args, _ = parser.parse_known_args()
   return args
 
 
+def format_diff(file_name):
+  """Return a unified diff between a file and the formatted file.
+
+  The contents are compared as bytes so e.g. CRLF line endings are reported.
+
+  Returns:
+    diff: The diff or an empty string if the file is formatted.
+  """
+  with open(file_name, "rb") as hf:
+    contents = hf.read()
+  formatted = subprocess.check_output(
+    ["jsonnet", "fmt", file_name] + FMT_OPTIONS)
+  if formatted == contents:
+    return ""
+  # Lines keep their line endings so lines ending in CRLF show up as changed.
+  diff = "".join(difflib.unified_diff(
+    contents.decode(errors="replace").splitlines(True),
+    formatted.decode(errors="replace").splitlines(True),
+    fromfile=file_name, tofile=file_name + " (formatted)"))
+  return diff or "{0} differs from the formatted file\n".format(file_name)
+
 def is_formatted(file_name):
-  outfile = tempfile.NamedTemporaryFile(delete=False).name
-  util.run([
-    "jsonnet", "fmt", file_name, "--output-file", outfile, "--string-style",
-    "d", "--comment-style", "s", "--indent", "2"
-  ])
-  try:
-    return filecmp.cmp(file_name, outfile)
-  finally:
-    os.remove(outfile)
+  return not format_diff(file_name)
+
+def _file_hash(file_name):
+  with open(file_name, "rb") as hf:
+    return hashlib.sha256(hf.read()).hexdigest()
+
+class FormattedCache(object):
+  """Cache of the files known to be formatted.
+
+  A file is skipped if its mtime and size or else its hash didn't change
+  since it was found to be formatted with the same version of jsonnet and
+  options.
+  """
+
+  def __init__(self, path, version):
+    self.path = path
+    self.version = version
+    self._entries = {}
+    if path and os.path.exists(path):
+      with open(path) as hf:
+        cached = json.load(hf)
+      if cached.get("version") == version:
+        self._entries = cached.get("files", {})
+
+  def is_formatted(self, file_name):
+    entry = self._entries.get(file_name)
+    if not entry:
+      return False
+    stat = os.stat(file_name)
+    if (entry["mtime"] == stat.st_mtime and
+        entry.get("size") == stat.st_size):
+      return True
+    if entry["hash"] == _file_hash(file_name):
+      entry["mtime"] = stat.st_mtime
+      entry["size"] = stat.st_size
+      return True
+    return False
+
+  def add(self, file_name):
+    stat = os.stat(file_name)
+    self._entries[file_name] = {
+      "mtime": stat.st_mtime,
+      "size": stat.st_size,
+      "hash": _file_hash(file_name),
+    }
+
+  def remove(self, file_name):
+    self._entries.pop(file_name, None)
+
+  def save(self):
+    if not self.path:
+      return
+    with open(self.path, "w") as hf:
+      json.dump({"version": self.version, "files": self._entries}, hf)
 
 def is_excluded(file_name, exclude_dirs):
   for exclude_dir in exclude_dirs:
@@ -53,13 +135,34 @@ def test_jsonnet_formatting(test_case): # pylint: disable=redefined-outer-name
   exclude_dirs = []
   if args.exclude_dirs:
     exclude_dirs = args.exclude_dirs.split(',')
+
+  version = subprocess.check_output(["jsonnet", "--version"]).decode()
+  cache = FormattedCache(args.cache_file,
+                         " ".join([version.strip()] + FMT_OPTIONS))
+
+  files = []
   for dirpath, _, filenames in os.walk(args.src_dir):
     jsonnet_files = fnmatch.filter(filenames, '*.jsonnet')
     libsonnet_files = fnmatch.filter(filenames, '*.libsonnet')
     for file_name in itertools.chain(jsonnet_files, libsonnet_files):
       full_path = os.path.join(dirpath, file_name)
-      if not is_excluded(full_path, exclude_dirs) and not is_formatted(full_path):
-        test_case.add_failure_info("ERROR : {0} is not formatted".format(full_path))
+      if is_excluded(full_path, exclude_dirs) or cache.is_formatted(full_path):
+        continue
+      files.append(full_path)
+
+  logging.info("Checking formatting of %s files", len(files))
+  with futures.ThreadPoolExecutor(max_workers=args.max_workers) as executor:
+    diffs = dict(zip(files, executor.map(format_diff, files)))
+
+  for full_path in sorted(files):
+    if diffs[full_path]:
+      cache.remove(full_path)
+      logging.error("%s is not formatted:\n%s", full_path, diffs[full_path])
+      test_case.add_failure_info("ERROR : {0} is not formatted\n{1}".format(
+        full_path, diffs[full_path]))
+    else:
+      cache.add(full_path)
+  cache.save()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,67 @@
+import logging
+import os
+from unittest import mock
+
+import pytest
+
+from kubeflow.testing import test_jsonnet_formatting
+
+FORMATTED = b'{\n  a: "b",\n}\n'
+
+def _write(path, contents):
+  with open(path, "wb") as hf:
+    hf.write(contents)
+
+@mock.patch("kubeflow.testing.test_jsonnet_formatting.subprocess.check_output",
+            return_value=FORMATTED)
+def test_format_diff(_check_output, tmpdir):
+  path = str(tmpdir.join("a.jsonnet"))
+  _write(path, FORMATTED)
+  assert test_jsonnet_formatting.format_diff(path) == ""
+
+  _write(path, b'{\n  a: \'b\',\n}\n')
+  diff = test_jsonnet_formatting.format_diff(path)
+  assert "-  a: 'b'," in diff
+  assert '+  a: "b",' in diff
+
+  # Line endings matter.
+  _write(path, FORMATTED.replace(b"\n", b"\r\n"))
+  assert test_jsonnet_formatting.format_diff(path)
+
+def test_formatted_cache(tmpdir):
+  path = str(tmpdir.join("a.jsonnet"))
+  cache_path = str(tmpdir.join("cache.json"))
+  _write(path, FORMATTED)
+
+  cache = test_jsonnet_formatting.FormattedCache(cache_path, "v1")
+  assert not cache.is_formatted(path)
+  cache.add(path)
+  cache.save()
+
+  cache = test_jsonnet_formatting.FormattedCache(cache_path, "v1")
+  assert cache.is_formatted(path)
+
+  # A different version of jsonnet or options invalidates the cache.
+  assert not test_jsonnet_formatting.FormattedCache(
+    cache_path, "v2").is_formatted(path)
+
+  # A change keeping the mtime is detected by the size.
+  stat = os.stat(path)
+  _write(path, FORMATTED + b"\n")
+  os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+  assert not cache.is_formatted(path)
+
+  # The same contents with a new mtime are matched by the hash.
+  _write(path, FORMATTED)
+  assert cache.is_formatted(path)
+
+if __name__ == "__main__":
+  logging.basicConfig(
+      level=logging.INFO,
+      format=('%(levelname)s|%(asctime)s'
+              '|%(pathname)s|%(lineno)d| %(message)s'),
+      datefmt='%Y-%m-%dT%H:%M:%S',
+      )
+  logging.getLogger().setLevel(logging.INFO)
+
+  pytest.main()
@@ -1,18 +1,9 @@
 """TODO(jlewi): This is deprecated. New code should use py_lint_test.py"""
 import argparse
-import fnmatch
 import logging
 import os
-import subprocess
 
-from kubeflow.testing import test_helper, util
-
-
-def should_exclude(root, full_dir_excludes):
-  for e in full_dir_excludes:
-    if root.startswith(e):
-      return True
-  return False
+from kubeflow.testing import pylint_runner, test_helper
 
 
 def parse_args():
@@ -29,6 +20,12 @@ def parse_args():
     default="",
     type=str,
     help=("Path to the rcfile."))
+
+  parser.add_argument(
+    "--lint_cache",
+    default="",
+    type=str,
+    help=("Path of a JSON file caching lint results."))
   args, _ = parser.parse_known_args()
   return args
 
@@ -37,9 +34,6 @@ def test_lint(test_case): # pylint: disable=redefined-outer-name
   logging.warning('test_py_lint.py is deprecated in favor of '
                   'py_lint_test.py which uses pytest')
   args = parse_args()
-  # Print out the pylint version because different versions can produce
-  # different results.
-  util.run(["pylint", "--version"])
 
   # kubeflow_testing is imported as a submodule so we should exclude it
   # TODO(jlewi): We should make this an argument.
@@ -49,41 +43,26 @@ def test_lint(test_case): # pylint: disable=redefined-outer-name
     "dev-kubeflow-org/ks-app/vendor",
     "release-infra",
   ]
-  full_dir_excludes = [
-    os.path.join(os.path.abspath(args.src_dir), f) for f in dir_excludes
-  ]
 
-  # TODO(jlewi): Use pathlib once we switch to python3.
-  includes = ["*.py"]
-  failed_files = []
   if not args.rcfile:
     rc_file = os.path.join(args.src_dir, ".pylintrc")
   else:
     rc_file = args.rcfile
 
-  for root, dirs, files in os.walk(os.path.abspath(args.src_dir), topdown=True):
-    # Exclude vendor directories and all sub files.
-    if "vendor" in root.split(os.sep):
-      continue
-
-    # excludes can be done with fnmatch.filter and complementary set,
-    # but it's more annoying to read.
-    if should_exclude(root, full_dir_excludes):
-      continue
+  files = pylint_runner.find_files(args.src_dir, dir_excludes)
+  results = pylint_runner.lint_files(files, args.src_dir, rc_file,
+                                     cache_path=args.lint_cache)
+  failed_files = []
+  findings = []
+  for full_path in files:
+    if results[full_path].findings:
+      failed_files.append(full_path[len(args.src_dir):])
+      findings.extend(results[full_path].findings)
 
-    dirs[:] = [d for d in dirs]
-    for pat in includes:
-      for f in fnmatch.filter(files, pat):
-        full_path = os.path.join(root, f)
-        try:
-          util.run(
-            ["pylint", "--rcfile=" + rc_file, full_path], cwd=args.src_dir)
-        except subprocess.CalledProcessError:
-          failed_files.append(full_path[len(args.src_dir):])
   if failed_files:
     failed_files.sort()
-    test_case.add_failure_info("Files with lint issues: {0}".format(
-      ", ".join(failed_files)))
+    test_case.add_failure_info("Files with lint issues: {0}\n{1}".format(
+      ", ".join(failed_files), "\n".join(findings)))
     logging.error("%s files had lint errors:\n%s", len(failed_files),
                   "\n".join(failed_files))
   else:
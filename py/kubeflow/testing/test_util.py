@@ -178,3 +178,13 @@ def get_num_failures(xml_string):
 
   e = ElementTree.fromstring(xml_string)
   return int(e.attrib.get("failures", 0))
+
+def get_num_failures_from_stream(stream):
+  """Return the number of failures based on a file like object with the XML.
+
+  Parsing stops as soon as the root element has been read so only the start
+  of the file needs to be available.
+  """
+  for _, e in ElementTree.iterparse(stream, events=("start",)):
+    return int(e.attrib.get("failures", 0))
+  return 0
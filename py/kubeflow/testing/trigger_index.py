@@ -0,0 +1,111 @@
+"""Decide which workflows a change triggers based on the files it modifies.
+
+Workflows can restrict the changes they run for with include_dirs; a list of
+fnmatch patterns matched against the paths of the modified files. Rather
+than matching every file against every pattern of every workflow,
+TriggerIndex stores the patterns in a prefix trie keyed by the literal
+prefix of each pattern (the part before the first wildcard). Each file only
+has to be matched against the patterns whose prefix it starts with, and each
+pattern is only matched until it has triggered its workflows.
+"""
+
+import collections
+import fnmatch
+import re
+
+# Characters with a special meaning in fnmatch patterns.
+WILDCARDS = "*?["
+
+# A file modified by the change triggering a workflow because it matches
+# pattern.
+TRIGGER = collections.namedtuple("TRIGGER", ("workflow", "pattern", "path"))
+
+def _literal_prefix(pattern):
+  for i, c in enumerate(pattern):
+    if c in WILDCARDS:
+      return pattern[:i]
+  return pattern
+
+class _Node(object):
+  """A node in the prefix trie."""
+
+  __slots__ = ("children", "patterns")
+
+  def __init__(self):
+    self.children = {}
+    # The patterns whose literal prefix ends at this node.
+    self.patterns = []
+
+class TriggerIndex(object):
+  """An index of the include_dirs patterns of several workflows."""
+
+  def __init__(self, include_dirs):
+    """Build the index.
+
+    Args:
+      include_dirs: Dictionary mapping a key identifying each workflow to
+        its list of fnmatch patterns.
+    """
+    self._root = _Node()
+    self._workflows = collections.defaultdict(list)
+    self._regexes = {}
+
+    for workflow, patterns in include_dirs.items():
+      for pattern in patterns:
+        if pattern not in self._regexes:
+          self._regexes[pattern] = re.compile(fnmatch.translate(pattern))
+          self._node(_literal_prefix(pattern)).patterns.append(pattern)
+        self._workflows[pattern].append(workflow)
+
+    self._num_workflows = len(include_dirs)
+
+  def _node(self, prefix):
+    node = self._root
+    for c in prefix:
+      node = node.children.setdefault(c, _Node())
+    return node
+
+  def _candidates(self, path):
+    """Yield the patterns whose literal prefix path starts with."""
+    node = self._root
+    for pattern in node.patterns:
+      yield pattern
+    for c in path:
+      node = node.children.get(c)
+      if node is None:
+        return
+      for pattern in node.patterns:
+        yield pattern
+
+  def match(self, paths, explain=False):
+    """Find the workflows triggered by paths.
+
+    Args:
+      paths: Iterable of the paths of the modified files.
+      explain: If true return every file triggering each workflow rather
+        than just the first.
+
+    Returns:
+      triggers: Dictionary mapping the key of each triggered workflow to a
+        list of TRIGGERs.
+    """
+    triggers = collections.defaultdict(list)
+    # Patterns which already triggered their workflows. Unless we are
+    # explaining there's no need to match them again.
+    matched = set()
+    for path in paths:
+      for pattern in self._candidates(path):
+        if pattern in matched and not explain:
+          continue
+        if not self._regexes[pattern].match(path):
+          continue
+        matched.add(pattern)
+        for workflow in self._workflows[pattern]:
+          if triggers[workflow] and not explain:
+            continue
+          triggers[workflow].append(TRIGGER(workflow, pattern, path))
+
+      if not explain and len(triggers) == self._num_workflows:
+        break
+
+    return dict(triggers)
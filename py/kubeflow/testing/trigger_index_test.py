@@ -0,0 +1,60 @@
+import fnmatch
+import logging
+
+import pytest
+
+from kubeflow.testing import trigger_index
+
+INCLUDE_DIRS = {
+  "tf": ["tensorflow/*"],
+  "docs": ["docs/*.md", "README.md"],
+  "any-yaml": ["*.yaml"],
+  "py": ["py/kubeflow/testing/*", "py/kubeflow/tests/[a-c]*_test.py"],
+}
+
+PATHS = [
+  "README.md",
+  "docs/setup.md",
+  "docs/setup.txt",
+  "py/kubeflow/tests/argo_client_test.py",
+  "py/kubeflow/tests/util_test.py",
+  "tensorflow/k8s/job.yaml",
+  "tensorflowx/a.py",
+]
+
+def test_match_is_same_as_fnmatch():
+  for i in range(len(PATHS) + 1):
+    paths = PATHS[i:]
+    expected = set()
+    for name, patterns in INCLUDE_DIRS.items():
+      if any(fnmatch.fnmatch(p, d) for p in paths for d in patterns):
+        expected.add(name)
+
+    index = trigger_index.TriggerIndex(INCLUDE_DIRS)
+    assert set(index.match(paths)) == expected
+
+def test_match_explain():
+  index = trigger_index.TriggerIndex(INCLUDE_DIRS)
+
+  triggers = index.match(PATHS)
+  assert triggers["docs"] == [
+    trigger_index.TRIGGER("docs", "README.md", "README.md")]
+
+  triggers = index.match(PATHS, explain=True)
+  assert triggers["docs"] == [
+    trigger_index.TRIGGER("docs", "README.md", "README.md"),
+    trigger_index.TRIGGER("docs", "docs/*.md", "docs/setup.md"),
+  ]
+  assert [t.path for t in triggers["any-yaml"]] == ["tensorflow/k8s/job.yaml"]
+  assert [t.path for t in triggers["py"]] == [
+    "py/kubeflow/tests/argo_client_test.py"]
+
+if __name__ == "__main__":
+  logging.basicConfig(
+      level=logging.INFO,
+      format=('%(levelname)s|%(asctime)s'
+            '|%(pathname)s|%(lineno)d| %(message)s'),
+    datefmt='%Y-%m-%dT%H:%M:%S',
+    )
+  logging.getLogger().setLevel(logging.INFO)
+  pytest.main()
@@ -1,12 +1,10 @@
 """Utilities used by our python scripts for building and releasing."""
+# pylint: disable=too-many-lines
 import datetime
 import logging
-import multiprocessing
 import os
 import re
 import shutil
-import six
-import subprocess
 import tempfile
 import time
 import urllib
@@ -16,7 +14,6 @@ if not os.getenv("CLOUD_PROVIDER") or os.getenv("CLOUD_PROVIDER") == "gcp":
   import google.auth
   import google.auth.transport
   import google.auth.transport.requests
-  from google.cloud import storage  # pylint: disable=no-name-in-module
   from googleapiclient import errors
 
 from kubernetes import client as k8s_client
@@ -25,6 +22,11 @@ from kubernetes.config import kube_config
 from kubernetes.client import configuration as kubernetes_configuration
 from kubernetes.client import rest
 
+from kubeflow.testing import gcs_store
+from kubeflow.testing import git_mirror
+from kubeflow.testing import k8s_waiter
+from kubeflow.testing import subprocess_util
+
 # Default name for the repo organization and name.
 # This should match the values used in Go imports.
 MASTER_REPO_OWNER = "tensorflow"
@@ -33,61 +35,54 @@ MASTER_REPO_NAME = "k8s"
 # How long to wait in seconds for requests to the ApiServer
 TIMEOUT = 120
 
+# Number of lines of output to retain for chatty commands whose output is
+# only needed to diagnose errors.
+ERROR_OUTPUT_LINES = 1000
+
 def run(command,
         cwd=None,
         env=None,
-        polling_interval=datetime.timedelta(seconds=1)):
+        polling_interval=datetime.timedelta(seconds=1),
+        timeout=None,
+        max_output_lines=None):
   """Run a subprocess.
 
-  Any subprocess output is emitted through the logging modules.
+  Any subprocess output is streamed through the logging modules as it is
+  produced.
+
+  Args:
+    command: List of arguments for the command.
+    cwd: (Optional) Working directory.
+    env: (Optional) Environment for the command.
+    polling_interval: Unused; output is streamed without polling. Kept for
+      backwards compatibility.
+    timeout: (Optional) datetime.timedelta; the command is killed and
+      subprocess.TimeoutExpired is raised if it runs longer than this.
+    max_output_lines: (Optional) Only retain the last max_output_lines lines
+      of output. Use this for commands producing lots of output whose output
+      is only needed to diagnose errors.
 
   Returns:
     output: A string containing the output.
+
+  Raises:
+    subprocess.CalledProcessError: If the command exits with a non zero code.
   """
-  logging.info("Running: %s \ncwd=%s", " ".join(command), cwd)
+  del polling_interval
+  return run_many([command], cwd=cwd, env=env, timeout=timeout,
+                  max_output_lines=max_output_lines)[0]
 
+def run_many(commands, cwd=None, env=None, timeout=None,
+             max_output_lines=None):
+  """Run several subprocesses concurrently.
+
+  See subprocess_util.run_many.
+  """
   if not env:
     env = os.environ
-  else:
-    keys = sorted(env.keys())
-
-    lines = []
-    for k in keys:
-      lines.append("{0}={1}".format(k, env[k]))
-
-  process = subprocess.Popen(
-    command, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
 
-  logging.info("Subprocess output:\n")
-  output = []
-  while process.poll() is None:
-    process.stdout.flush()
-    for line in iter(process.stdout.readline, b''):
-      if six.PY2:
-        line = line.strip()
-      else:
-        line = line.decode().strip()
-
-      output.append(line)
-      logging.info(line)
-
-    time.sleep(polling_interval.total_seconds())
-
-  process.stdout.flush()
-  for line in iter(process.stdout.readline, b''):
-    if six.PY2:
-      line = line.strip()
-    else:
-      line = line.decode().strip()
-    output.append(line)
-    logging.info(line)
-
-  if process.returncode != 0:
-    raise subprocess.CalledProcessError(
-      process.returncode, "cmd: {0} exited with code {1}".format(
-        " ".join(command), process.returncode), "\n".join(output))
-
-  return "\n".join(output)
+  return subprocess_util.run_many(commands, cwd=cwd, env=env, timeout=timeout,
+                                  max_output_lines=max_output_lines)
 
 
 # TODO(jlewi): We should update callers to use run and just delete this function.
@@ -140,7 +135,10 @@ def clone_repo(dest,
   logging.info("repo %s", repo)
 
   # TODO(jlewi): How can we figure out what branch
-  run(["git", "clone", repo, dest])
+
+  # The clone is often used from other pods (e.g. through args.repos_dir) that
+  # don't have the mirror so it must not depend on it.
+  git_mirror.MirrorCache().clone(repo, dest, dissociate=True)
 
   if branches:
     for b in branches:
@@ -237,6 +235,28 @@ def delete_cluster(gke, name, project, zone):
                       e.resp["status"])
 
 # pylint: disable=too-many-arguments
+def _wait_for_resource(api_client, kind, namespace, name, predicate, timeout,
+                       label_selector=None, read=None, polling_interval=None):
+  """Wait for K8s resources to satisfy a predicate using a shared watch.
+
+  See k8s_waiter.Waiter.wait for the arguments. timeout and polling_interval
+  are datetime.timedelta. If read is supplied the resource is read first so
+  no watch is started if it already satisfies the predicate.
+
+  Raises:
+    k8s_waiter.WaitTimeoutError: If the predicate isn't satisfied in time.
+  """
+  if read:
+    result = predicate(read(name, namespace))
+    if result:
+      return result
+
+  if polling_interval:
+    polling_interval = polling_interval.total_seconds()
+  return k8s_waiter.get_waiter(api_client).wait(
+    kind, namespace, predicate, name=name, label_selector=label_selector,
+    timeout=timeout.total_seconds(), polling_interval=polling_interval)
+
 def wait_for_cr_condition(client,
                           group,
                           plural,
@@ -264,47 +284,32 @@ def wait_for_cr_condition(client,
       invoked after we poll the job. Callable takes a single argument which
       is the job.
   """
-  crd_api = k8s_client.CustomObjectsApi(client)
-  end_time = datetime.datetime.now() + timeout
-  while True:
-    # By setting async_req=True ApiClient returns multiprocessing.pool.AsyncResult
-    # If we don't set async_req=True then it could potentially block forever.
-    thread = crd_api.get_namespaced_custom_object(
-      group, version, namespace, plural, name, async_req=True)
-
-    # Try to get the result but timeout.
-    results = None
-    try:
-      results = thread.get(TIMEOUT)
-    except multiprocessing.TimeoutError:
-      logging.error("Timeout trying to get TFJob.")
-    except Exception as e:
-      logging.error("There was a problem waiting for Job %s.%s; Exception; %s",
-                    name, name, e)
-      raise
-
-    if results:
-      if status_callback:
-        status_callback(results)
-
-      # If we poll the CRD quick enough status won't have been set yet.
-      conditions = results.get("status", {}).get("conditions", [])
-      # Conditions might have a value of None in status.
-      conditions = conditions or []
-      for c in conditions:
-        if c.get("type", "") in expected_condition:
-          return results
-
-    if datetime.datetime.now() + polling_interval > end_time:
-      raise JobTimeoutError(
-        "Timeout waiting for job {0} in namespace {1} to enter one of the "
-        "conditions {2}.".format(name, namespace, conditions), results)
-
-    time.sleep(polling_interval.seconds)
-
-  # Linter complains if we don't have a return statement even though
-  # this code is unreachable.
-  return None
+  def _condition_reached(results):
+    if not results:
+      return None
+    if status_callback:
+      status_callback(results)
+
+    # If we poll the CRD quick enough status won't have been set yet.
+    conditions = results.get("status", {}).get("conditions", [])
+    # Conditions might have a value of None in status.
+    conditions = conditions or []
+    for c in conditions:
+      if c.get("type", "") in expected_condition:
+        return results
+    return None
+
+  kind = k8s_waiter.CustomResource(group, version, plural)
+  try:
+    return _wait_for_resource(client, kind, namespace, name,
+                              _condition_reached, timeout,
+                              polling_interval=polling_interval)
+  except k8s_waiter.WaitTimeoutError as e:
+    results = e.last_objects.get(name)
+    conditions = (results or {}).get("status", {}).get("conditions", [])
+    raise JobTimeoutError(
+      "Timeout waiting for job {0} in namespace {1} to enter one of the "
+      "conditions {2}.".format(name, namespace, conditions), results)
 
 def wait_for_operation(client,
                        project,
@@ -425,29 +430,28 @@ def wait_for_deployment(api_client,
   Raises:
     TimeoutError: If timeout waiting for deployment to be ready.
   """
-  # Wait for tiller to be ready
-  end_time = datetime.datetime.now() + datetime.timedelta(
-    minutes=timeout_minutes)
-
-  ext_client_apps = k8s_client.AppsV1Api(api_client)
-
-  while datetime.datetime.now() < end_time:
-    deploy = ext_client_apps.read_namespaced_deployment(name, namespace)
+  def _ready(deploy):
     # ready_replicas could be None
-    if (deploy.status.ready_replicas and
+    if (deploy and deploy.status.ready_replicas and
         deploy.status.ready_replicas >= replicas):
       logging.info("Deployment %s in namespace %s is ready", name, namespace)
       return deploy
     logging.info("Waiting for deployment %s in namespace %s", name, namespace)
-    time.sleep(10)
-
-  logging.error("Timeout waiting for deployment %s in namespace %s to be "
-                "ready", name, namespace)
-  run(["kubectl", "describe", "deployment", "-n", namespace, name])
-  raise TimeoutError(
-    "Timeout waiting for deployment {0} in namespace {1}".format(
-      name, namespace))
+    return None
 
+  apps_client = k8s_client.AppsV1Api(api_client)
+  try:
+    return _wait_for_resource(
+      api_client, "Deployment", namespace, name, _ready,
+      datetime.timedelta(minutes=timeout_minutes),
+      read=apps_client.read_namespaced_deployment)
+  except k8s_waiter.WaitTimeoutError:
+    logging.error("Timeout waiting for deployment %s in namespace %s to be "
+                  "ready", name, namespace)
+    run(["kubectl", "describe", "deployment", "-n", namespace, name])
+    raise TimeoutError(
+      "Timeout waiting for deployment {0} in namespace {1}".format(
+        name, namespace))
 
 def wait_for_ingress(api_client,
                     namespace,
@@ -467,29 +471,29 @@ def wait_for_ingress(api_client,
   Raises:
     TimeoutError: If timeout waiting for ingress to be ready.
   """
-  # Wait for tiller to be ready
-  end_time = datetime.datetime.now() + datetime.timedelta(
-    minutes=timeout_minutes)
-
-  net_client_apps = k8s_client.NetworkingV1beta1Api(api_client)
-
-  while datetime.datetime.now() < end_time:
-    ingress = net_client_apps.read_namespaced_ingress(name, namespace)
+  def _ready(ingress):
     try:
       if len(ingress.status.load_balancer.ingress[0].hostname) != 0: # pylint: disable=len-as-condition
         logging.info("Ingress %s in namespace %s is ready", name, namespace)
         return ingress
     except Exception: # pylint: disable=broad-except
-      logging.info("Waiting for ingress %s in namespace %s", name, namespace)
-      time.sleep(10)
-
-  logging.error("Timeout waiting for ingress %s in namespace %s to be "
-                "ready", name, namespace)
-  run(["kubectl", "describe", "ingress", "-n", namespace, name])
-  raise TimeoutError(
-    "Timeout waiting for ingress {0} in namespace {1}".format(
-      name, namespace))
+      pass
+    logging.info("Waiting for ingress %s in namespace %s", name, namespace)
+    return None
 
+  net_client = k8s_client.NetworkingV1beta1Api(api_client)
+  try:
+    return _wait_for_resource(
+      api_client, "Ingress", namespace, name, _ready,
+      datetime.timedelta(minutes=timeout_minutes),
+      read=net_client.read_namespaced_ingress)
+  except k8s_waiter.WaitTimeoutError:
+    logging.error("Timeout waiting for ingress %s in namespace %s to be "
+                  "ready", name, namespace)
+    run(["kubectl", "describe", "ingress", "-n", namespace, name])
+    raise TimeoutError(
+      "Timeout waiting for ingress {0} in namespace {1}".format(
+        name, namespace))
 
 def wait_for_job(api_client,
                  namespace,
@@ -509,16 +513,10 @@ def wait_for_job(api_client,
   Raises:
     TimeoutError: If timeout waiting for deployment to be ready.
   """
-  batch_api = k8s_client.BatchV1Api(api_client)
-
-  end_time = datetime.datetime.now() + timeout
-  while datetime.datetime.now() < end_time:
-    job = batch_api.read_namespaced_job(name, namespace)
-
-    if not job.status.conditions:
+  def _finished(job):
+    if not job or not job.status.conditions:
       logging.info("Job missing condition")
-      time.sleep(10)
-      continue
+      return None
 
     last_condition = job.status.conditions[-1]
     if last_condition.type in ["Failed", "Complete"]:
@@ -527,13 +525,18 @@ def wait_for_job(api_client,
       return job
 
     logging.info("Waiting for job %s.%s", namespace, name)
-    time.sleep(10)
-  logging.error("Timeout waiting for job %s.%s to finish.", namespace, name)
-  run(["kubectl", "describe", "job", "-n", namespace, name])
-  raise TimeoutError(
-    "Timeout waiting for job {0}.{1} to finish".format(
-      namespace, name))
+    return None
 
+  batch_api = k8s_client.BatchV1Api(api_client)
+  try:
+    return _wait_for_resource(api_client, "Job", namespace, name, _finished,
+                              timeout, read=batch_api.read_namespaced_job)
+  except k8s_waiter.WaitTimeoutError:
+    logging.error("Timeout waiting for job %s.%s to finish.", namespace, name)
+    run(["kubectl", "describe", "job", "-n", namespace, name])
+    raise TimeoutError(
+      "Timeout waiting for job {0}.{1} to finish".format(
+        namespace, name))
 
 def wait_for_jobs_with_label(api_client,
                              namespace,
@@ -553,24 +556,19 @@ def wait_for_jobs_with_label(api_client,
   Raises:
     TimeoutError: If timeout waiting for deployment to be ready.
   """
-  batch_api = k8s_client.BatchV1Api(api_client)
-
-  end_time = datetime.datetime.now() + timeout
-  while datetime.datetime.now() < end_time:
-    jobs = batch_api.list_namespaced_job(namespace, label_selector=label_filter)
+  counts = {"done": 0, "not_done": 0}
 
-    if not jobs.items:
+  def _all_finished(jobs):
+    if not jobs:
       raise ValueError("No jobs found in namespace {0} with labels {1}".format(
                        namespace, label_filter))
 
-    all_done = True
     done = 0
     not_done = 0
-    for job in jobs.items:
+    for job in jobs:
       if not job.status.conditions:
         logging.info("Job %s.%s missing condition", job.metadata.namespace,
                      job.metadata.name)
-        all_done = False
         not_done += 1
         continue
 
@@ -580,19 +578,32 @@ def wait_for_jobs_with_label(api_client,
                      job.metadata.name, last_condition.type)
         done += 1
 
-    if all_done:
-      logging.info("%s of %s jobs finished", len(jobs.items), len(jobs.items))
+    counts["done"] = done
+    counts["not_done"] = not_done
+    if not not_done:
+      logging.info("%s of %s jobs finished", len(jobs), len(jobs))
       return jobs
 
-    if not all_done:
-      logging.info("Waiting for job %s of %s jobs to finish", not_done,
-                   not_done + done)
-      time.sleep(10)
+    logging.info("Waiting for job %s of %s jobs to finish", not_done,
+                 not_done + done)
+    return None
 
-  message = ("Timeout waiting for jobs to finish; {0} of {1} "
-             "not finished.").format(not_done, not_done + done)
-  logging.error(message)
-  raise TimeoutError(message)
+  batch_api = k8s_client.BatchV1Api(api_client)
+  jobs = batch_api.list_namespaced_job(namespace, label_selector=label_filter)
+  if _all_finished(jobs.items):
+    return jobs
+
+  try:
+    jobs.items = _wait_for_resource(api_client, "Job", namespace, None,
+                                    _all_finished, timeout,
+                                    label_selector=label_filter)
+    return jobs
+  except k8s_waiter.WaitTimeoutError:
+    message = ("Timeout waiting for jobs to finish; {0} of {1} "
+               "not finished.").format(counts["not_done"],
+                                       counts["not_done"] + counts["done"])
+    logging.error(message)
+    raise TimeoutError(message)
 
 def check_secret(api_client, namespace, name):
   """Check for secret existance.
@@ -635,26 +646,27 @@ def wait_for_statefulset(api_client, namespace, name):
   Raises:
     TimeoutError: If timeout waiting for deployment to be ready.
   """
-  # Wait for tiller to be ready
-  end_time = datetime.datetime.now() + datetime.timedelta(minutes=2)
-
-  apps_client = k8s_client.AppsV1Api(api_client)
-
-  while datetime.datetime.now() < end_time:
-    stateful = apps_client.read_namespaced_stateful_set(name, namespace)
-    if stateful.status.ready_replicas and stateful.status.ready_replicas >= 1:
+  def _ready(stateful):
+    if (stateful and stateful.status.ready_replicas and
+        stateful.status.ready_replicas >= 1):
       logging.info("Statefulset %s in namespace %s is ready", name, namespace)
       return stateful
     logging.info("Waiting for Statefulset %s in namespace %s", name, namespace)
-    time.sleep(10)
+    return None
 
+  apps_client = k8s_client.AppsV1Api(api_client)
+  try:
+    return _wait_for_resource(
+      api_client, "StatefulSet", namespace, name, _ready,
+      datetime.timedelta(minutes=2),
+      read=apps_client.read_namespaced_stateful_set)
+  except k8s_waiter.WaitTimeoutError:
+    logging.error("Timeout waiting for statefulset %s in namespace %s to be "
+                  "ready", name, namespace)
     run(["kubectl", "describe", "statefulset", "-n", namespace, name])
-  logging.error("Timeout waiting for statefulset %s in namespace %s to be "
-                "ready", name, namespace)
-  raise TimeoutError(
-    "Timeout waiting for statefulset {0} in namespace {1}".format(
-      name, namespace))
-
+    raise TimeoutError(
+      "Timeout waiting for statefulset {0} in namespace {1}".format(
+        name, namespace))
 
 def wait_for_daemonset(api_client, namespace, name):
   """Wait for daemonset to be ready.
@@ -670,26 +682,27 @@ def wait_for_daemonset(api_client, namespace, name):
   Raises:
     TimeoutError: If timeout waiting for daemonset to be ready.
   """
-  # Wait for tiller to be ready
-  end_time = datetime.datetime.now() + datetime.timedelta(minutes=2)
-
-  apps_client = k8s_client.AppsV1Api(api_client)
-
-  while datetime.datetime.now() < end_time:
-    damon = apps_client.read_namespaced_daemon_set(name, namespace)
-    if damon.status.desired_number_scheduled == damon.status.current_number_scheduled:
+  def _ready(damon):
+    if (damon and damon.status.desired_number_scheduled ==
+        damon.status.current_number_scheduled):
       logging.info("Daemonset %s in namespace %s is ready", name, namespace)
       return damon
     logging.info("Waiting for Damonset %s in namespace %s", name, namespace)
-    time.sleep(10)
+    return None
 
+  apps_client = k8s_client.AppsV1Api(api_client)
+  try:
+    return _wait_for_resource(
+      api_client, "DaemonSet", namespace, name, _ready,
+      datetime.timedelta(minutes=2),
+      read=apps_client.read_namespaced_daemon_set)
+  except k8s_waiter.WaitTimeoutError:
+    logging.error("Timeout waiting for daemonset %s in namespace %s to be "
+                  "ready", name, namespace)
     run(["kubectl", "describe", "daemonset", "-n", namespace, name])
-  logging.error("Timeout waiting for daemonset %s in namespace %s to be "
-                "ready", name, namespace)
-  raise TimeoutError(
-    "Timeout waiting for daemonset {0} in namespace {1}".format(
-      name, namespace))
-
+    raise TimeoutError(
+      "Timeout waiting for daemonset {0} in namespace {1}".format(
+        name, namespace))
 
 def install_gpu_drivers(api_client):
   """Install GPU drivers on the cluster.
@@ -832,6 +845,24 @@ def load_kube_credentials():
   logging.info("Attempting to load credentials from default KUBECONFIG file")
   load_kube_config(persist_config=False)
 
+# The default configuration set by the last call to load_kube_config and the
+# arguments it was loaded with.
+_default_kube_config = [None, None]
+
+def default_kube_config_args():
+  """Return the arguments the default K8s configuration was loaded with.
+
+  Returns:
+    kwargs: Dictionary with the config_file, context and persist_config
+      load_kube_config loaded the default configuration with or None if the
+      default was set some other way; e.g. by load_incluster_config.
+  """
+  default, kwargs = _default_kube_config
+  if (kwargs is None or
+      default is not kubernetes_configuration.Configuration._default): # pylint: disable=protected-access
+    return None
+  return dict(kwargs)
+
 # TODO(jlewi): This was originally a work around for
 # https://github.com/kubernetes-incubator/client-python/issues/339.
 #
@@ -887,6 +918,13 @@ def load_kube_config(config_file=None,
     config = type.__call__(kubernetes_configuration.Configuration)
     loader.load_and_set(config) # pylint: disable=too-many-function-args
     kubernetes_configuration.Configuration.set_default(config)
+    # Record the context actually loaded; the current context of the file may
+    # change later.
+    _default_kube_config[:] = [
+      kubernetes_configuration.Configuration._default, # pylint: disable=protected-access
+      {"config_file": config_file,
+       "context": loader.current_context["name"],
+       "persist_config": persist_config}]
   else:
     loader.load_and_set(client_configuration) # pylint: disable=too-many-function-args
   # Dump the loaded config.
@@ -918,25 +956,17 @@ def filter_spartakus(spec):
   return spec
 
 def upload_to_gcs(contents, target):
-  gcs_client = storage.Client()
-
   bucket_name, path = split_gcs_uri(target)
 
-  bucket = gcs_client.get_bucket(bucket_name)
   logging.info("Writing %s", target)
-  blob = bucket.blob(path)
-  blob.upload_from_string(contents)
+  gcs_store.get_store().write(bucket_name, path, contents)
 
 
 def upload_file_to_gcs(source, target):
-  gcs_client = storage.Client()
   bucket_name, path = split_gcs_uri(target)
 
-  bucket = gcs_client.get_bucket(bucket_name)
-
   logging.info("Uploading file %s to %s.", source, target)
-  blob = bucket.blob(path)
-  blob.upload_from_filename(source)
+  gcs_store.get_store().upload_file(source, bucket_name, path)
 
 
 def read_file(path):
@@ -951,16 +981,11 @@ def read_file(path):
 
   if not path.lower().startswith("gs://"):
     with open(path) as hf:
-      hf.read()
+      return hf.read()
 
   bucket_name, path = split_gcs_uri(path)
 
-  gcs_client = storage.Client()
-
-  bucket = gcs_client.get_bucket(bucket_name)
-
-  blob = bucket.blob(path)
-  return blob.download_as_string()
+  return gcs_store.get_store().read(bucket_name, path)
 
 def makedirs(path):
   """
@@ -3,6 +3,7 @@ from __future__ import print_function
 import unittest
 
 from kubeflow.testing import argo_client
+from kubernetes.client import rest
 import mock
 import os
 import yaml
@@ -12,7 +13,7 @@ class ArgoClientTest(unittest.TestCase):
     self.test_dir = os.path.join(os.path.dirname(__file__), "test-data")
 
   def test_wait_for_workflow(self):
-    with mock.patch("kubeflow.testing.argo_client.k8s_client.ApiClient") as mock_client:
+    with mock.patch("kubeflow.testing.argo_client.k8s_clients.get_api_client") as mock_client:
       with open(os.path.join(self.test_dir, "successful_workflow.yaml")) as hf:
         response = yaml.load(hf)
 
@@ -21,5 +22,62 @@ class ArgoClientTest(unittest.TestCase):
         result = argo_client.wait_for_workflow("some-namespace", "some-set")
         self.assertIsNotNone(result)
 
+  def test_wait_for_workflows_watch(self):
+    def _workflow(name, phase, resource_version):
+      return {"metadata": {"name": name, "namespace": "some-namespace",
+                           "resourceVersion": resource_version},
+              "status": {"phase": phase}}
+
+    listed = {"metadata": {"resourceVersion": "1"},
+              "items": [_workflow("wf-1", "Running", "1"),
+                        _workflow("wf-2", "Succeeded", "1"),
+                        _workflow("other", "Running", "1")]}
+    events = [{"type": "MODIFIED", "object": _workflow("other", "Failed", "2")},
+              {"type": "MODIFIED", "object": _workflow("wf-1", "Failed", "3")}]
+
+    with mock.patch("kubeflow.testing.argo_client.k8s_client.CustomObjectsApi") as mock_api, \
+         mock.patch("kubeflow.testing.argo_client.watch.Watch") as mock_watch:
+      mock_api.return_value.list_namespaced_custom_object.return_value = listed
+      mock_watch.return_value.stream.return_value = iter(events)
+
+      results = argo_client.wait_for_workflows("some-namespace",
+                                               ["wf-1", "wf-2"])
+
+      self.assertEqual(["Failed", "Succeeded"],
+                       [r["status"]["phase"] for r in results])
+      # The watch should resume from the resourceVersion of the list.
+      _, kwargs = mock_watch.return_value.stream.call_args
+      self.assertEqual("1", kwargs["resource_version"])
+
+  def test_wait_for_workflows_watch_gone(self):
+    def _workflow(name, phase, resource_version):
+      return {"metadata": {"name": name, "namespace": "some-namespace",
+                           "resourceVersion": resource_version},
+              "status": {"phase": phase}}
+
+    lists = [{"metadata": {"resourceVersion": "1"},
+              "items": [_workflow("wf-1", "Running", "1")]},
+             {"metadata": {"resourceVersion": "5"},
+              "items": [_workflow("wf-1", "Running", "4")]}]
+
+    def _stream(*_, **kwargs):
+      if kwargs["resource_version"] == "1":
+        # kubernetes>=12 raises instead of returning an ERROR event.
+        raise rest.ApiException(status=410, reason="Gone")
+      yield {"type": "MODIFIED", "object": _workflow("wf-1", "Succeeded", "6")}
+
+    with mock.patch("kubeflow.testing.argo_client.k8s_client.CustomObjectsApi") as mock_api, \
+         mock.patch("kubeflow.testing.argo_client.watch.Watch") as mock_watch:
+      mock_api.return_value.list_namespaced_custom_object.side_effect = lists
+      mock_watch.return_value.stream.side_effect = _stream
+
+      results = argo_client.wait_for_workflows("some-namespace", ["wf-1"])
+
+      self.assertEqual(["Succeeded"], [r["status"]["phase"] for r in results])
+      # The watch resumes from the resourceVersion of the second list.
+      _, kwargs = mock_watch.return_value.stream.call_args
+      self.assertEqual("5", kwargs["resource_version"])
+      self.assertEqual(2, mock_watch.return_value.stream.call_count)
+
 if __name__ == "__main__":
   unittest.main()
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+from kubeflow.testing import ks_util
+
+# The params.libsonnet file created by ks env add.
+ENV_PARAMS = """local params = std.extVar('__ksonnet/params');
+local globals = import 'globals.libsonnet';
+local envParams = params + {
+  components+: {
+  },
+};
+
+{
+  components: {
+    [x]: envParams.components[x] + globals
+    for x in std.objectFields(envParams.components)
+  },
+}
+"""
+
+class KsUtilTest(unittest.TestCase):
+  def test_param_value(self):
+    self.assertEqual("10", ks_util.param_value(10))
+    self.assertEqual("-1.5e3", ks_util.param_value("-1.5e3"))
+    self.assertEqual("true", ks_util.param_value(True))
+    self.assertEqual('["a", 1]', ks_util.param_value('["a",1]'))
+    self.assertEqual('"nan"', ks_util.param_value("nan"))
+    # Jsonnet can't parse numbers with leading zeros.
+    self.assertEqual('"0123456"', ks_util.param_value("0123456"))
+    self.assertEqual('"007"', ks_util.param_value("007"))
+    self.assertEqual('"-00.5"', ks_util.param_value("-00.5"))
+    self.assertEqual("0", ks_util.param_value(0))
+    self.assertEqual("0.5", ks_util.param_value("0.5"))
+    self.assertEqual('"a=b,c=\\"d\\""', ks_util.param_value('a=b,c="d"'))
+    with self.assertRaises(ValueError):
+      ks_util.param_value(None)
+
+  def test_set_env_params(self):
+    app_dir = tempfile.mkdtemp()
+    env_dir = os.path.join(app_dir, "environments", "some-env")
+    os.makedirs(env_dir)
+    params_file = os.path.join(env_dir, "params.libsonnet")
+    with open(params_file, "w") as hf:
+      hf.write(ENV_PARAMS)
+
+    ks_util.set_env_params(app_dir, "some-env", "workflows",
+                           {"name": "some-workflow", "replicas": 2})
+
+    with open(params_file) as hf:
+      actual = hf.read()
+
+    expected = ENV_PARAMS.replace("""  components+: {
+""", """  components+: {
+    "workflows"+: {
+      "name": "some-workflow",
+      "replicas": 2,
+    },
+""")
+    self.assertEqual(expected, actual)
+
+  def test_set_env_params_none(self):
+    app_dir = tempfile.mkdtemp()
+    env_dir = os.path.join(app_dir, "environments", "some-env")
+    os.makedirs(env_dir)
+    params_file = os.path.join(env_dir, "params.libsonnet")
+    with open(params_file, "w") as hf:
+      hf.write(ENV_PARAMS)
+
+    with self.assertRaises(ValueError):
+      ks_util.set_env_params(app_dir, "some-env", "workflows",
+                             {"name": "some-workflow", "bucket": None})
+
+    # The file isn't modified.
+    with open(params_file) as hf:
+      self.assertEqual(ENV_PARAMS, hf.read())
+
+  def test_set_env_params_missing_components(self):
+    app_dir = tempfile.mkdtemp()
+    env_dir = os.path.join(app_dir, "environments", "some-env")
+    os.makedirs(env_dir)
+    with open(os.path.join(env_dir, "params.libsonnet"), "w") as hf:
+      hf.write("{}")
+
+    with self.assertRaises(ValueError):
+      ks_util.set_env_params(app_dir, "some-env", "workflows", {"a": "b"})
+
+if __name__ == "__main__":
+  unittest.main()
@@ -1,8 +1,11 @@
 import json
 import os
+import tempfile
 import unittest
 import mock
+from kubeflow.testing import gcs_store
 from kubeflow.testing import prow_artifacts
+from kubeflow.testing import util
 from google.cloud import storage  # pylint: disable=no-name-in-module
 
 class TestProw(unittest.TestCase):
@@ -21,13 +24,14 @@ class TestProw(unittest.TestCase):
         },
         "metadata": {
           "workflow1-ui": "http://argo",
+          "workflow1-submit-seconds": 2.5,
         },
     }
 
     ui_urls = {
       "workflow1": "http://argo",
     }
-    actual = prow_artifacts.create_started(ui_urls)
+    actual = prow_artifacts.create_started(ui_urls, {"workflow1": 2.4999})
 
     self.assertEqual(expected, json.loads(actual))
 
@@ -60,8 +64,8 @@ class TestProw(unittest.TestCase):
     os.environ.pop("PULL_REFS")
     self.assertEqual(expected, json.loads(actual))
 
-  @mock.patch("kubeflow.testing.prow_artifacts.util.run")
-  def testCopyArtifactsPresubmit(self, mock_run):  # pylint: disable=no-self-use
+  @mock.patch("kubeflow.testing.prow_artifacts.gcs_sync.sync_dir")
+  def testCopyArtifactsPresubmit(self, mock_sync):  # pylint: disable=no-self-use
     """Test copy artifacts to GCS."""
 
     os.environ = {}
@@ -77,25 +81,21 @@ class TestProw(unittest.TestCase):
             "--bucket=some_bucket"]
     prow_artifacts.main(args)
 
-    mock_run.assert_called_once_with(
-      ["gsutil", "-m", "rsync", "-r", "/tmp/some/dir",
-       "gs://some_bucket/pr-logs/pull/fake_org_fake_name/72/kubeflow-presubmit"
-       "/100"],
+    mock_sync.assert_called_once_with(
+      "/tmp/some/dir",
+      "gs://some_bucket/pr-logs/pull/fake_org_fake_name/72/kubeflow-presubmit"
+      "/100",
     )
 
   def testCreateSymlink(self): # pylint: disable=no-self-use
     gcs_client = mock.MagicMock(spec=storage.Client)
     mock_bucket = mock.MagicMock(spec=storage.Bucket)
-    gcs_client.get_bucket.return_value = mock_bucket
+    gcs_client.bucket.return_value = mock_bucket
     mock_blob = mock.MagicMock(spec=storage.Blob)
     mock_bucket.blob.return_value = mock_blob
-    # We can't add the decorator the instance method because that would
-    # interfere with creating gcs_client since storage.Client would then
-    # point to the mock and not the actual class.
-    with mock.patch("kubeflow.testing.prow_artifacts.storage"
-                    ".Client") as mock_client:
-      mock_client.return_value = gcs_client
 
+    previous = gcs_store.set_store(gcs_store.GcsStore(gcs_client))
+    try:
       os.environ["REPO_OWNER"] = "fake_org"
       os.environ["REPO_NAME"] = "fake_name"
       os.environ["PULL_NUMBER"] = "72"
@@ -108,9 +108,102 @@ class TestProw(unittest.TestCase):
               "--bucket=some-bucket"]
       prow_artifacts.main(args)
 
+      gcs_client.bucket.assert_called_once_with("some-bucket")
+      mock_bucket.blob.assert_called_once_with(
+        "pr-logs/directory/kubeflow-presubmit/100.txt")
       mock_blob.upload_from_string.assert_called_once_with(
         "gs://some-bucket/pr-logs/pull/fake_org_fake_name/72"
         "/kubeflow-presubmit/100")
+    finally:
+      gcs_store.set_store(previous)
+
+  def testProwJobArtifacts(self):
+    os.environ["REPO_OWNER"] = "fake_org"
+    os.environ["REPO_NAME"] = "fake_name"
+    os.environ["PULL_NUMBER"] = "72"
+    os.environ["BUILD_NUMBER"] = "100"
+    os.environ["JOB_NAME"] = "kubeflow-presubmit"
+    os.environ["JOB_TYPE"] = "presubmit"
+    os.environ["BUILD_ID"] = "100"
+
+    root_dir = tempfile.mkdtemp()
+    log_file = os.path.join(root_dir, "build-log.txt")
+    with open(log_file, "w") as hf:
+      hf.write("some logs")
+
+    artifacts = prow_artifacts.ProwJobArtifacts(
+      "some-bucket", store=gcs_store.LocalStore(root_dir))
+    artifacts.add("wf.yaml", "status: {}")
+    artifacts.add_file("build-log.txt", log_file)
+    artifacts.add_pr_symlink()
+
+    self.assertFalse(artifacts.finalize(False, {"wf": "Failed"}, {}))
+
+    output_dir = os.path.join(
+      root_dir, "some-bucket", "pr-logs/pull/fake_org_fake_name/72"
+      "/kubeflow-presubmit/100")
+    with open(os.path.join(output_dir, "wf.yaml")) as hf:
+      self.assertEqual("status: {}", hf.read())
+    with open(os.path.join(output_dir, "build-log.txt")) as hf:
+      self.assertEqual("some logs", hf.read())
+    with open(os.path.join(output_dir, "finished.json")) as hf:
+      finished = json.load(hf)
+    self.assertEqual("FAILED", finished["result"])
+    self.assertEqual("Failed", finished["metadata"]["wf-phase"])
+    self.assertTrue(os.path.exists(os.path.join(
+      root_dir, "some-bucket", "pr-logs/directory/kubeflow-presubmit/100.txt")))
+    self.assertEqual([], artifacts.flush())
+
+  def testFinalizeChecksJunitInStore(self):
+    os.environ["JOB_NAME"] = "kubeflow-periodic"
+    os.environ["JOB_TYPE"] = "periodic"
+    os.environ["BUILD_ID"] = "100"
+
+    root_dir = tempfile.mkdtemp()
+    store = gcs_store.LocalStore(root_dir)
+    artifacts = prow_artifacts.ProwJobArtifacts("some-bucket", store=store)
+    _, output_path = util.split_gcs_uri(artifacts.output_dir)
+    store.write("some-bucket", output_path + "/artifacts/junit_pass.xml",
+                '<testsuite failures="0" tests="1"></testsuite>')
+    self.assertTrue(artifacts.finalize(True, {"wf": "Succeeded"}, {}))
+
+    store.write("some-bucket", output_path + "/artifacts/junit_fail.xml",
+                '<testsuite failures="1" tests="1"></testsuite>')
+    self.assertFalse(artifacts.finalize(True, {"wf": "Succeeded"}, {}))
+    finished = json.loads(store.read("some-bucket",
+                                     output_path + "/finished.json"))
+    self.assertEqual("FAILED", finished["result"])
+
+  def testCheckNoErrors(self): # pylint: disable=no-self-use
+    files = {
+      "junit/junit_pass.xml": b'<testsuite failures="0" tests="2">',
+      "junit/junit_fail.xml": (b'<?xml version="1.0"?>\n'
+                               b'<testsuite failures="2" tests="2">'
+                               b'<testcase name="a"><failure/>'),
+      "junit/notes.txt": b"",
+    }
+    blobs = []
+    for name, contents in files.items():
+      blob = mock.MagicMock(spec=storage.Blob)
+      blob.name = "some/prefix/artifacts/" + name
+      # Only the start of the file is downloaded so it doesn't need to be
+      # valid XML.
+      blob.download_as_string.return_value = contents
+      blobs.append(blob)
+
+    gcs_client = mock.MagicMock(spec=storage.Client)
+    bucket = gcs_client.bucket.return_value
+    bucket.list_blobs.return_value = blobs
+    bucket.blob.side_effect = dict((b.name, b) for b in blobs).get
+
+    summary = prow_artifacts.summarize_junit(
+      gcs_client, "gs://some-bucket/some/prefix/artifacts")
+    self.assertEqual(prow_artifacts.JUNIT_SUMMARY(
+      2, 2,
+      {"gs://some-bucket/some/prefix/artifacts/junit/junit_fail.xml": 2}),
+      summary)
+    self.assertFalse(prow_artifacts.check_no_errors(
+      gcs_client, "gs://some-bucket/some/prefix/artifacts"))
 
 if __name__ == "__main__":
   unittest.main()
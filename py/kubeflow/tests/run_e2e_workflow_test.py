@@ -1,4 +1,8 @@
+import argparse
+import collections
 import os
+import threading
+import time
 import unittest
 import mock
 from kubeflow.testing import run_e2e_workflow
@@ -23,5 +27,102 @@ class TestRunE2eWorkflow(unittest.TestCase):
       pattern = "^" + e + "$"
       six.assertRegex(self, actual[index], pattern)
 
+  def testRunKsonnetWorkflows(self):
+    repos_dir = tempfile.mkdtemp()
+    config_file = os.path.join(repos_dir, "prow_config.yaml")
+    with open(config_file, "w") as hf:
+      yaml.safe_dump({"workflows": [
+        {"name": "a", "app_dir": "kubeflow/testing/workflows",
+         "component": "workflows"},
+        {"name": "b", "app_dir": "kubeflow/testing/workflows",
+         "component": "workflows"},
+        {"name": "c", "app_dir": "kubeflow/other/workflows",
+         "component": "workflows", "params": {"extra": "value"}},
+      ]}, hf)
+
+    args = argparse.Namespace(
+      repos_dir=repos_dir, config_file=config_file, explain=False,
+      release=False, bucket="some-bucket", project="some-project",
+      zone="some-zone", cluster="some-cluster", cloud_provider=None,
+      namespace=None, tekton_namespace="tekton")
+
+    lock = threading.Lock()
+    running = collections.Counter()
+    max_running = collections.Counter()
+    commands = []
+
+    def fake_run(command, cwd=None):
+      with lock:
+        commands.append((command, cwd))
+        running[cwd] += 1
+        max_running[cwd] = max(max_running[cwd], running[cwd])
+      time.sleep(.05)
+      with lock:
+        running[cwd] -= 1
+      return ""
+
+    def wait_for_workflows(namespace, names, **kwargs):
+      self.assertEqual("kubeflow-test-infra", namespace)
+      # Only the workflows submitted by this run are listed and watched.
+      self.assertEqual(run_e2e_workflow.argo_client.RUNNER_SELECTOR,
+                       kwargs["label_selector"])
+      return [{"metadata": {"name": n}, "status": {"phase": "Succeeded"}}
+              for n in names]
+
+    file_handler = mock.MagicMock()
+    file_handler.baseFilename = os.path.join(repos_dir, "build-log.txt")
+    env = {"JOB_TYPE": "periodic", "JOB_NAME": "some-job", "BUILD_NUMBER": "1"}
+    with mock.patch.dict(os.environ, env), \
+         mock.patch.object(run_e2e_workflow.util, "run", fake_run), \
+         mock.patch.object(run_e2e_workflow.util,
+                           "maybe_activate_service_account"), \
+         mock.patch.object(run_e2e_workflow.util, "configure_kubectl"), \
+         mock.patch.object(run_e2e_workflow.util, "load_kube_config"), \
+         mock.patch.object(run_e2e_workflow, "create_started_file"), \
+         mock.patch.object(run_e2e_workflow.ks_util, "get_ksonnet_cmd",
+                           return_value="ks"), \
+         mock.patch.object(run_e2e_workflow.ks_util,
+                           "set_env_params") as set_env_params, \
+         mock.patch.object(run_e2e_workflow.tekton_client,
+                           "TektonRunner") as tekton_runner, \
+         mock.patch.object(run_e2e_workflow.argo_client, "wait_for_workflows",
+                           side_effect=wait_for_workflows), \
+         mock.patch.object(run_e2e_workflow.argo_client,
+                           "add_runner_label") as add_runner_label, \
+         mock.patch.object(run_e2e_workflow.prow_artifacts,
+                           "ProwJobArtifacts") as artifacts:
+      tekton_runner.return_value.run.return_value = {}
+      tekton_runner.return_value.join.return_value = []
+      artifacts.return_value.finalize.return_value = True
+
+      self.assertTrue(run_e2e_workflow.run(args, file_handler))
+
+    app_dirs = [os.path.join(repos_dir, "kubeflow", n, "workflows")
+                for n in ["testing", "other"]]
+    applied = [c for c in commands if c[0][1] in ("show", "apply")]
+    self.assertEqual(6, len(applied))
+    # ks commands on the same app never run concurrently.
+    self.assertEqual([1, 1], [max_running[d] for d in app_dirs])
+
+    labeled = sorted(c[0] for c in add_runner_label.call_args_list)
+    self.assertEqual(
+      sorted(("kubeflow-test-infra", c[0][1]) for c in
+             set_env_params.call_args_list), labeled)
+
+    self.assertEqual(3, set_env_params.call_count)
+    for call in set_env_params.call_args_list:
+      app_dir, env_name, component, params = call[0]
+      self.assertIn(app_dir, app_dirs)
+      self.assertEqual("workflows", component)
+      self.assertEqual(env_name, params["name"])
+      self.assertEqual("some-bucket", params["bucket"])
+      six.assertRegex(self, env_name, "^some-job-[abc]-1-[0-9a-f]{4}$")
+      if env_name.startswith("some-job-c"):
+        self.assertEqual("value", params["extra"])
+
+    finalize_args = artifacts.return_value.finalize.call_args[0]
+    self.assertTrue(finalize_args[0])
+    self.assertEqual(["Succeeded"] * 3, list(finalize_args[1].values()))
+
 if __name__ == "__main__":
   unittest.main()
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+
+import mock
+
+from kubeflow.testing import tekton_client
+
+def _pipeline_run(name, reason):
+  return {
+    "metadata": {
+      "name": name,
+      "namespace": "kf-ci",
+      "resourceVersion": "1",
+      "creationTimestamp": "2020-01-01T00:00:00Z",
+    },
+    "status": {
+      "conditions": [{"reason": reason}],
+      "startTime": "2020-01-01T00:01:00Z",
+      "completionTime": "2020-01-01T00:11:00Z",
+    },
+  }
+
+class FakeWaiter(object):
+  """Fake k8s_waiter.Waiter returning finished PipelineRuns."""
+
+  def __init__(self):
+    self.names = []
+    self.label_selectors = set()
+
+  def wait(self, _kind, _namespace, predicate, name=None, label_selector=None, # pylint: disable=unused-argument
+           timeout=None):
+    self.names.append(name)
+    self.label_selectors.add(label_selector)
+    return predicate(_pipeline_run(name, "Succeeded"))
+
+def _runner(name):
+  with mock.patch("kubeflow.testing.tekton_client.load_tekton_run") as load:
+    load.return_value = {"metadata": {"generateName": name + "-"}}
+    runner = tekton_client.PipelineRunner([], "", "", "", "", "", "")
+
+  def _run(_api_client=None):
+    runner.name = name
+  runner.run = _run
+  runner.name = name
+  return runner
+
+class TektonClientTest(unittest.TestCase):
+  @mock.patch("kubeflow.testing.tekton_client.k8s_clients.get_api_client")
+  @mock.patch("kubeflow.testing.tekton_client.k8s_waiter.get_waiter")
+  def test_join(self, mock_get_waiter, _mock_client):
+    waiter = FakeWaiter()
+    mock_get_waiter.return_value = waiter
+
+    runner = tekton_client.TektonRunner()
+    with_teardown = _runner("a")
+    teardown = _runner("a-teardown")
+    teardown.name = None
+    with_teardown.append_teardown(teardown)
+    runner.append(with_teardown)
+    runner.append(_runner("b"))
+
+    results = runner.join()
+
+    self.assertEqual(["a", "a-teardown", "b"],
+                     [r["metadata"]["name"] for r in results])
+    # Only the runs started by this process are watched.
+    self.assertEqual({"{0}={1}".format(tekton_client.RUNNER_LABEL,
+                                       tekton_client.RUNNER_ID)},
+                     waiter.label_selectors)
+    self.assertEqual(tekton_client.RUNNER_ID, teardown.config["metadata"][
+      "labels"][tekton_client.RUNNER_LABEL])
+    # The teardown is only started once the pipeline it tears down finished.
+    self.assertLess(waiter.names.index("a"), waiter.names.index("a-teardown"))
+    self.assertEqual({"queued": "2020-01-01T00:00:00Z",
+                      "started": "2020-01-01T00:01:00Z",
+                      "finished": "2020-01-01T00:11:00Z"},
+                     teardown.timestamps)
+
+  @mock.patch("kubeflow.testing.tekton_client.k8s_clients.get_api_client")
+  @mock.patch("kubeflow.testing.tekton_client.k8s_waiter.get_waiter")
+  def test_join_error(self, mock_get_waiter, _mock_client):
+    mock_get_waiter.return_value.wait.side_effect = RuntimeError("boom")
+
+    runner = tekton_client.TektonRunner()
+    runner.append(_runner("a"))
+
+    with self.assertRaises(RuntimeError):
+      runner.join()
+
+  @mock.patch("kubeflow.testing.tekton_client.gcs_sync.sync_dir")
+  def test_junit_parse_and_upload(self, mock_sync_dir):
+    artifacts_dir = tempfile.mkdtemp()
+    for name, failures in [("junit_a.xml", 0), ("junit_b.xml", 1),
+                           ("junit_c.xml", 1)]:
+      with open(os.path.join(artifacts_dir, name), "w") as hf:
+        hf.write("<testsuite>{0}</testsuite>".format(
+          "<testcase name='t'><failure/></testcase>" * failures))
+
+    # Failures are summed across files.
+    with self.assertRaisesRegex(ValueError, "failed with 2 errors/failures"):
+      tekton_client.CLI.junit_parse_and_upload(artifacts_dir, "gs://b/dir")
+
+    # The artifacts and the summaries are uploaded.
+    self.assertEqual(artifacts_dir, mock_sync_dir.call_args_list[0][0][0])
+    summary_dir = mock_sync_dir.call_args_list[1][0][0]
+    self.assertEqual([tekton_client.SUMMARY_JUNIT, tekton_client.SUMMARY_INDEX],
+                     sorted(os.listdir(summary_dir)))
+
+if __name__ == "__main__":
+  unittest.main()